@@ -1,5 +1,11 @@
 import asyncio
+import logging
+import sys
 import threading
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Iterable, Union
+
+# the library does not configure logging; records are handled only if the application sets handlers up
+logging.getLogger(__name__).addHandler(logging.NullHandler())
 
 class RunThread(threading.Thread):
     def __init__(self, func, args, kwargs):
@@ -22,4 +28,78 @@ def run_async(func, *args, **kwargs):
         thread.join()
         return thread.result
     else:
-        return asyncio.run(func(*args, **kwargs))
\ No newline at end of file
+        return asyncio.run(func(*args, **kwargs))
+
+def set_selector_event_loop_policy():
+    """On Windows, the default proactor event loop fails on closing aiohttp sessions, so the selector one is used"""
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+
+def fail_futures(futures: Iterable[asyncio.Future], error: BaseException) -> None:
+    """Resolves pending futures of a failed batch: they are cancelled if the batch was cancelled,
+    otherwise they get the error"""
+    for future in futures:
+        if future.done():
+            continue
+        if isinstance(error, asyncio.CancelledError):
+            future.cancel()
+        else:
+            future.set_exception(error)
+            # the exception is retrieved by callers; mark it retrieved for the futures nobody awaits
+            future.exception()
+
+
+async def bounded_as_completed(aws: Union[Iterable[Awaitable], AsyncIterable[Awaitable]],
+                               window: int) -> AsyncIterator[Any]:
+    """Runs awaitables with at most `window` of them in flight and yields their results in the order of completion.
+
+    Awaitables are taken from `aws` only when there is room for them, so it may be a lazy generator of coroutines
+    over a large input. An asynchronous iterable is awaited together with the awaitables in flight, so their
+    errors are raised without waiting for the next input. The first error is raised at once; awaitables in flight
+    are cancelled when the iteration fails or the generator is closed (close it with aclose() if the body of
+    the loop may raise).
+
+    Args:
+        aws (Union[Iterable[Awaitable], AsyncIterable[Awaitable]]): awaitables (e.g. coroutines) to run
+        window (int): maximum number of awaitables in flight
+
+    Yields:
+        Any: results of the awaitables in the order of completion
+    """
+    is_async = hasattr(aws, '__aiter__')
+    iterator = aws.__aiter__() if is_async else iter(aws)
+    exhausted = False
+    next_input = None  # task taking the next awaitable from the asynchronous iterable
+    in_flight = set()
+    try:
+        while True:
+            if is_async:
+                if not exhausted and next_input is None and len(in_flight) < window:
+                    next_input = asyncio.ensure_future(iterator.__anext__())
+            else:
+                while not exhausted and len(in_flight) < window:
+                    aw = next(iterator, None)
+                    if aw is None:
+                        exhausted = True
+                    else:
+                        in_flight.add(asyncio.ensure_future(aw))
+            waiting = in_flight if next_input is None else in_flight | {next_input}
+            if not waiting:
+                return
+            done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+            if next_input in done:
+                done.remove(next_input)
+                try:
+                    in_flight.add(asyncio.ensure_future(next_input.result()))
+                except StopAsyncIteration:
+                    exhausted = True
+                next_input = None
+            in_flight -= done
+            for task in done:
+                yield task.result()
+    finally:
+        for task in in_flight:
+            task.cancel()
+        if next_input is not None:
+            next_input.cancel()
@@ -1 +1,38 @@
-from asyncwikidata.api.async_api_wrapper import AsyncAPIWrapper
\ No newline at end of file
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+# submodules are imported on first access (PEP 562), so that importing the package does not pull in
+# aiohttp, requests and numpy until they are needed
+_EXPORTS = {
+    'AsyncAPIWrapper': 'asyncwikidata.api.async_api_wrapper',
+    'EntityCache': 'asyncwikidata.api.entity_cache',
+    'EntityLoader': 'asyncwikidata.api.entity_loader',
+    'StatementTable': 'asyncwikidata.api.statements',
+    'DumpReader': 'asyncwikidata.api.dump_reader',
+    'traverse': 'asyncwikidata.api.traversal',
+    'paginate': 'asyncwikidata.api.paginator',
+    'paginate_many': 'asyncwikidata.api.paginator',
+}
+
+__all__ = list(_EXPORTS)
+
+if TYPE_CHECKING:
+    from asyncwikidata.api.async_api_wrapper import AsyncAPIWrapper
+    from asyncwikidata.api.entity_cache import EntityCache
+    from asyncwikidata.api.entity_loader import EntityLoader
+    from asyncwikidata.api.statements import StatementTable
+    from asyncwikidata.api.dump_reader import DumpReader
+    from asyncwikidata.api.traversal import traverse
+    from asyncwikidata.api.paginator import paginate, paginate_many
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
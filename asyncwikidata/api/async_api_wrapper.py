@@ -1,36 +1,138 @@
 from __future__ import annotations
 import asyncio
 import json
+import logging
 import re
-import requests
-from typing import Awaitable, Optional
-import sys
+from typing import TYPE_CHECKING, Awaitable, Iterable, Optional, Union
+import time
 
 import aiohttp
-from fake_useragent import UserAgent
-from loguru import logger
 
 from asyncwikidata.api.entity import Entity
+from asyncwikidata.api.entity_cache import EntityCache
+from asyncwikidata.api.paginator import paginate
+from asyncwikidata.api.traversal import traverse
 from asyncwikidata.chunkify import create_chunks
-from asyncwikidata import run_async
+from asyncwikidata.instrumentation import Metrics, RequestLog, RequestRecord
+from asyncwikidata.limiter import AdaptiveLimiter
+from asyncwikidata.hedging import HedgePolicy
+from asyncwikidata.sinks import Sink, stream_to_sink
+from asyncwikidata import run_async, set_selector_event_loop_policy
+
+if TYPE_CHECKING:
+    from asyncwikidata.api.statements import StatementTable
+    from asyncwikidata.entity_ids import EntityIds
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROPS = 'info|sitelinks/urls|aliases|labels|descriptions|claims|datatype'
+DEFAULT_USER_AGENT = 'asyncwikidata/0.0.3 (https://pypi.org/project/asyncwikidata/) aiohttp'
+
+
+def _retry_after(headers) -> Optional[float]:
+    """Seconds from the Retry-After header (MediaWiki sends it with maxlag errors); HTTP dates are not supported"""
+    try:
+        return float(headers['Retry-After'])
+    except (KeyError, ValueError):
+        return None
 
-logger.remove()
-logger.add(sys.stdout, level="DEBUG")
 
 class AsyncAPIWrapper(object):
-    def __init__(self, base_url: str, agent: Optional[str] = None, sep: str = '|', sema_value: int = 10) -> None:
+    def __init__(self, base_url: str, agent: Optional[str] = None, sep: str = '|', sema_value: int = 10,
+                 cache: Optional[EntityCache] = None, history_size: Optional[int] = 1000,
+                 limiter: Optional[AdaptiveLimiter] = None, hedge: Optional[HedgePolicy] = None) -> None:
         """
         Args:
             base_url (str): url of API endpoint
-            agent (str): used agent
+            agent (Optional[str], optional): User-Agent header of the requests; if None, DEFAULT_USER_AGENT is used.
+                                             Defaults to None.
             sep (str): a symbol to separate values in the parameter
             sema_value (int, optional): initial value of asyncio.BoundedSemaphore to limit concurrency. Defaults to 10.
+            cache (Optional[EntityCache], optional): cache of entities used by get_entities; cached entities are
+                                                     revalidated by their lastrevid. Defaults to None.
+            history_size (Optional[int], optional): number of the most recent request records kept in `requests`;
+                                                    None means unbounded. Defaults to 1000.
+            limiter (Optional[AdaptiveLimiter], optional): adaptive limiter used instead of the fixed semaphore;
+                                                           sema_value is set to its max_limit and its limit is
+                                                           exposed in `metrics`. Defaults to None.
+            hedge (Optional[HedgePolicy], optional): policy of hedged requests: a slow request is duplicated and
+                                                     the first response is used; hedges are counted in `metrics`.
+                                                     Defaults to None.
         """
         self.base_url = base_url
-        self.agent = agent if agent else UserAgent().random
-        self.history = []  # list of urls which get requests were send to
+        self.agent = agent if agent else DEFAULT_USER_AGENT
+        self.requests = RequestLog(history_size)  # records of the most recent requests
+        self.metrics = Metrics()
         self.sep = sep
         self.sema_value = sema_value
+        self.cache = cache
+        self.limiter = limiter
+        if limiter is not None:
+            limiter.metrics = self.metrics
+            limiter.metrics.set_gauge(limiter.gauge_name, limiter.limit)
+            self.sema_value = limiter.max_limit
+        self.hedge = hedge
+        if hedge is not None:
+            hedge.metrics = self.metrics
+
+    @property
+    def history(self) -> list[str]:
+        """Urls of the most recent requests"""
+        return self.requests.urls()
+
+    def _create_sema(self) -> Union[asyncio.BoundedSemaphore, AdaptiveLimiter]:
+        """Semaphore limiting concurrency of the requests: the limiter if it is set, otherwise
+        asyncio.BoundedSemaphore with sema_value"""
+        return self.limiter if self.limiter is not None else asyncio.BoundedSemaphore(self.sema_value)
+
+    async def _request(self, session: aiohttp.ClientSession, sema: asyncio.BoundedSemaphore,
+                       params: dict) -> tuple[bytes, RequestRecord]:
+        """Executes get request and records it in `requests` and `metrics`.
+
+        Args:
+            session (aiohttp.ClientSession): aiohttp session for the request
+            sema (asyncio.BoundedSemaphore): semaphore to limit concurrency
+            params (dict): parameters of the request
+
+        Returns:
+            tuple[bytes, RequestRecord]: resulting bytes of the request and its record
+        """
+        headers = {}
+        headers["User-Agent"] = self.agent
+        record = RequestRecord(url=self.base_url)
+        self.requests.append(record)
+        self.metrics.inc('requests')
+
+        async def send() -> tuple[bytes, float]:
+            async with sema:
+                if record.started is None:
+                    record.started = time.time()
+                start = time.perf_counter()
+                async with session.get(self.base_url, params=params, headers=headers) as response:
+                    record.url = str(response.url)
+                    record.status = response.status
+                    record.retry_after = _retry_after(response.headers)
+                    if response.status == 429 and isinstance(sema, AdaptiveLimiter):
+                        sema.throttle()
+                    assert response.status == 200
+                    return await response.read(), start
+
+        try:
+            if self.hedge is not None:
+                # the hedge is sent only if it does not have to wait for the semaphore
+                (response_bytes, start), hedged = await self.hedge.run(send, can_hedge=lambda: not sema.locked())
+                record.hedged = hedged
+            else:
+                response_bytes, start = await send()
+            record.latency = time.perf_counter() - start
+        except BaseException as e:
+            record.error = repr(e)
+            self.metrics.inc('request_errors')
+            raise
+        record.bytes = len(response_bytes)
+        self.metrics.observe('request_seconds', record.latency)
+        self.metrics.inc('response_bytes', record.bytes)
+        return response_bytes, record
 
     async def get(self, session: aiohttp.ClientSession, sema: asyncio.BoundedSemaphore, **kwargs) -> Awaitable:
         """Executes get request.
@@ -42,23 +144,19 @@ class AsyncAPIWrapper(object):
         Returns:
             Awaitable: resulting bytes of the request
         """
-        headers = {}
-        headers["User-Agent"] = self.agent
-        async with sema, session.get(self.base_url, params=kwargs, headers=headers) as response:
-            self.history.append(response.url)
-            assert response.status == 200
-            return await response.read()
+        response_bytes, _ = await self._request(session, sema, kwargs)
+        return response_bytes
 
     def _create_request_params(self, **kwargs) -> dict:
         """Create dictionary of parameters for the get request
 
         Raises:
-            ValueError: if parameter is not list or string
+            ValueError: if parameter is not list, string or EntityIds
 
         Returns:
             dict: dictionary of parameters
         """
-        logger.debug(kwargs)
+        logger.debug('request parameters: %s', kwargs)
         get_params = {}
         for param_name, param_value in kwargs.items():
             if isinstance(param_value, list):
@@ -66,7 +164,13 @@ class AsyncAPIWrapper(object):
             elif isinstance(param_value, str):
                 get_params[param_name] = param_value
             else:
-                raise ValueError(f'Unsupported type {type(param_value)} of {param_name}')
+                # imported here: the module depends on NumPy, which is not needed otherwise
+                from asyncwikidata.entity_ids import EntityIds
+
+                if not isinstance(param_value, EntityIds):
+                    raise ValueError(f'Unsupported type {type(param_value)} of {param_name}')
+                # EntityIds are formatted only when the request is sent
+                get_params[param_name] = self.sep.join(param_value.tolist())
         return get_params
 
     async def gather_tasks(self, split_by: str, chunk_size: int, **kwargs) -> Awaitable:
@@ -80,7 +184,7 @@ class AsyncAPIWrapper(object):
         split_param = kwargs.pop(split_by)
 
         async with aiohttp.ClientSession() as session:
-            sema = asyncio.BoundedSemaphore(self.sema_value)
+            sema = self._create_sema()
             tasks = []
             for split_param_chunk in create_chunks(split_param, chunk_size):
                 kwargs_chunk = kwargs.copy()
@@ -92,24 +196,128 @@ class AsyncAPIWrapper(object):
 
     def execute_many(self, **kwargs):
         """Get result with concurrency"""
-        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+        set_selector_event_loop_policy()
         return run_async(self.gather_tasks, **kwargs)
 
+    def execute_paginated(self, max_pages: Optional[int] = None, **kwargs) -> list[dict]:
+        """Get all pages of the call following its continuation (see asyncwikidata.api.paginator.paginate)
+
+        Args:
+            max_pages (Optional[int], optional): maximum number of pages to request. Defaults to None.
+
+        Returns:
+            list[dict]: decoded pages
+        """
+        async def collect():
+            return [page async for page in paginate(self, max_pages=max_pages, **kwargs)]
+        return run_async(collect)
+
     def execute(self, **kwargs):
         """Get result without concurrency"""
+        import requests
+
         headers = {}
         headers["User-Agent"] = self.agent
         get_params = self._create_request_params(**kwargs)
         with requests.Session() as session:
             return session.get(self.base_url, params=get_params, headers=headers)
 
-    def get_entities(self, ids: list[str], format: str, chunk_size: int = 50, **kwargs) -> list[Entity]:
-        """The wbgetentities call
+    async def fetch_entity_dicts(self, session: aiohttp.ClientSession, sema: asyncio.BoundedSemaphore,
+                                 ids: Union[list[str], EntityIds], **kwargs) -> dict[str, dict]:
+        """Executes one wbgetentities call asynchronously.
 
         Args:
-            ids (list[str]): list of IDs of entries to get data from
+            session (aiohttp.ClientSession): aiohttp session for the request
+            sema (asyncio.BoundedSemaphore): semaphore to limit concurrency
+            ids (Union[list[str], EntityIds]): IDs of entries to get data from (at most 50 for wbgetentities)
+
+        Raises:
+            Exception: if request returns the error
+
+        Returns:
+            dict[str, dict]: dictionary with entity dictionaries keyed by entity ID
+        """
+        get_params = self._create_request_params(action='wbgetentities', ids=ids, **kwargs)
+        response_bytes, record = await self._request(session, sema, get_params)
+        with self.metrics.timer('json_decode_seconds'):
+            response = json.loads(response_bytes.decode("utf-8"))
+        if 'error' in response:
+            record.error = str(response['error'])
+            raise Exception(response['error'])
+        record.entities = len(response['entities'])
+        self.metrics.inc('entities', record.entities)
+        return response['entities']
+
+    async def _gather_entity_dicts(self, ids: Union[list[str], EntityIds], chunk_size: int,
+                                   **kwargs) -> list[dict[str, dict]]:
+        """Gathering wbgetentities calls for chunks of ids"""
+        async with aiohttp.ClientSession() as session:
+            sema = self._create_sema()
+            tasks = [asyncio.create_task(self.fetch_entity_dicts(session, sema, ids_chunk, **kwargs))
+                     for ids_chunk in create_chunks(ids, chunk_size)]
+            return await asyncio.gather(*tasks)
+
+    def _fetch_entity_dicts(self, ids: Union[list[str], EntityIds], chunk_size: int, **kwargs) -> dict[str, dict]:
+        """Executes wbgetentities calls concurrently and merges their results.
+
+        Args:
+            ids (Union[list[str], EntityIds]): IDs of entries to get data from
+            chunk_size (int): maximum number of values which can be used in a single request
+
+        Raises:
+            Exception: if request returns the error
+
+        Returns:
+            dict[str, dict]: dictionary with entity dictionaries keyed by entity ID
+        """
+        if not ids:
+            return {}
+        set_selector_event_loop_policy()
+        entity_dicts = {}
+        for chunk_entity_dicts in run_async(self._gather_entity_dicts, ids, chunk_size, **kwargs):
+            entity_dicts.update(chunk_entity_dicts)
+        return entity_dicts
+
+    @staticmethod
+    def _cache_key(entity_id: str, **kwargs) -> str:
+        """Cache key of the entity. Entities requested with different props or languages are cached separately."""
+        variant = '&'.join(f'{k}={"|".join(v) if isinstance(v, list) else v}' for k, v in sorted(kwargs.items()))
+        return f'{entity_id}#{variant}'
+
+    def _get_cached_entity_dicts(self, ids: list[str], chunk_size: int, format: str, **kwargs) -> dict[str, dict]:
+        """Returns cached entity dictionaries which are still up to date.
+
+        Revisions of cached entities are requested with `props=info` (and the other parameters of the call,
+        e.g. redirects) and compared with cached ones; outdated entities are removed from the cache.
+        """
+        cached = {}
+        for entity_id in ids:
+            entry = self.cache.get(self._cache_key(entity_id, **kwargs))
+            if entry is not None:
+                cached[entity_id] = entry
+        if not cached:
+            return {}
+
+        revisions = self._fetch_entity_dicts(list(cached), chunk_size, format=format, **{**kwargs, 'props': 'info'})
+        valid = {}
+        for entity_id, (lastrevid, entity_dict) in cached.items():
+            if revisions.get(entity_id, {}).get('lastrevid') == lastrevid:
+                valid[entity_id] = entity_dict
+            else:
+                self.cache.invalidate(self._cache_key(entity_id, **kwargs))
+        logger.debug('%d of %d cached entities are up to date', len(valid), len(cached))
+        return valid
+
+    def get_entity_dicts(self, ids: Union[list[str], EntityIds], format: str, chunk_size: int = 50,
+                         props: Union[str, list[str]] = DEFAULT_PROPS, **kwargs) -> dict[str, dict]:
+        """The wbgetentities call returning raw representations of entities
+
+        Args:
+            ids (Union[list[str], EntityIds]): list of IDs of entries to get data from
             format (str): format of the result (currently only json is supported)
             chunk_size (int, optional): Maximum number of values which can be used in a single request . Defaults to 50.
+            props (Union[str, list[str]], optional): parts of entities to request (e.g. ['labels', 'claims']).
+                                                     Defaults to DEFAULT_PROPS.
 
         Raises:
             ValueError: if format is not json
@@ -117,7 +325,8 @@ class AsyncAPIWrapper(object):
             ValueError: if entry is not item or property
 
         Returns:
-            list[Entity]: list of Entity objects representing entries
+            dict[str, dict]: entity dictionaries keyed by entity ID; requested entities go first,
+                             then the ones returned under other IDs (e.g. redirects)
         """
         entity_id_pattern = re.compile(r'^[PQ]\d+$')
 
@@ -127,24 +336,190 @@ class AsyncAPIWrapper(object):
         if isinstance(ids, str):
             ids = [ids]
 
-        props = 'info|sitelinks/urls|aliases|labels|descriptions|claims|datatype'
-        responses = self.execute_many(split_by='ids', chunk_size=chunk_size,
-                                      action='wbgetentities', ids=ids,
-                                      format=format, props=props, **kwargs)
+        if isinstance(props, str):
+            props = props.split('|')
+        if self.cache is not None and 'info' not in props:
+            # lastrevid is required to revalidate the cache
+            props = ['info', *props]
+        # unique ids preserving the order; EntityIds are kept as numbers and formatted chunk by chunk
+        if isinstance(ids, list):
+            ids = list(dict.fromkeys(ids))
+        else:
+            from asyncwikidata.entity_ids import EntityIds
+
+            ids = ids.unique() if isinstance(ids, EntityIds) else list(dict.fromkeys(ids))
+        if self.cache is not None:
+            cache_params = {'props': props, **kwargs}
+            entity_dicts = self._get_cached_entity_dicts(ids, chunk_size, format, **cache_params)
+        else:
+            entity_dicts = {}
+
+        missing = [entity_id for entity_id in ids if entity_id not in entity_dicts] if entity_dicts else ids
+        fetched = self._fetch_entity_dicts(missing, chunk_size, format=format, props=props, **kwargs)
+        if self.cache is not None:
+            for obj_id, obj in fetched.items():
+                self.cache.put(self._cache_key(obj_id, **cache_params), obj)
+        entity_dicts.update(fetched)
+
+        obj_ids = [entity_id for entity_id in ids if entity_id in entity_dicts]
+        requested = set(obj_ids)
+        obj_ids.extend(obj_id for obj_id in entity_dicts if obj_id not in requested)
+        for obj_id in obj_ids:
+            if not entity_id_pattern.match(obj_id):
+                raise ValueError(f'Unrecognized obj {obj_id} type')
+        return {obj_id: entity_dicts[obj_id] for obj_id in obj_ids}
+
+    def get_entities(self, ids: Union[list[str], EntityIds], format: str, chunk_size: int = 50,
+                     props: Union[str, list[str]] = DEFAULT_PROPS,
+                     properties: Optional[list[str]] = None, **kwargs) -> list[Entity]:
+        """The wbgetentities call
+
+        Args:
+            ids (Union[list[str], EntityIds]): list of IDs of entries to get data from
+            format (str): format of the result (currently only json is supported)
+            chunk_size (int, optional): Maximum number of values which can be used in a single request . Defaults to 50.
+            props (Union[str, list[str]], optional): parts of entities to request (e.g. ['labels', 'claims']);
+                                                     the parts which are not requested are neither downloaded nor
+                                                     parsed. Defaults to DEFAULT_PROPS.
+            properties (Optional[list[str]], optional): IDs of properties whose claims are parsed; if None, all
+                                                        claims are parsed. Defaults to None.
+
+        Raises:
+            ValueError: if format is not json
+            Exception: if request returns the error
+            ValueError: if entry is not item or property
+
+        Returns:
+            list[Entity]: list of Entity objects representing entries; missing entities (e.g. deleted ones) are
+                          skipped as in the other calls returning entities
+        """
+        entity_dicts = self.get_entity_dicts(ids, format, chunk_size=chunk_size, props=props, **kwargs)
+
         if 'languages' in kwargs:
             repr_lang = kwargs['languages'][0]
         else:
             repr_lang = None
 
-        objs = []
-        for response_bytes in responses:
-            response = json.loads(response_bytes.decode("utf-8"))
-            if 'error' in response:
-                raise Exception(response['error'])
-
-            for obj_id, obj in response['entities'].items():
-                if entity_id_pattern.match(obj_id):
-                    objs.append(Entity(obj, repr_lang=repr_lang))
-                else:
-                    raise ValueError(f'Unrecognized obj {obj_id} type')
-        return objs
+        with self.metrics.timer('entity_construction_seconds'):
+            return [Entity(entity_dict, repr_lang=repr_lang, properties=properties)
+                    for entity_dict in entity_dicts.values() if 'missing' not in entity_dict]
+
+    def get_closure(self, seeds: list[str], properties: list[str], format: str, max_depth: Optional[int] = None,
+                    max_nodes: Optional[int] = None, chunk_size: int = 50,
+                    entity_properties: Optional[list[str]] = None, **kwargs) -> list[Entity]:
+        """Collects entities reachable from the seeds via claims of the given properties
+        (e.g. subclass closure via P279). See asyncwikidata.api.traversal.traverse for the details.
+
+        Args:
+            seeds (list[str]): IDs of entities to start from
+            properties (list[str]): IDs of properties to follow
+            format (str): format of the result (currently only json is supported)
+            max_depth (Optional[int], optional): maximum distance from the seeds. Defaults to None.
+            max_nodes (Optional[int], optional): maximum number of entities to visit. Defaults to None.
+            chunk_size (int, optional): Maximum number of values which can be used in a single request . Defaults to 50.
+            entity_properties (Optional[list[str]], optional): IDs of properties whose claims are parsed into the
+                                                               entities; if None, all claims are parsed.
+                                                               Defaults to None.
+
+        Raises:
+            ValueError: if format is not json
+
+        Returns:
+            list[Entity]: list of Entity objects in the order they were received
+        """
+        if format != 'json':
+            raise ValueError(f'Unsupported format {format}')
+
+        async def collect():
+            return [entity async for entity, _ in traverse(self, seeds, properties, max_depth=max_depth,
+                                                           max_nodes=max_nodes, batch_size=chunk_size,
+                                                           entity_properties=entity_properties, format=format,
+                                                           **kwargs)]
+        return run_async(collect)
+
+    def get_statements(self, ids: Union[list[str], EntityIds], format: str, chunk_size: int = 50,
+                       properties: Optional[list[str]] = None, qualifiers: bool = True,
+                       **kwargs) -> StatementTable:
+        """The wbgetentities call returning claims of entities as a columnar statement table.
+        Claims are converted directly from JSON, no Entity objects are created.
+
+        Args:
+            ids (Union[list[str], EntityIds]): list of IDs of entries to get data from
+            format (str): format of the result (currently only json is supported)
+            chunk_size (int, optional): Maximum number of values which can be used in a single request . Defaults to 50.
+            properties (Optional[list[str]], optional): IDs of properties whose claims are converted; if None, all
+                                                        claims are converted. Defaults to None.
+            qualifiers (bool, optional): if True, qualifiers are added to the table. Defaults to True.
+            kwargs: other parameters of wbgetentities (languages, ...); props is always 'claims'
+
+        Returns:
+            StatementTable: table of statements
+        """
+        from asyncwikidata.api.statements import StatementTable
+
+        kwargs['props'] = 'claims'
+        entity_dicts = self.get_entity_dicts(ids, format, chunk_size=chunk_size, **kwargs)
+        return StatementTable.from_entity_dicts(entity_dicts.values(), properties=properties, qualifiers=qualifiers)
+
+    def entities_to_sink(self, sink: Sink, ids: Union[Iterable[str], EntityIds], format: str, chunk_size: int = 50,
+                         rows: str = 'entities', props: Union[str, list[str]] = DEFAULT_PROPS,
+                         properties: Optional[list[str]] = None, qualifiers: bool = True, **kwargs) -> int:
+        """The wbgetentities call writing results to the sink as soon as every chunk is received,
+        so only results of the requests in flight are kept in memory. Entities are written in the order of
+        responses; the cache is not used.
+
+        Args:
+            sink (Sink): destination of the results (see asyncwikidata.sinks)
+            ids (Union[Iterable[str], EntityIds]): IDs of entries to get data from (any iterable, it is consumed
+                                                   lazily)
+            format (str): format of the result (currently only json is supported)
+            chunk_size (int, optional): Maximum number of values which can be used in a single request . Defaults to 50.
+            rows (str, optional): what is written: 'entities' - entity dictionaries (suited for JSONL),
+                                  'labels' - rows with id, type, label and description in the first of requested
+                                  languages ('en' by default), 'statements' - claims as StatementTable rows.
+                                  Defaults to 'entities'.
+            props (Union[str, list[str]], optional): parts of entities to request. Defaults to DEFAULT_PROPS.
+            properties (Optional[list[str]], optional): IDs of properties whose claims are written (for statements);
+                                                        if None, all claims are written. Defaults to None.
+            qualifiers (bool, optional): if True, qualifiers are written (for statements). Defaults to True.
+
+        Raises:
+            ValueError: if format is not json or rows is not supported
+            Exception: if request returns the error
+
+        Returns:
+            int: number of rows written
+        """
+        from asyncwikidata.api.statements import StatementTable
+
+        if format != 'json':
+            raise ValueError(f'Unsupported format {format}')
+        if rows not in ('entities', 'labels', 'statements'):
+            raise ValueError(f'Unsupported rows {rows}')
+        if isinstance(ids, str):
+            ids = [ids]
+        if rows == 'statements':
+            props = 'claims'
+        lang = kwargs['languages'][0] if 'languages' in kwargs else 'en'
+
+        def convert(entity_dicts: dict[str, dict]):
+            if rows == 'statements':
+                return StatementTable.from_entity_dicts(entity_dicts.values(), properties=properties,
+                                                        qualifiers=qualifiers)
+            if rows == 'labels':
+                return [{'id': entity_dict['id'], 'type': entity_dict.get('type', None),
+                         'label': entity_dict.get('labels', {}).get(lang, {}).get('value', None),
+                         'description': entity_dict.get('descriptions', {}).get(lang, {}).get('value', None)}
+                        for entity_dict in entity_dicts.values() if 'missing' not in entity_dict]
+            return [entity_dict for entity_dict in entity_dicts.values() if 'missing' not in entity_dict]
+
+        async def write():
+            async with aiohttp.ClientSession() as session:
+                sema = self._create_sema()
+
+                async def request(ids_chunk: list[str]) -> dict[str, dict]:
+                    return await self.fetch_entity_dicts(session, sema, ids_chunk, format=format, props=props,
+                                                         **kwargs)
+                return await stream_to_sink(sink, create_chunks(ids, chunk_size), request, convert,
+                                            2 * self.sema_value)
+        return run_async(write)
@@ -1,7 +1,8 @@
 from __future__ import annotations
 from datetime import datetime
 from typing import Optional
-import re
+
+from asyncwikidata.api.time_parser import parse_time
 
 
 class DataType(object):
@@ -43,15 +44,18 @@ class Quantity(DataType):
 
 class Time(DataType):
     LD_NAME = 'time'
-    pattern = re.compile(r'(?P<era>[+-])(?P<year>\d{4,})-(?P<month>\d{2})-(?P<day>\d{2})T(?P<hour>\d{2}):(?P<minute>\d{2}):(?P<second>\d{2})Z')
 
     def parse_time(self, time: str) -> None:
-        '''Method for parsing dates in the form they are stored in JSON representation of the data
+        '''Method for parsing dates in the form they are stored in JSON representation of the data.
+        Sets `era` ('+' or '-') and integer `year` (signed), `month`, `day`, `hour`, `minute` and `second`;
+        fields finer than the precision are set to 0. See asyncwikidata.api.time_parser for the batch version.
         '''
-        match = self.pattern.match(time)
-        if match:
-            for group_name, value in match.groupdict().items():
-                setattr(self, group_name, value)
+        try:
+            fields = parse_time(time, self.precision)
+        except (TypeError, ValueError):
+            return
+        self.era = '-' if time.startswith('-') else '+'
+        self.year, self.month, self.day, self.hour, self.minute, self.second = fields
 
     def __init__(self, datavalue: dict):
         self.timezone = datavalue['value'].get('timezone', None)
@@ -66,6 +70,7 @@ class Time(DataType):
 class WikiBase(DataType):
     def __init__(self, datavalue: dict):
         self.item = datavalue['value']['numeric-id']
+        self.numeric_id = self.item  # integer part of the ID, e.g. 42 for Q42
 
 
 class WikiBaseItem(WikiBase):
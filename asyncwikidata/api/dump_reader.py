@@ -0,0 +1,167 @@
+from __future__ import annotations
+import bz2
+import gzip
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+from collections import deque
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+
+from asyncwikidata.api.entity import Entity
+from asyncwikidata.api.statements import StatementTable
+
+# external decompressors in the order of preference (parallel ones first); they run in a separate process
+DECOMPRESSORS = {
+    '.gz': ['pigz', 'gzip'],
+    '.bz2': ['lbzip2', 'pbzip2', 'bzip2'],
+}
+
+_worker_options = {}
+
+
+def _init_worker(options: dict) -> None:
+    _worker_options.update(options)
+
+
+def _parse_lines(lines: list[str]) -> list[dict]:
+    """Decodes entity dictionaries from the lines of the dump applying the filters"""
+    ids = _worker_options.get('ids', None)
+    properties = _worker_options.get('properties', None)
+    entity_dicts = []
+    for line in lines:
+        line = line.strip().rstrip(',')
+        if not line or line in ('[', ']'):
+            continue
+        entity_dict = json.loads(line)
+        if ids is not None and entity_dict['id'] not in ids:
+            continue
+        if properties is not None:
+            claims = entity_dict.get('claims', {})
+            if not any(pid in claims for pid in properties):
+                continue
+        entity_dicts.append(entity_dict)
+    return entity_dicts
+
+
+def _parse_entities(lines: list[str]) -> list[Entity]:
+    return [Entity(entity_dict, repr_lang=_worker_options.get('repr_lang', 'en'),
+                   properties=_worker_options.get('properties', None))
+            for entity_dict in _parse_lines(lines)]
+
+
+def _parse_statements(lines: list[str]) -> StatementTable:
+    return StatementTable.from_entity_dicts(_parse_lines(lines),
+                                            properties=_worker_options.get('properties', None),
+                                            qualifiers=_worker_options.get('qualifiers', True))
+
+
+class DumpReader(object):
+    """Reader of Wikidata JSON dumps (e.g. latest-all.json.gz or latest-all.json.bz2).
+
+    The dump is a JSON array with one entity per line. The file is decompressed by an external
+    decompressor process (parallel pigz, lbzip2 or pbzip2 if available) and the lines are parsed in batches by
+    worker processes. Entities are yielded in the order of the dump.
+    For reference see https://www.wikidata.org/wiki/Wikidata:Database_download#JSON_dumps_(recommended)
+    """
+    def __init__(self, path: str, processes: Optional[int] = None, batch_size: int = 1000,
+                 ids: Optional[Iterable[str]] = None, properties: Optional[Iterable[str]] = None,
+                 repr_lang: str = 'en', qualifiers: bool = True, use_external_decompressor: bool = True) -> None:
+        """
+        Args:
+            path (str): path to the dump (.json, .json.gz or .json.bz2)
+            processes (Optional[int], optional): number of worker processes; if 0, lines are parsed in
+                                                 the current process; if None, os.cpu_count() is used. Defaults to None.
+            batch_size (int, optional): number of lines sent to a worker at once. Defaults to 1000.
+            ids (Optional[Iterable[str]], optional): if set, only entities with these IDs are yielded. Defaults to None.
+            properties (Optional[Iterable[str]], optional): if set, only entities having claims with at least one of
+                                                            these properties are yielded and only these claims are
+                                                            parsed. Defaults to None.
+            repr_lang (str, optional): repr_lang of yielded Entity objects. Defaults to 'en'.
+            qualifiers (bool, optional): if True, qualifiers are added to statement tables. Defaults to True.
+            use_external_decompressor (bool, optional): if True, external decompressor is used if available;
+                                                        otherwise the file is decompressed by Python. Defaults to True.
+        """
+        self.path = path
+        self.processes = processes
+        self.batch_size = batch_size
+        self.options = {
+            'ids': set(ids) if ids is not None else None,
+            'properties': set(properties) if properties is not None else None,
+            'repr_lang': repr_lang,
+            'qualifiers': qualifiers,
+        }
+        self.use_external_decompressor = use_external_decompressor
+
+    def _decompressor(self) -> Optional[list[str]]:
+        """Command of the external decompressor writing the decompressed dump to stdout"""
+        for extension, commands in DECOMPRESSORS.items():
+            if self.path.endswith(extension):
+                for command in commands:
+                    if shutil.which(command):
+                        return [command, '-dc', self.path]
+        return None
+
+    def lines(self) -> Iterator[str]:
+        """Yields lines of the decompressed dump"""
+        command = self._decompressor() if self.use_external_decompressor else None
+        if command:
+            with subprocess.Popen(command, stdout=subprocess.PIPE) as process:
+                yield from io.TextIOWrapper(process.stdout, encoding='utf-8')
+                if process.wait() != 0:
+                    raise RuntimeError(f'{command[0]} exited with code {process.returncode}')
+        else:
+            if self.path.endswith('.gz'):
+                opener = gzip.open
+            elif self.path.endswith('.bz2'):
+                opener = bz2.open
+            else:
+                opener = open
+            with opener(self.path, 'rt', encoding='utf-8') as f:
+                yield from f
+
+    def _batches(self) -> Iterator[list[str]]:
+        lines = self.lines()
+        while True:
+            batch = list(islice(lines, self.batch_size))
+            if not batch:
+                return
+            yield batch
+
+    def _map(self, func) -> Iterator:
+        if self.processes == 0:
+            _init_worker(self.options)
+            yield from map(func, self._batches())
+        else:
+            # Pool.imap would read the whole dump ahead, so the number of batches in flight is bounded
+            prefetch = 2 * (self.processes or os.cpu_count() or 1)
+            with multiprocessing.Pool(self.processes, initializer=_init_worker, initargs=(self.options,)) as pool:
+                pending = deque()
+                for batch in self._batches():
+                    pending.append(pool.apply_async(func, (batch,)))
+                    if len(pending) >= prefetch:
+                        yield pending.popleft().get()
+                while pending:
+                    yield pending.popleft().get()
+
+    def iter_entity_dicts(self) -> Iterator[dict]:
+        """Yields JSON representations of entities"""
+        for entity_dicts in self._map(_parse_lines):
+            yield from entity_dicts
+
+    def iter_entities(self) -> Iterator[Entity]:
+        """Yields Entity objects"""
+        for entities in self._map(_parse_entities):
+            yield from entities
+
+    def iter_statements(self) -> Iterator[StatementTable]:
+        """Yields statement tables, one per batch of lines"""
+        for table in self._map(_parse_statements):
+            if len(table):
+                yield table
+
+    def __iter__(self) -> Iterator[Entity]:
+        return self.iter_entities()
@@ -1,4 +1,6 @@
+from __future__ import annotations
 from collections import defaultdict
+from typing import Iterable, Optional
 
 from asyncwikidata.api.datatypes import Monolingual, SiteLink
 from asyncwikidata.api.claim import Claim
@@ -6,37 +8,46 @@ from asyncwikidata.api.claim import Claim
 
 class Entity(object):
     """Object representing Wikidata entity (item or property)"""
-    def __init__(self, entity_dict: dict, repr_lang: str = 'en') -> None:
+    def __init__(self, entity_dict: dict, repr_lang: str = 'en', properties: Optional[Iterable[str]] = None) -> None:
         """
         Args:
             entity_dict (dict): representation of entity obtained via linked data interface
             repr_lang (str, optional): languages of labels, descriptions and aliases which will be
                                        printed when the __repr__ method is called. Defaults to 'en'.
+            properties (Optional[Iterable[str]], optional): IDs of properties whose claims are parsed;
+                                                            if None, all claims are parsed. Defaults to None.
         """
         self.entity_dict = entity_dict
         self.repr_lang = repr_lang
 
+        # parts which were not requested (see `props` of wbgetentities) are absent in entity_dict
         self.id = entity_dict['id']
         self.labels = {lang: Monolingual.from_values(**label)
-                         for lang, label in entity_dict['labels'].items()}
+                         for lang, label in entity_dict.get('labels', {}).items()}
         self.descriptions = {lang: Monolingual.from_values(**d)
-                         for lang, d in entity_dict['descriptions'].items()}
+                         for lang, d in entity_dict.get('descriptions', {}).items()}
         self.aliases = {lang: [Monolingual.from_values(**alias) for alias in aliases]
-                         for lang, aliases in entity_dict['aliases'].items()}
+                         for lang, aliases in entity_dict.get('aliases', {}).items()}
         self.claims = defaultdict(list)
-        for pid, claims_list in entity_dict['claims'].items():
+        if properties is not None:
+            properties = set(properties)
+        for pid, claims_list in entity_dict.get('claims', {}).items():
+            if properties is not None and pid not in properties:
+                continue
             for claim_dict in claims_list:
                 claim = Claim(claim_dict['mainsnak'], claim_dict.get('qualifiers', None))
                 self.claims[pid].append(claim)
 
-        self.sitelinks = {site: SiteLink(**sl_dict) for site, sl_dict in entity_dict['sitelinks'].items()
+        self.sitelinks = {site: SiteLink(**sl_dict) for site, sl_dict in entity_dict.get('sitelinks', {}).items()
                            if site.endswith('wiki')}
 
-    def get_repr_lang_or_first(self, dictionary: dict) -> Monolingual:
+    def get_repr_lang_or_first(self, dictionary: dict) -> Optional[Monolingual]:
         if self.repr_lang and self.repr_lang in dictionary:
             return dictionary[self.repr_lang]
+        elif dictionary:
+            return next(iter(dictionary.values()))
         else:
-            return list(dictionary.values())[0]
+            return None
 
     def __repr__(self) -> str:
         return '{}(id={}, label={}, description={}, aliases={})'.format(self.__class__.__name__,
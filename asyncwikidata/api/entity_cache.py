@@ -0,0 +1,98 @@
+from __future__ import annotations
+import shelve
+from collections import OrderedDict
+from typing import Optional
+
+
+class EntityCache(object):
+    """LRU cache of raw entity dictionaries (as returned by wbgetentities) keyed by entity ID.
+
+    Entries are stored together with the `lastrevid` of the entity, so the cache can be revalidated
+    cheaply by requesting `props=info` only. The in-memory tier is bounded by `maxsize`. The optional disk tier
+    (a `shelve` database) is write-through: it keeps every stored entry, so entries evicted from memory
+    (or stored by a previous run) are promoted back on access.
+    """
+    def __init__(self, maxsize: Optional[int] = 10000, path: Optional[str] = None) -> None:
+        """
+        Args:
+            maxsize (Optional[int], optional): maximum number of entries kept in memory; None means unbounded.
+                                               Defaults to 10000.
+            path (Optional[str], optional): filename of the disk tier; if None, the cache is memory-only.
+                                            Defaults to None.
+        """
+        self.maxsize = maxsize
+        self.path = path
+        self.__memory = OrderedDict()
+        self.__disk = shelve.open(path) if path else None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[tuple[int, dict]]:
+        """Get cached entry.
+
+        Args:
+            key (str): cache key (entity ID, optionally qualified with the request parameters)
+
+        Returns:
+            Optional[tuple[int, dict]]: tuple of lastrevid and entity dictionary or None if key is not cached
+        """
+        if key in self.__memory:
+            self.__memory.move_to_end(key)
+            self.hits += 1
+            return self.__memory[key]
+        if self.__disk is not None and key in self.__disk:
+            entry = self.__disk[key]
+            self._put_memory(key, entry)
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def put(self, key: str, entity_dict: dict) -> None:
+        """Store entity dictionary in the cache. Entities without `lastrevid` (e.g. missing ones) are not cached.
+
+        Args:
+            key (str): cache key
+            entity_dict (dict): representation of entity obtained via wbgetentities
+        """
+        if 'lastrevid' not in entity_dict:
+            return
+        entry = (entity_dict['lastrevid'], entity_dict)
+        self._put_memory(key, entry)
+        if self.__disk is not None:
+            self.__disk[key] = entry
+
+    def revision(self, key: str) -> Optional[int]:
+        """Returns cached lastrevid of the entity or None if it is not cached"""
+        entry = self.get(key)
+        return entry[0] if entry else None
+
+    def _put_memory(self, key: str, entry: tuple[int, dict]) -> None:
+        self.__memory[key] = entry
+        self.__memory.move_to_end(key)
+        if self.maxsize is not None:
+            while len(self.__memory) > self.maxsize:
+                self.__memory.popitem(last=False)
+
+    def invalidate(self, key: str) -> None:
+        self.__memory.pop(key, None)
+        if self.__disk is not None and key in self.__disk:
+            del self.__disk[key]
+
+    def clear(self) -> None:
+        self.__memory.clear()
+        if self.__disk is not None:
+            self.__disk.clear()
+
+    def close(self) -> None:
+        if self.__disk is not None:
+            self.__disk.close()
+            self.__disk = None
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__memory or (self.__disk is not None and key in self.__disk)
+
+    def __len__(self) -> int:
+        if self.__disk is not None:
+            return len(set(self.__memory) | set(self.__disk.keys()))
+        return len(self.__memory)
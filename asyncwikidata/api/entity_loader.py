@@ -0,0 +1,190 @@
+from __future__ import annotations
+import asyncio
+from typing import TYPE_CHECKING, Iterable, Optional, Union
+
+import aiohttp
+
+from asyncwikidata import fail_futures
+from asyncwikidata.api.async_api_wrapper import DEFAULT_PROPS
+from asyncwikidata.api.entity import Entity
+
+if TYPE_CHECKING:
+    from asyncwikidata.api.async_api_wrapper import AsyncAPIWrapper
+
+
+class EntityLoader(object):
+    """DataLoader-style batching of single-entity lookups.
+
+    IDs requested with `load` by concurrent callers are collected for `batch_window` seconds (or until
+    `max_batch_size` IDs are queued) and requested with one wbgetentities call. Every ID is requested once:
+    callers asking for an ID which is queued or already loaded share the same result.
+
+    The loader has to be used inside one event loop; it is closed with `close` or by `async with`.
+
+    Example:
+        async with EntityLoader(wrapper, languages=['en']) as loader:
+            human, city = await asyncio.gather(loader.load('Q5'), loader.load('Q515'))
+    """
+    def __init__(self, wrapper: AsyncAPIWrapper, max_batch_size: int = 50, batch_window: float = 0.005,
+                 cache: bool = True, properties: Optional[list[str]] = None,
+                 session: Optional[aiohttp.ClientSession] = None, sema: Optional[asyncio.BoundedSemaphore] = None,
+                 format: str = 'json', props: Union[str, list[str], None] = None, **kwargs) -> None:
+        """
+        Args:
+            wrapper (AsyncAPIWrapper): wrapper used to execute wbgetentities calls
+            max_batch_size (int, optional): maximum number of IDs in one call (50 for wbgetentities). Defaults to 50.
+            batch_window (float, optional): seconds to wait for other IDs after the first one is queued.
+                                            Defaults to 0.005.
+            cache (bool, optional): if True, loaded entities are kept until `clear` is called; otherwise IDs are
+                                    de-duplicated only while their batch is queued or in flight. Defaults to True.
+            properties (Optional[list[str]], optional): IDs of properties whose claims are parsed; if None, all
+                                                        claims are parsed. Defaults to None.
+            session (Optional[aiohttp.ClientSession], optional): aiohttp session for the requests; if None, a new
+                                                                 one is created on the first load and closed by
+                                                                 `close`. Defaults to None.
+            sema (Optional[asyncio.BoundedSemaphore], optional): semaphore to limit concurrency; if None, a new one is
+                                                                 created by the wrapper.
+                                                                 Defaults to None.
+            format (str, optional): format of the result (currently only json is supported). Defaults to 'json'.
+            props (Union[str, list[str], None], optional): parts of entities to request; if None, the wrapper's
+                                                           default is used. Defaults to None.
+            kwargs: other parameters of wbgetentities (languages, ...)
+
+        Raises:
+            ValueError: if format is not json or max_batch_size is not positive
+        """
+        if format != 'json':
+            raise ValueError(f'Unsupported format {format}')
+        if max_batch_size < 1:
+            raise ValueError(f'max_batch_size should be positive, got {max_batch_size}')
+        self.wrapper = wrapper
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+        self.cache = cache
+        self.properties = properties
+        self.params = {'format': format, 'props': DEFAULT_PROPS if props is None else props, **kwargs}
+        self.repr_lang = kwargs['languages'][0] if 'languages' in kwargs else None
+        self.session = session
+        self.sema = sema
+        self.__own_session = session is None
+        self.__futures = {}  # entity ID -> future of the entity (queued, in flight or loaded)
+        self.__queue = []  # IDs waiting for the next batch
+        self.__timer = None
+        self.__tasks = set()
+
+    async def load(self, entity_id: str) -> Optional[Entity]:
+        """Loads the entity batching the request with the ones made by other callers
+
+        Args:
+            entity_id (str): ID of the entity
+
+        Raises:
+            Exception: if request returns the error
+
+        Returns:
+            Optional[Entity]: the entity or None if it does not exist
+        """
+        future = self.__futures.get(entity_id)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self.__futures[entity_id] = future
+            self.__queue.append(entity_id)
+            self.wrapper.metrics.inc('loader_misses')
+            if len(self.__queue) >= self.max_batch_size:
+                self.dispatch()
+            elif self.__timer is None:
+                self.__timer = asyncio.get_running_loop().call_later(self.batch_window, self.dispatch)
+        else:
+            self.wrapper.metrics.inc('loader_hits')
+        # shielded: cancellation of one caller does not affect the others waiting for the same entity
+        return await asyncio.shield(future)
+
+    async def load_many(self, ids: Iterable[str]) -> list[Optional[Entity]]:
+        """Loads several entities (see `load`)
+
+        Args:
+            ids (Iterable[str]): IDs of entities
+
+        Returns:
+            list[Optional[Entity]]: entities in the order of ids (None for the ones which do not exist)
+        """
+        return list(await asyncio.gather(*(self.load(entity_id) for entity_id in ids)))
+
+    def dispatch(self) -> None:
+        """Sends the queued IDs immediately without waiting for the end of the batch window"""
+        if self.__timer is not None:
+            self.__timer.cancel()
+            self.__timer = None
+        while self.__queue:
+            batch, self.__queue = self.__queue[:self.max_batch_size], self.__queue[self.max_batch_size:]
+            task = asyncio.get_running_loop().create_task(self._load_batch(batch))
+            self.__tasks.add(task)
+            task.add_done_callback(self.__tasks.discard)
+
+    async def _load_batch(self, batch: list[str]) -> None:
+        """Requests the batch and resolves futures of its IDs"""
+        self.wrapper.metrics.inc('loader_batches')
+        try:
+            if self.session is None:
+                self.session = aiohttp.ClientSession()
+            if self.sema is None:
+                self.sema = self.wrapper._create_sema()
+            entity_dicts = await self.wrapper.fetch_entity_dicts(self.session, self.sema, batch, **self.params)
+        except BaseException as e:
+            # failed IDs are not cached so that they can be requested again
+            fail_futures([self.__futures.pop(entity_id) for entity_id in batch], e)
+            if not isinstance(e, Exception):
+                raise
+            return
+
+        redirects = {entity_dict['redirects']['from']: entity_dict
+                     for entity_dict in entity_dicts.values() if 'redirects' in entity_dict}
+        for entity_id in batch:
+            entity_dict = entity_dicts.get(entity_id) or redirects.get(entity_id)
+            if entity_dict is None or 'missing' in entity_dict:
+                entity = None
+            else:
+                entity = Entity(entity_dict, repr_lang=self.repr_lang, properties=self.properties)
+            future = self.__futures[entity_id] if self.cache else self.__futures.pop(entity_id)
+            if not future.done():
+                future.set_result(entity)
+
+    def prime(self, entity: Entity) -> None:
+        """Puts the already known entity to the cache of the loader"""
+        future = self.__futures.get(entity.id)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(entity)
+            self.__futures[entity.id] = future
+
+    def clear(self, entity_id: Optional[str] = None) -> None:
+        """Removes the loaded entity (or all loaded entities) from the cache of the loader
+
+        Args:
+            entity_id (Optional[str], optional): ID of the entity; if None, all the entities are removed.
+                                                 Defaults to None.
+        """
+        entity_ids = list(self.__futures) if entity_id is None else [entity_id]
+        for entity_id in entity_ids:
+            future = self.__futures.get(entity_id)
+            if future is not None and future.done():
+                del self.__futures[entity_id]
+
+    async def close(self) -> None:
+        """Sends the queued IDs, waits for the batches in flight and closes the own session"""
+        if self.__queue:
+            self.dispatch()
+        if self.__tasks:
+            await asyncio.gather(*self.__tasks, return_exceptions=True)
+        if self.__own_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self) -> EntityLoader:
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def __len__(self) -> int:
+        return len(self.__futures)
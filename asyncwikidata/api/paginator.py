@@ -0,0 +1,153 @@
+from __future__ import annotations
+import asyncio
+import json
+from typing import TYPE_CHECKING, AsyncIterator, Optional
+
+import aiohttp
+
+if TYPE_CHECKING:
+    from asyncwikidata.api.async_api_wrapper import AsyncAPIWrapper
+
+
+async def _fetch_page(wrapper: AsyncAPIWrapper, session: aiohttp.ClientSession, sema: asyncio.BoundedSemaphore,
+                      params: dict, maxlag_retries: int, maxlag_delay: float) -> dict:
+    """Requests one page retrying it while the API reports replication lag (see maxlag); the retry waits
+    for the Retry-After header of the response if there is one, otherwise for maxlag_delay"""
+    get_params = wrapper._create_request_params(**params)
+    for attempt in range(maxlag_retries + 1):
+        response_bytes, record = await wrapper._request(session, sema, get_params)
+        response = json.loads(response_bytes.decode("utf-8"))
+        record.retries = attempt
+        if 'error' not in response:
+            return response
+        record.error = str(response['error'])
+        if response['error'].get('code', None) != 'maxlag' or attempt == maxlag_retries:
+            raise Exception(response['error'])
+        wrapper.metrics.inc('maxlag_retries')
+        await asyncio.sleep(record.retry_after if record.retry_after is not None else maxlag_delay)
+
+
+def _continuation(response: dict) -> Optional[dict]:
+    """Parameters of the next page or None if it is the last one"""
+    if 'continue' in response:
+        return response['continue']
+    if 'search-continue' in response:
+        # wbsearchentities
+        return {'continue': str(response['search-continue'])}
+    return None
+
+
+async def paginate(wrapper: AsyncAPIWrapper, session: Optional[aiohttp.ClientSession] = None,
+                   sema: Optional[asyncio.BoundedSemaphore] = None, max_pages: Optional[int] = None,
+                   maxlag: Optional[int] = 5, maxlag_retries: int = 5, maxlag_delay: float = 5.0,
+                   **params) -> AsyncIterator[dict]:
+    """Follows continuation of MediaWiki API calls (e.g. list=search, list=backlinks, list=recentchanges,
+    action=wbsearchentities) yielding the decoded pages.
+
+    The next page is requested as soon as the continuation token is received, i.e. it is downloaded
+    while the current page is processed by the caller.
+    For reference see https://www.mediawiki.org/wiki/API:Continue and https://www.mediawiki.org/wiki/Manual:Maxlag_parameter
+
+    Args:
+        wrapper (AsyncAPIWrapper): wrapper used to execute the requests
+        session (Optional[aiohttp.ClientSession], optional): aiohttp session for the requests; if None, a new
+                                                             one is created. Defaults to None.
+        sema (Optional[asyncio.BoundedSemaphore], optional): semaphore to limit concurrency; if None, a new one is
+                                                             created by the wrapper. Defaults to None.
+        max_pages (Optional[int], optional): maximum number of pages to request. Defaults to None.
+        maxlag (Optional[int], optional): value of the maxlag parameter; None means it is not sent. Defaults to 5.
+        maxlag_retries (int, optional): number of retries of a page while the lag is too high. Defaults to 5.
+        maxlag_delay (float, optional): seconds to wait before retrying the page if the response has no
+                                        Retry-After header. Defaults to 5.0.
+
+    Raises:
+        Exception: if request returns the error (except maxlag ones which are retried)
+
+    Yields:
+        dict: decoded pages
+    """
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            async for page in paginate(wrapper, session, sema, max_pages=max_pages, maxlag=maxlag,
+                                       maxlag_retries=maxlag_retries, maxlag_delay=maxlag_delay, **params):
+                yield page
+        return
+    if sema is None:
+        sema = wrapper._create_sema()
+
+    params.setdefault('format', 'json')
+    if maxlag is not None:
+        params.setdefault('maxlag', str(maxlag))
+    if params.get('action', None) == 'query':
+        params.setdefault('continue', '')
+
+    next_page = asyncio.create_task(_fetch_page(wrapper, session, sema, params, maxlag_retries, maxlag_delay))
+    pages = 0
+    try:
+        while next_page is not None:
+            page = await next_page
+            pages += 1
+            continuation = _continuation(page)
+            if continuation is not None and (max_pages is None or pages < max_pages):
+                next_params = {**params, **{key: str(value) for key, value in continuation.items()}}
+                next_page = asyncio.create_task(_fetch_page(wrapper, session, sema, next_params,
+                                                            maxlag_retries, maxlag_delay))
+            else:
+                next_page = None
+            yield page
+    finally:
+        if next_page is not None:
+            next_page.cancel()
+
+
+async def paginate_many(wrapper: AsyncAPIWrapper, params_list: list[dict],
+                        session: Optional[aiohttp.ClientSession] = None,
+                        sema: Optional[asyncio.BoundedSemaphore] = None,
+                        **kwargs) -> AsyncIterator[tuple[int, dict]]:
+    """Runs independent paginations concurrently under one semaphore.
+
+    Args:
+        wrapper (AsyncAPIWrapper): wrapper used to execute the requests
+        params_list (list[dict]): parameters of each pagination
+        session (Optional[aiohttp.ClientSession], optional): aiohttp session for the requests; if None, a new
+                                                             one is created. Defaults to None.
+        sema (Optional[asyncio.BoundedSemaphore], optional): semaphore to limit concurrency; if None, a new one is
+                                                             created by the wrapper. Defaults to None.
+        kwargs: keyword arguments of paginate (max_pages, maxlag, ...)
+
+    Yields:
+        tuple[int, dict]: index of the pagination in params_list and its page, in the order of arrival
+    """
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            async for item in paginate_many(wrapper, params_list, session, sema, **kwargs):
+                yield item
+        return
+    if sema is None:
+        sema = wrapper._create_sema()
+
+    queue = asyncio.Queue(maxsize=len(params_list) or 1)
+    finished = object()
+
+    async def run(index: int, params: dict) -> None:
+        try:
+            async for page in paginate(wrapper, session, sema, **kwargs, **params):
+                await queue.put((index, page))
+            await queue.put((index, finished))
+        except Exception as e:
+            await queue.put((index, e))
+
+    tasks = [asyncio.create_task(run(index, params)) for index, params in enumerate(params_list)]
+    try:
+        running = len(tasks)
+        while running:
+            index, page = await queue.get()
+            if page is finished:
+                running -= 1
+            elif isinstance(page, Exception):
+                raise page
+            else:
+                yield index, page
+    finally:
+        for task in tasks:
+            task.cancel()
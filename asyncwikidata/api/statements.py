@@ -0,0 +1,284 @@
+from __future__ import annotations
+import json
+from typing import Iterable, Optional, Union
+
+import numpy as np
+
+from asyncwikidata.api.time_parser import parse_times
+
+
+class StatementTable(object):
+    """Columnar representation of claims of many entities.
+
+    Each row is either a statement (main snak of a claim) or a qualifier of a statement.
+    Rows of qualifiers refer to the row of their statement with the `qualifier_of` column (-1 for statements).
+    Values are split into typed columns depending on the value type:
+
+    * `amount` (float64) - amount of quantity values;
+    * `time` (datetime64[D]) and `time_precision` (int8) - time values (see asyncwikidata.api.time_parser);
+    * `item_id` (int64) - numeric IDs of wikibase-item (and other entity-valued) values;
+    * `latitude`, `longitude` (float64) - globe coordinates.
+
+    The `value` column keeps the string representation of every value. Missing numeric values are
+    NaN/NaT/-1; the table is built from the JSON representation of entities without creating Entity objects.
+    """
+    COLUMNS = {
+        'subject': object,
+        'subject_id': np.int64,
+        'property': object,
+        'property_id': np.int64,
+        'qualifier_of': np.int64,
+        'rank': object,
+        'snaktype': object,
+        'datatype': object,
+        'value_type': object,
+        'value': object,
+        'language': object,
+        'unit': object,
+        'amount': np.float64,
+        'time': 'datetime64[D]',
+        'time_precision': np.int8,
+        'item_id': np.int64,
+        'latitude': np.float64,
+        'longitude': np.float64,
+    }
+
+    def __init__(self, columns: dict[str, np.ndarray]) -> None:
+        """
+        Args:
+            columns (dict[str, np.ndarray]): arrays of the same length keyed by column names
+        """
+        self.columns = columns
+
+    @staticmethod
+    def entity_numeric_id(entity_id: str) -> int:
+        """Converts entity ID (e.g. Q42, P31, L7) into integer"""
+        return int(entity_id[1:]) if entity_id[1:].isdigit() else -1
+
+    @classmethod
+    def _empty_rows(cls) -> dict[str, list]:
+        return {name: [] for name in cls.COLUMNS}
+
+    @classmethod
+    def _add_snak(cls, rows: dict[str, list], subject: str, snak: dict,
+                  qualifier_of: int = -1, rank: Optional[str] = None) -> None:
+        """Appends one row describing the snak"""
+        pid = snak['property']
+        rows['subject'].append(subject)
+        rows['subject_id'].append(cls.entity_numeric_id(subject))
+        rows['property'].append(pid)
+        rows['property_id'].append(cls.entity_numeric_id(pid))
+        rows['qualifier_of'].append(qualifier_of)
+        rows['rank'].append(rank)
+        rows['snaktype'].append(snak.get('snaktype', None))
+        rows['datatype'].append(snak.get('datatype', None))
+
+        value, language, unit = None, None, None
+        amount, time, precision, item_id, latitude, longitude = np.nan, None, -1, -1, np.nan, np.nan
+        datavalue = snak.get('datavalue', None) if snak.get('snaktype', None) == 'value' else None
+        value_type = datavalue['type'] if datavalue else None
+        if value_type == 'string':
+            value = datavalue['value']
+        elif value_type == 'monolingualtext':
+            value = datavalue['value'].get('text', None)
+            language = datavalue['value'].get('language', None)
+        elif value_type == 'wikibase-entityid':
+            item_id = datavalue['value'].get('numeric-id', -1)
+            value = datavalue['value'].get('id', None)
+        elif value_type == 'quantity':
+            value = datavalue['value'].get('amount', None)
+            amount = float(value) if value is not None else np.nan
+            unit = datavalue['value'].get('unit', None)
+        elif value_type == 'time':
+            value = datavalue['value'].get('time', None)
+            time = value
+            precision = datavalue['value'].get('precision', -1)
+        elif value_type == 'globecoordinate':
+            latitude = datavalue['value'].get('latitude', None)
+            longitude = datavalue['value'].get('longitude', None)
+            value = f'{latitude},{longitude}'
+        elif datavalue:
+            value = json.dumps(datavalue['value'])
+
+        rows['value_type'].append(value_type)
+        rows['value'].append(value)
+        rows['language'].append(language)
+        rows['unit'].append(unit)
+        rows['amount'].append(amount)
+        rows['time'].append(time)
+        rows['time_precision'].append(precision)
+        rows['item_id'].append(item_id)
+        rows['latitude'].append(np.nan if latitude is None else latitude)
+        rows['longitude'].append(np.nan if longitude is None else longitude)
+
+    @classmethod
+    def from_entity_dicts(cls, entity_dicts: Iterable[dict], properties: Optional[Iterable[str]] = None,
+                          qualifiers: bool = True) -> StatementTable:
+        """Builds the table from the JSON representation of entities
+
+        Args:
+            entity_dicts (Iterable[dict]): entity dictionaries (values of `entities` of wbgetentities response)
+            properties (Optional[Iterable[str]], optional): IDs of properties whose claims are converted; if None,
+                                                            all claims are converted. Defaults to None.
+            qualifiers (bool, optional): if True, qualifiers are added to the table. Defaults to True.
+
+        Returns:
+            StatementTable: table of statements
+        """
+        if properties is not None:
+            properties = set(properties)
+        rows = cls._empty_rows()
+        for entity_dict in entity_dicts:
+            subject = entity_dict['id']
+            for pid, claims_list in entity_dict.get('claims', {}).items():
+                if properties is not None and pid not in properties:
+                    continue
+                for claim_dict in claims_list:
+                    statement_row = len(rows['subject'])
+                    rank = claim_dict.get('rank', None)
+                    cls._add_snak(rows, subject, claim_dict['mainsnak'], rank=rank)
+                    if qualifiers:
+                        for qualsnaks in claim_dict.get('qualifiers', {}).values():
+                            for qualsnak in qualsnaks:
+                                cls._add_snak(rows, subject, qualsnak, qualifier_of=statement_row, rank=rank)
+        return cls.from_rows(rows)
+
+    @classmethod
+    def from_responses(cls, responses: Iterable[Union[bytes, str, dict]], **kwargs) -> StatementTable:
+        """Builds the table from raw wbgetentities responses (see from_entity_dicts for the keyword arguments)
+
+        Raises:
+            Exception: if response contains the error
+        """
+        def entity_dicts():
+            for response in responses:
+                if isinstance(response, bytes):
+                    response = response.decode('utf-8')
+                if isinstance(response, str):
+                    response = json.loads(response)
+                if 'error' in response:
+                    raise Exception(response['error'])
+                yield from response['entities'].values()
+        return cls.from_entity_dicts(entity_dicts(), **kwargs)
+
+    @classmethod
+    def from_rows(cls, rows: dict[str, list]) -> StatementTable:
+        """Converts lists of values into typed arrays"""
+        columns = {}
+        for name, dtype in cls.COLUMNS.items():
+            if name == 'time':
+                # time strings are parsed at once
+                times = np.array([time is not None for time in rows[name]], dtype=bool)
+                column = np.full(len(times), np.datetime64('NaT'), dtype=dtype)
+                column[times] = parse_times([time for time in rows[name] if time is not None],
+                                            np.array(rows['time_precision'])[times])['date']
+            elif dtype is object:
+                column = np.empty(len(rows[name]), dtype=object)
+                column[:] = rows[name]
+            else:
+                column = np.array(rows[name], dtype=dtype)
+            columns[name] = column
+        return cls(columns)
+
+    @classmethod
+    def concat(cls, tables: Iterable[StatementTable]) -> StatementTable:
+        """Concatenates tables shifting `qualifier_of` references"""
+        tables = list(tables)
+        if not tables:
+            return cls.from_rows(cls._empty_rows())
+        columns = {name: [] for name in cls.COLUMNS}
+        offset = 0
+        for table in tables:
+            for name in cls.COLUMNS:
+                column = table[name]
+                if name == 'qualifier_of':
+                    column = np.where(column >= 0, column + offset, column)
+                columns[name].append(column)
+            offset += len(table)
+        return cls({name: np.concatenate(arrays) for name, arrays in columns.items()})
+
+    def __len__(self) -> int:
+        return len(self.columns['subject'])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}(rows={len(self)}, columns={list(self.columns)})'
+
+    def to_rows(self) -> list[dict]:
+        """Converts the table into the list of rows with plain Python values
+        (missing floats and times become None, times become ISO strings)"""
+        columns = {}
+        for name, column in self.columns.items():
+            if name == 'time':
+                mask = np.isnat(column)
+                column = np.datetime_as_string(column).astype(object)
+                column[mask] = None
+            elif column.dtype == np.float64:
+                mask = np.isnan(column)
+                column = column.astype(object)
+                column[mask] = None
+            columns[name] = column.tolist()
+        return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+    def to_pandas(self):
+        """Converts the table into pandas.DataFrame (requires pandas)"""
+        import pandas as pd
+        return pd.DataFrame(self.columns)
+
+    @classmethod
+    def arrow_schema(cls, time_as_days: bool = False):
+        """Schema of `to_arrow` (requires pyarrow): object columns are nullable strings, so the schema does not
+        depend on the values of a chunk (e.g. a `unit` column without quantities).
+
+        Args:
+            time_as_days (bool, optional): if True, the `time` column is int64 number of days since 1970-01-01;
+                                           otherwise it is date32. Defaults to False.
+
+        Returns:
+            pyarrow.Schema: schema of the table
+        """
+        import pyarrow as pa
+        fields = []
+        for name, dtype in cls.COLUMNS.items():
+            if name == 'time':
+                arrow_type = pa.int64() if time_as_days else pa.date32()
+            elif dtype is object:
+                arrow_type = pa.string()
+            else:
+                arrow_type = pa.from_numpy_dtype(np.dtype(dtype))
+            fields.append(pa.field(name, arrow_type))
+        return pa.schema(fields)
+
+    def to_arrow(self, schema=None):
+        """Converts the table into pyarrow.Table (requires pyarrow) with the schema of `arrow_schema`.
+
+        Arrow dates are 32-bit, so if some time values (e.g. geological ones) do not fit into date32,
+        the `time` column is stored as int64 number of days since 1970-01-01 instead, unless the schema is given.
+
+        Args:
+            schema (Optional[pyarrow.Schema], optional): schema of the result (see `arrow_schema`). Defaults to None.
+
+        Raises:
+            ValueError: if the schema has date32 `time` column and some time values do not fit into it
+
+        Returns:
+            pyarrow.Table: table of statements
+        """
+        import pyarrow as pa
+        days = self.columns['time'].astype(np.int64)
+        mask = np.isnat(self.columns['time'])
+        overflow = bool(np.any((np.abs(days) > np.iinfo(np.int32).max) & ~mask))
+        if schema is None:
+            schema = self.arrow_schema(time_as_days=overflow)
+        elif overflow and not pa.types.is_integer(schema.field('time').type):
+            raise ValueError('Time values do not fit into date32; use the schema with time_as_days=True')
+        arrays = []
+        for field in schema:
+            column = self.columns[field.name]
+            if field.name == 'time' and pa.types.is_integer(field.type):
+                arrays.append(pa.array(days, type=field.type, mask=mask))
+            else:
+                arrays.append(pa.array(column, type=field.type))
+        return pa.Table.from_arrays(arrays, schema=schema)
@@ -0,0 +1,167 @@
+"""Parsing of Wikidata time values.
+
+Wikidata stores time as a string like `+1952-03-11T00:00:00Z` with a signed year of any length
+(e.g. `-13798000000-00-00T00:00:00Z`) and a precision (0 - billion years, ..., 9 - year, 10 - month,
+11 - day, ..., 14 - second). Fields finer than the precision are meaningless (and usually stored as 00),
+so the parsers set them to 0.
+
+Years are kept as in Wikidata: there is no year 0 and -1 is 1 BCE. Dates (datetime64 and day numbers)
+use the proleptic Gregorian calendar with astronomical years (1 BCE is year 0) as ISO 8601 does.
+"""
+from __future__ import annotations
+import re
+from typing import TYPE_CHECKING, Iterable, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+
+PRECISION_SECOND = 14
+PRECISION_MINUTE = 13
+PRECISION_HOUR = 12
+PRECISION_DAY = 11
+PRECISION_MONTH = 10
+PRECISION_YEAR = 9
+
+# the part after the year: -MM-DDThh:mm:ssZ
+_SUFFIX_LENGTH = 16
+# fields are ASCII digits only (int() would also accept signs, spaces and other digits)
+_TIME_PATTERN = re.compile(r'([+-]?[0-9]+)-([0-9]{2})-([0-9]{2})T([0-9]{2}):([0-9]{2}):([0-9]{2})Z')
+
+
+def parse_time(time: str, precision: Optional[int] = None) -> tuple[int, int, int, int, int, int]:
+    """Parses Wikidata time string
+
+    Args:
+        time (str): time string, e.g. +1952-03-11T00:00:00Z
+        precision (Optional[int], optional): precision of the value; if set, fields finer than
+                                             the precision are set to 0. Defaults to None.
+
+    Raises:
+        ValueError: if the string is not a valid Wikidata time
+
+    Returns:
+        tuple[int, int, int, int, int, int]: year, month, day, hour, minute, second
+    """
+    match = _TIME_PATTERN.fullmatch(time)
+    if match is None:
+        raise ValueError(f'Invalid time {time}')
+    year, *fields = (int(group) for group in match.groups())
+    if precision is not None:
+        # month, day, hour, minute and second have precisions 10 - 14
+        fields = [value if precision >= PRECISION_MONTH + i else 0 for i, value in enumerate(fields)]
+    month, day, hour, minute, second = fields
+    return year, month, day, hour, minute, second
+
+
+def pack_time(year: int, month: int, day: int, precision: int) -> int:
+    """Packs date and precision into one integer which preserves the chronological order"""
+    return ((year * 16 + month) * 32 + day) * 16 + precision
+
+
+def unpack_time(packed: int) -> tuple[int, int, int, int]:
+    """Inverse of pack_time. Returns year, month, day and precision"""
+    packed, precision = divmod(packed, 16)
+    packed, day = divmod(packed, 32)
+    year, month = divmod(packed, 16)
+    return year, month, day, precision
+
+
+def days_from_civil(year, month, day):
+    """Number of days since 1970-01-01 in the proleptic Gregorian calendar (astronomical years).
+    Works both for integers and NumPy integer arrays.
+    """
+    year = year - (month <= 2)
+    era = year // 400
+    yoe = year - era * 400
+    doy = (153 * (month + 9 - 12 * (month > 2)) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+
+def parse_times(times: Iterable[str], precisions: Optional[Iterable[int]] = None) -> dict[str, np.ndarray]:
+    """Parses many Wikidata time strings at once.
+
+    Strings are converted into a byte matrix and parsed with vectorized operations (one pass per distinct
+    string length, e.g. 4-digit years). Invalid strings (including ones with non-ASCII characters) get
+    the `valid` flag False, zero fields and NaT date.
+
+    Args:
+        times (Iterable[str]): time strings
+        precisions (Optional[Iterable[int]], optional): precisions of the values; if set, fields finer than
+                                                       the precision are set to 0 and the precision is
+                                                       included into `packed`. Defaults to None.
+
+    Returns:
+        dict[str, np.ndarray]: arrays `year` (int64), `month`, `day`, `hour`, `minute`, `second` (int8),
+                               `valid` (bool), `date` (datetime64[D]), `packed` (int64, see pack_time) and
+                               `precision` (int8, -1 if unknown)
+    """
+    import numpy as np
+
+    if isinstance(times, np.ndarray) and times.dtype.kind == 'S':
+        raw = times
+    else:
+        # non-ASCII characters are replaced by '?', so only their strings are invalid
+        raw = np.char.encode(np.asarray(list(times) if not isinstance(times, np.ndarray) else times, dtype=str),
+                             'ascii', 'replace')
+    n = len(raw)
+    year = np.zeros(n, dtype=np.int64)
+    fields = np.zeros((n, 5), dtype=np.int64)
+    valid = np.zeros(n, dtype=bool)
+
+    if n:
+        width = raw.dtype.itemsize
+        matrix = raw.view(np.uint8).reshape(n, width).astype(np.int64)
+        lengths = np.count_nonzero(matrix, axis=1)
+        for length in np.unique(lengths):
+            if length <= _SUFFIX_LENGTH:
+                continue
+            rows = np.nonzero(lengths == length)[0]
+            group = matrix[rows, :length]
+            digits = group - ord('0')
+            has_sign = (group[:, 0] == ord('+')) | (group[:, 0] == ord('-'))
+            year_digits = digits[:, :length - _SUFFIX_LENGTH].copy()
+            year_digits[has_sign, 0] = 0
+            field_digits = digits[:, length - 15 + np.array([0, 1, 3, 4, 6, 7, 9, 10, 12, 13])]
+            # the year has at least one digit after the sign
+            ok = (~(has_sign & (length == _SUFFIX_LENGTH + 1))
+                  & (group[:, length - 16] == ord('-')) & (group[:, length - 10] == ord('T'))
+                  & (group[:, length - 1] == ord('Z'))
+                  & np.all((year_digits >= 0) & (year_digits <= 9), axis=1)
+                  & np.all((field_digits >= 0) & (field_digits <= 9), axis=1))
+            powers = 10 ** np.arange(length - _SUFFIX_LENGTH - 1, -1, -1, dtype=np.int64)
+            sign = np.where(group[:, 0] == ord('-'), -1, 1)
+            year[rows] = sign * (year_digits @ powers)
+            for i, start in enumerate((15, 12, 9, 6, 3)):
+                fields[rows, i] = digits[:, length - start] * 10 + digits[:, length - start + 1]
+            valid[rows] = ok
+
+    if precisions is not None:
+        precision = np.asarray(list(precisions) if not isinstance(precisions, np.ndarray) else precisions,
+                               dtype=np.int64)
+        # month, day, hour, minute and second have precisions 10 - 14
+        for i in range(5):
+            fields[precision < PRECISION_MONTH + i, i] = 0
+    else:
+        precision = np.full(n, -1, dtype=np.int64)
+
+    year = np.where(valid, year, 0)
+    fields[~valid] = 0
+    month, day = fields[:, 0], fields[:, 1]
+    astronomical_year = np.where(year < 0, year + 1, year)
+    days = days_from_civil(astronomical_year, np.maximum(month, 1), np.maximum(day, 1))
+    date = days.astype('datetime64[D]')
+    date[~valid] = np.datetime64('NaT')
+
+    return {
+        'year': year,
+        'month': month.astype(np.int8),
+        'day': day.astype(np.int8),
+        'hour': fields[:, 2].astype(np.int8),
+        'minute': fields[:, 3].astype(np.int8),
+        'second': fields[:, 4].astype(np.int8),
+        'valid': valid,
+        'date': date,
+        'packed': pack_time(year, month, day, np.maximum(precision, 0)),
+        'precision': precision.astype(np.int8),
+    }
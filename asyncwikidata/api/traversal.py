@@ -0,0 +1,117 @@
+from __future__ import annotations
+import asyncio
+from collections import deque
+from typing import TYPE_CHECKING, AsyncIterator, Iterable, Iterator, Optional, Union
+
+import aiohttp
+
+from asyncwikidata.api.entity import Entity
+
+if TYPE_CHECKING:
+    from asyncwikidata.api.async_api_wrapper import AsyncAPIWrapper
+
+# datatypes of values which are followed and prefixes of their IDs
+ENTITY_DATATYPES = {'wikibase-item': 'Q', 'wikibase-property': 'P'}
+
+
+def _claim_targets(entity_dict: dict, properties: list[str]) -> Iterator[str]:
+    """IDs of items and properties which are values of claims of the given properties"""
+    claims = entity_dict.get('claims', {})
+    for pid in properties:
+        for claim in claims.get(pid, []):
+            mainsnak = claim['mainsnak']
+            if mainsnak.get('datatype') not in ENTITY_DATATYPES or 'datavalue' not in mainsnak:
+                continue
+            value = mainsnak['datavalue']['value']
+            yield value['id'] if 'id' in value else ENTITY_DATATYPES[mainsnak['datatype']] + str(value['numeric-id'])
+
+
+async def traverse(wrapper: AsyncAPIWrapper, seeds: Iterable[str], properties: Iterable[str],
+                   max_depth: Optional[int] = None, max_nodes: Optional[int] = None, batch_size: int = 50,
+                   session: Optional[aiohttp.ClientSession] = None,
+                   sema: Optional[asyncio.BoundedSemaphore] = None,
+                   props: Union[str, list[str]] = 'info|labels|descriptions|claims',
+                   entity_properties: Optional[Iterable[str]] = None,
+                   **kwargs) -> AsyncIterator[tuple[Entity, int]]:
+    """Breadth-first traversal of the graph formed by claims of the given properties
+    (e.g. P279 for the subclass hierarchy or P361 for the part-of tree).
+
+    Newly discovered IDs are packed into full batches of `batch_size` IDs which are requested while
+    earlier batches are still in flight; an incomplete batch is sent only if no other request is running.
+    Because of that entities are yielded in the order of responses, which is breadth-first only approximately.
+
+    Args:
+        wrapper (AsyncAPIWrapper): wrapper used to execute wbgetentities calls
+        seeds (Iterable[str]): IDs of entities to start from (depth 0)
+        properties (Iterable[str]): IDs of properties whose values are followed
+        max_depth (Optional[int], optional): maximum distance from the seeds; None means unlimited. Defaults to None.
+        max_nodes (Optional[int], optional): maximum number of entities to visit (including seeds);
+                                             None means unlimited. Defaults to None.
+        batch_size (int, optional): number of IDs in one wbgetentities call. Defaults to 50.
+        session (Optional[aiohttp.ClientSession], optional): aiohttp session for the requests; if None, a new
+                                                             one is created. Defaults to None.
+        sema (Optional[asyncio.BoundedSemaphore], optional): semaphore to limit concurrency; if None, a new one is
+                                                             created by the wrapper. Defaults to None.
+        props (Union[str, list[str]], optional): parts of entities to request; claims are always requested.
+                                                 Defaults to 'info|labels|descriptions|claims'.
+        entity_properties (Optional[Iterable[str]], optional): IDs of properties whose claims are parsed into the
+                                                               yielded entities; if None, all claims are parsed.
+                                                               It does not affect which claims are followed.
+                                                               Defaults to None.
+
+    Yields:
+        tuple[Entity, int]: visited entity and its distance from the seeds
+    """
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            async for item in traverse(wrapper, seeds, properties, max_depth=max_depth, max_nodes=max_nodes,
+                                       batch_size=batch_size, session=session, sema=sema, props=props,
+                                       entity_properties=entity_properties, **kwargs):
+                yield item
+        return
+    if sema is None:
+        sema = wrapper._create_sema()
+
+    properties = list(properties)
+    if isinstance(props, str):
+        props = props.split('|')
+    if 'claims' not in props:
+        props = [*props, 'claims']
+    kwargs.setdefault('format', 'json')
+    repr_lang = kwargs['languages'][0] if 'languages' in kwargs else None
+
+    depths = {}
+    queue = deque()
+
+    def discover(entity_id: str, depth: int) -> None:
+        if entity_id in depths or (max_nodes is not None and len(depths) >= max_nodes):
+            return
+        depths[entity_id] = depth
+        queue.append(entity_id)
+
+    for seed in seeds:
+        discover(seed, 0)
+
+    in_flight = {}
+    try:
+        while queue or in_flight:
+            while queue and (len(queue) >= batch_size or not in_flight):
+                batch = [queue.popleft() for _ in range(min(batch_size, len(queue)))]
+                task = asyncio.create_task(wrapper.fetch_entity_dicts(session, sema, batch, props=props, **kwargs))
+                in_flight[task] = max(depths[entity_id] for entity_id in batch)
+
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                batch_depth = in_flight.pop(task)
+                for obj_id, entity_dict in task.result().items():
+                    if 'missing' in entity_dict:
+                        continue
+                    # redirected entities are returned under the ID of the target
+                    depth = depths.setdefault(obj_id, batch_depth)
+                    if max_depth is None or depth < max_depth:
+                        for target in _claim_targets(entity_dict, properties):
+                            discover(target, depth + 1)
+                    yield Entity(entity_dict, repr_lang=repr_lang, properties=entity_properties), depth
+    finally:
+        for task in in_flight:
+            task.cancel()
@@ -1,22 +1,41 @@
 from __future__ import annotations
 from functools import wraps
-from typing import Optional
+from itertools import islice
+from typing import Iterable, Iterator, Optional
 
-def create_chunks(data: list, n: Optional[int]=None):
-    """Yields chunks from a list
+def create_chunks(data: Iterable, n: Optional[int]=None) -> Iterator[list]:
+    """Yields chunks from a list, NumPy array or any other iterable.
+    Sequences are sliced, iterators are consumed lazily, so only one chunk is materialized at a time.
+    Chunks of NumPy arrays are lists; chunks of EntityIds are EntityIds, so they are formatted only
+    when the request is sent.
 
     Args:
-        data (list): list to chunkify
+        data (Iterable): list to chunkify
         n (int): size of each chunk
 
     Yields:
         a piece of data with size n from the list data
     """
-    if not isinstance(data, list):
-        data = list(data)
-
     if not n:
-        yield data
-    else:
+        yield data if isinstance(data, list) else _to_list(data)
+    elif hasattr(data, '__getitem__') and hasattr(data, '__len__') and not isinstance(data, (str, dict)):
         for i in range(0, len(data), n):
-            yield data[i:i + n]
+            yield _to_list(data[i:i + n])
+    else:
+        iterator = iter(data)
+        while True:
+            chunk = list(islice(iterator, n))
+            if not chunk:
+                return
+            yield chunk
+
+def _to_list(data: Iterable) -> list:
+    if isinstance(data, list):
+        return data
+    if hasattr(data, 'dtype'):
+        # NumPy arrays
+        return data.tolist()
+    if hasattr(data, 'namespace') and hasattr(data, 'numbers'):
+        # EntityIds (not imported here: the module depends on NumPy)
+        return data
+    return list(data)
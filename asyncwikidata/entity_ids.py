@@ -0,0 +1,149 @@
+from __future__ import annotations
+import re
+from typing import Iterable, Iterator, Optional, Union
+
+import numpy as np
+
+NAMESPACES = ('Q', 'P', 'L')
+
+
+class EntityIds(object):
+    """Entity IDs of one namespace (items Q, properties P or lexemes L) kept as a NumPy integer array.
+
+    An array of numbers takes 4-8 bytes per ID instead of ~50 bytes of a Python string, and de-duplication,
+    sorting and joins are vectorized. The IDs are formatted as strings ('Q42') only when they are sent:
+    iterating, indexing by position and `tolist` return strings, so EntityIds can be passed wherever a list
+    of IDs is expected (`ids` of AsyncAPIWrapper calls, values of Query.split_by_values_clause, ...), while
+    slices return EntityIds, so chunks are formatted one by one.
+
+    Example:
+        ids = EntityIds([1, 5, 42])  # Q1, Q5, Q42
+        queries = Query.iter_split_by_values_clause(q, chunkify_by='qids', chunksize=50, qids=ids)
+    """
+    __slots__ = ('numbers', 'namespace')
+
+    def __init__(self, numbers: Union[Iterable[int], np.ndarray], namespace: str = 'Q',
+                 dtype: Union[type, str, None] = None) -> None:
+        """
+        Args:
+            numbers (Union[Iterable[int], np.ndarray]): numeric parts of the IDs
+            namespace (str, optional): prefix of the IDs: 'Q', 'P' or 'L'. Defaults to 'Q'.
+            dtype (Union[type, str, None], optional): integer dtype of the array (e.g. np.int32); if None, the
+                                                      dtype of numbers is kept (int64 for Python integers).
+                                                      Defaults to None.
+
+        Raises:
+            ValueError: if namespace is not supported or numbers are not integers
+        """
+        if namespace not in NAMESPACES:
+            raise ValueError(f'Unsupported namespace {namespace}; expected one of {NAMESPACES}')
+        if not isinstance(numbers, np.ndarray):
+            numbers = np.fromiter(numbers, dtype=dtype or np.int64)
+        elif dtype is not None:
+            numbers = numbers.astype(dtype, copy=False)
+        if numbers.ndim != 1 or not np.issubdtype(numbers.dtype, np.integer):
+            raise ValueError(f'Expected one-dimensional integer array, got {numbers.dtype} with shape {numbers.shape}')
+        self.numbers = numbers
+        self.namespace = namespace
+
+    @staticmethod
+    def _local_name(value: str) -> str:
+        """'Q42' of 'Q42', 'wd:Q42' or 'http://www.wikidata.org/entity/Q42'"""
+        return value[max(value.rfind('/'), value.rfind(':')) + 1:]
+
+    @staticmethod
+    def _is_id(name: str, namespace: str) -> bool:
+        return name[:1] == namespace and name[1:].isascii() and name[1:].isdecimal()
+
+    @classmethod
+    def from_strings(cls, values: Iterable[str], namespace: Optional[str] = None, strict: bool = True,
+                     dtype: Union[type, str] = np.int64) -> EntityIds:
+        """Parses string IDs: plain ('Q42'), prefixed ('wd:Q42') or entity URIs
+
+        Args:
+            values (Iterable[str]): string IDs
+            namespace (Optional[str], optional): namespace of the IDs; if None, the namespace of the first ID is
+                                                 used. Defaults to None.
+            strict (bool, optional): if True, an error is raised for values which are not IDs of the namespace;
+                                     otherwise such values are skipped. Defaults to True.
+            dtype (Union[type, str], optional): integer dtype of the array. Defaults to np.int64.
+
+        Raises:
+            ValueError: if strict and some value is not an ID of the namespace
+
+        Returns:
+            EntityIds: parsed IDs
+        """
+        names = values if isinstance(values, list) else list(values)
+        joined = ' '.join(names)
+        if '/' in joined or ':' in joined:
+            names = [cls._local_name(name) for name in names]
+            joined = ' '.join(names)
+        if namespace is None:
+            namespace = names[0][:1] if names else 'Q'
+        if namespace not in NAMESPACES:
+            raise ValueError(f'Unsupported namespace {namespace}; expected one of {NAMESPACES}')
+        if not names:
+            return cls(np.empty(0, dtype=dtype), namespace)
+        # the joined string is valid only if every value is one ID: a value containing spaces adds separators
+        if joined.count(' ') != len(names) - 1 or re.fullmatch(rf'{namespace}[0-9]+(?: {namespace}[0-9]+)*',
+                                                               joined) is None:
+            if strict:
+                invalid = next(name for name in names if not cls._is_id(name, namespace))
+                raise ValueError(f'{invalid!r} is not an ID of the {namespace} namespace')
+            names = [name for name in names if cls._is_id(name, namespace)]
+            return cls(np.fromiter((int(name[1:]) for name in names), dtype=dtype, count=len(names)), namespace)
+        # all the values are valid: the numbers are parsed in one pass by NumPy
+        return cls(np.fromstring(joined.replace(namespace, ''), dtype=dtype, sep=' '), namespace)
+
+    @classmethod
+    def from_bindings(cls, bindings: Iterable[dict], variable: str, namespace: Optional[str] = None,
+                      dtype: Union[type, str] = np.int64) -> EntityIds:
+        """Parses IDs bound to the variable in SPARQL JSON bindings (results['results']['bindings']).
+        Bindings without the variable and values which are not entities of the namespace are skipped.
+        """
+        values = [answer[variable]['value'] for answer in bindings if variable in answer]
+        return cls.from_strings(values, namespace=namespace, strict=False, dtype=dtype)
+
+    def unique(self) -> EntityIds:
+        """Distinct IDs in the order of their first occurrence"""
+        _, index = np.unique(self.numbers, return_index=True)
+        return self.__class__(self.numbers[np.sort(index)], self.namespace)
+
+    def tolist(self, prefix: str = '') -> list[str]:
+        """String IDs, e.g. ['Q1', 'Q42'] (or ['wd:Q1', 'wd:Q42'] with prefix 'wd:')"""
+        start = f'{prefix}{self.namespace}'
+        return [f'{start}{number}' for number in self.numbers.tolist()]
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        return self.numbers if dtype is None else self.numbers.astype(dtype)
+
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.tolist())
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return f'{self.namespace}{self.numbers[index]}'
+        return self.__class__(self.numbers[index], self.namespace)
+
+    def __contains__(self, entity_id: Union[str, int]) -> bool:
+        if isinstance(entity_id, str):
+            name = self._local_name(entity_id)
+            if not self._is_id(name, self.namespace):
+                return False
+            entity_id = int(name[1:])
+        return bool(np.any(self.numbers == entity_id))
+
+    def __eq__(self, o: object) -> bool:
+        if not isinstance(o, EntityIds):
+            return False
+        return self.namespace == o.namespace and np.array_equal(self.numbers, o.numbers)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        shown = ', '.join(self[:5].tolist()) + (', ...' if len(self) > 5 else '')
+        return f'{self.__class__.__name__}([{shown}], n={len(self)}, dtype={self.numbers.dtype})'
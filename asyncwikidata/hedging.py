@@ -0,0 +1,129 @@
+from __future__ import annotations
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
+
+from asyncwikidata.instrumentation import Metrics
+
+
+class HedgePolicy(object):
+    """Policy of hedged requests: if the request is still pending after the `percentile` of recent latencies,
+    a duplicate request is sent; the first successful response is used and the other request is cancelled.
+
+    The extra load is capped by the budget: every request adds `budget` tokens (up to `max_tokens`) and every
+    hedge takes one token, so at most `budget` of requests are duplicated in the long run.
+    Until `min_samples` latencies are observed, `initial_delay` is used (None means no hedging).
+    """
+    def __init__(self, percentile: float = 0.95, budget: float = 0.05, max_tokens: float = 10.0,
+                 min_delay: float = 0.0, max_delay: Optional[float] = None, initial_delay: Optional[float] = None,
+                 min_samples: int = 20, window: int = 1000, other_endpoint: bool = True,
+                 metrics: Optional[Metrics] = None) -> None:
+        """
+        Args:
+            percentile (float, optional): percentile of latencies after which the hedge is sent. Defaults to 0.95.
+            budget (float, optional): maximum fraction of hedged requests. Defaults to 0.05.
+            max_tokens (float, optional): maximum number of hedges which can be sent in a row. Defaults to 10.0.
+            min_delay (float, optional): lower bound of the delay (seconds). Defaults to 0.0.
+            max_delay (Optional[float], optional): upper bound of the delay (seconds). Defaults to None.
+            initial_delay (Optional[float], optional): delay used until `min_samples` latencies are observed;
+                                                       None means no hedging. Defaults to None.
+            min_samples (int, optional): number of latencies needed to estimate the percentile. Defaults to 20.
+            window (int, optional): number of recent latencies used to estimate the percentile. Defaults to 1000.
+            other_endpoint (bool, optional): if True and the wrapper has the endpoint pool, the hedge is sent to
+                                             another endpoint. Defaults to True.
+            metrics (Optional[Metrics], optional): registry where hedges are counted; if None, a new one is
+                                                   created. Defaults to None.
+        """
+        if not 0 < percentile < 1:
+            raise ValueError(f'percentile should be in (0, 1), got {percentile}')
+        self.percentile = percentile
+        self.budget = budget
+        self.max_tokens = max_tokens
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.initial_delay = initial_delay
+        self.min_samples = min_samples
+        self.other_endpoint = other_endpoint
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.latencies = deque(maxlen=window)
+        self.__tokens = 0.0
+        self.__delay = None
+        self.__observed = 0
+
+    def observe(self, latency: float) -> None:
+        self.latencies.append(latency)
+        self.__observed += 1
+        if self.__observed % 10 == 0:
+            # the percentile is recomputed every 10 observations
+            self.__delay = None
+
+    def delay(self) -> Optional[float]:
+        """Seconds after which the hedge is sent or None if requests are not hedged yet"""
+        if len(self.latencies) < self.min_samples:
+            return self.initial_delay
+        if self.__delay is None:
+            latencies = sorted(self.latencies)
+            delay = latencies[min(len(latencies) - 1, math.ceil(self.percentile * len(latencies)) - 1)]
+            delay = max(delay, self.min_delay)
+            self.__delay = min(delay, self.max_delay) if self.max_delay is not None else delay
+        return self.__delay
+
+    async def run(self, request: Callable[[], Awaitable],
+                  can_hedge: Optional[Callable[[], bool]] = None) -> tuple[Any, bool]:
+        """Executes the request hedging it if it is slow
+
+        Args:
+            request (Callable[[], Awaitable]): coroutine function executing the request
+            can_hedge (Optional[Callable[[], bool]], optional): called before sending the hedge; if it returns
+                                                                False, the hedge is not sent (e.g. if there are
+                                                                no free slots). Defaults to None.
+
+        Raises:
+            Exception: the error of the last failed request if all of them failed
+
+        Returns:
+            tuple[Any, bool]: result of the first successful request and whether the hedge was sent
+        """
+        self.metrics.inc('hedgeable_requests')
+        self.__tokens = min(self.max_tokens, self.__tokens + self.budget)
+        start = time.perf_counter()
+        primary = asyncio.ensure_future(request())
+        hedge = None
+        try:
+            delay = self.delay()
+            if delay is not None:
+                await asyncio.wait({primary}, timeout=delay)
+            if delay is None or primary.done() or self.__tokens < 1 or (can_hedge is not None and not can_hedge()):
+                result = await primary
+                self.observe(time.perf_counter() - start)
+                return result, False
+
+            self.__tokens -= 1
+            self.metrics.inc('hedged_requests')
+            hedge_start = time.perf_counter()
+            hedge = asyncio.ensure_future(request())
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        # the latency of the winner is measured from its own start
+                        if task is hedge:
+                            self.metrics.inc('hedge_wins')
+                            self.observe(time.perf_counter() - hedge_start)
+                        else:
+                            self.observe(time.perf_counter() - start)
+                        return task.result(), True
+                    error = task.exception()
+            raise error
+        finally:
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def __repr__(self) -> str:
+        return (f'{self.__class__.__name__}(percentile={self.percentile}, delay={self.delay()}, '
+                f'hedged={self.metrics.counters.get("hedged_requests", 0)}, '
+                f'wins={self.metrics.counters.get("hedge_wins", 0)})')
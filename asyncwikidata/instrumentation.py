@@ -0,0 +1,184 @@
+from __future__ import annotations
+import bisect
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+# upper bounds (in seconds) of histogram buckets
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class RequestRecord(object):
+    """Structured record of one HTTP request"""
+    __slots__ = ('url', 'status', 'started', 'latency', 'bytes', 'retries', 'hedged', 'retry_after', 'entities', 'error')
+
+    def __init__(self, url: Optional[str] = None, status: Optional[int] = None, started: Optional[float] = None,
+                 latency: Optional[float] = None, bytes: int = 0, retries: int = 0, hedged: bool = False,
+                 retry_after: Optional[float] = None, entities: Optional[int] = None, error: Optional[str] = None) -> None:
+        """
+        Args:
+            url (Optional[str], optional): requested url. Defaults to None.
+            status (Optional[int], optional): HTTP status of the response. Defaults to None.
+            started (Optional[float], optional): unix time when the request was sent. Defaults to None.
+            latency (Optional[float], optional): seconds from sending the request to reading the response.
+                                                 Defaults to None.
+            bytes (int, optional): size of the response body. Defaults to 0.
+            retries (int, optional): number of earlier attempts of the same request which were retried after
+                                     an error response (e.g. maxlag); every attempt has its own record.
+                                     Defaults to 0.
+            hedged (bool, optional): whether a duplicate (hedged) request was sent because the response was slow.
+                                     Defaults to False.
+            retry_after (Optional[float], optional): seconds from the Retry-After header of the response.
+                                                     Defaults to None.
+            entities (Optional[int], optional): number of entities in the response if applicable. Defaults to None.
+            error (Optional[str], optional): description of the error if the request failed. Defaults to None.
+        """
+        self.url = url
+        self.status = status
+        self.started = started
+        self.latency = latency
+        self.bytes = bytes
+        self.retries = retries
+        self.hedged = hedged
+        self.retry_after = retry_after
+        self.entities = entities
+        self.error = error
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return "{}({})".format(self.__class__.__name__,
+                               ', '.join(f'{name}={getattr(self, name)}' for name in self.__slots__))
+
+
+class RequestLog(object):
+    """Ring buffer keeping the most recent request records"""
+    def __init__(self, maxlen: Optional[int] = 1000) -> None:
+        """
+        Args:
+            maxlen (Optional[int], optional): maximum number of records kept; None means unbounded. Defaults to 1000.
+        """
+        self.records = deque(maxlen=maxlen)
+
+    def append(self, record: RequestRecord) -> None:
+        self.records.append(record)
+
+    def urls(self) -> list[str]:
+        return [record.url for record in self.records]
+
+    def clear(self) -> None:
+        self.records.clear()
+
+    def __iter__(self) -> Iterator[RequestRecord]:
+        return iter(list(self.records))
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+
+class Histogram(object):
+    """Cumulative histogram of observed values with fixed bucket bounds"""
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # the last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimated quantile (upper bound of the bucket containing it)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return float('inf')
+
+    def snapshot(self) -> dict:
+        cumulative, buckets = 0, {}
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            buckets[bound] = cumulative
+        return {'count': self.count, 'sum': self.sum, 'buckets': buckets}
+
+
+class Metrics(object):
+    """Registry of counters, gauges and histograms.
+
+    Values can be read with `snapshot` or exported in the Prometheus text format with `to_prometheus`.
+    Callables subscribed with `subscribe` are called with the name and value of every observation.
+    """
+    def __init__(self, prefix: str = 'asyncwikidata', buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        """
+        Args:
+            prefix (str, optional): prefix of metric names in the Prometheus export. Defaults to 'asyncwikidata'.
+            buckets (tuple[float, ...], optional): bounds of histogram buckets. Defaults to DEFAULT_BUCKETS.
+        """
+        self.prefix = prefix
+        self.buckets = buckets
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.subscribers = []
+
+    def inc(self, name: str, value: float = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        self.gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        if name not in self.histograms:
+            self.histograms[name] = Histogram(self.buckets)
+        self.histograms[name].observe(value)
+        for subscriber in self.subscribers:
+            subscriber(name, value)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """Context manager observing the duration of the block (in seconds) in the histogram `name`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def subscribe(self, callback: Callable[[str, float], None]) -> None:
+        self.subscribers.append(callback)
+
+    def snapshot(self) -> dict:
+        return {
+            'counters': dict(self.counters),
+            'gauges': dict(self.gauges),
+            'histograms': {name: histogram.snapshot() for name, histogram in self.histograms.items()},
+        }
+
+    def to_prometheus(self) -> str:
+        """Exports metrics in the Prometheus text exposition format"""
+        lines = []
+        for name, value in sorted(self.counters.items()):
+            lines += [f'# TYPE {self.prefix}_{name}_total counter', f'{self.prefix}_{name}_total {value}']
+        for name, value in sorted(self.gauges.items()):
+            lines += [f'# TYPE {self.prefix}_{name} gauge', f'{self.prefix}_{name} {value}']
+        for name, histogram in sorted(self.histograms.items()):
+            snapshot = histogram.snapshot()
+            lines.append(f'# TYPE {self.prefix}_{name} histogram')
+            for bound, count in snapshot['buckets'].items():
+                le = '+Inf' if bound == float('inf') else bound
+                lines.append(f'{self.prefix}_{name}_bucket{{le="{le}"}} {count}')
+            lines += [f'{self.prefix}_{name}_sum {snapshot["sum"]}', f'{self.prefix}_{name}_count {snapshot["count"]}']
+        return '\n'.join(lines) + '\n'
+
+    def reset(self) -> None:
+        self.counters.clear()
+        self.gauges.clear()
+        self.histograms.clear()
@@ -0,0 +1,349 @@
+from __future__ import annotations
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Iterable, Iterator, Optional, Union
+
+import aiohttp
+
+from asyncwikidata import bounded_as_completed, run_async
+from asyncwikidata.chunkify import create_chunks
+
+if TYPE_CHECKING:
+    from asyncwikidata.api.async_api_wrapper import AsyncAPIWrapper
+    from asyncwikidata.sparql.async_sparqlwrapper import AsyncSPARQLWrapper
+    from asyncwikidata.sparql.query import Query
+
+logger = logging.getLogger(__name__)
+
+DONE = 'done'
+FAILED = 'failed'
+
+
+class JobProgress(object):
+    """Progress of one run of the job"""
+    __slots__ = ('name', 'total', 'done', 'skipped', 'failed', 'items', 'bytes', 'started')
+
+    def __init__(self, name: str, total: Optional[int] = None) -> None:
+        """
+        Args:
+            name (str): name of the job
+            total (Optional[int], optional): number of chunks if it is known. Defaults to None.
+        """
+        self.name = name
+        self.total = total
+        self.done = 0  # chunks completed in this run
+        self.skipped = 0  # chunks completed in previous runs
+        self.failed = 0
+        self.items = 0  # entities or bindings in the chunks completed in this run
+        self.bytes = 0
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.done / self.elapsed
+
+    @property
+    def items_per_second(self) -> float:
+        return self.items / self.elapsed
+
+    def as_dict(self) -> dict:
+        return {**{name: getattr(self, name) for name in self.__slots__ if name != 'started'},
+                'elapsed': self.elapsed, 'chunks_per_second': self.chunks_per_second,
+                'items_per_second': self.items_per_second}
+
+    def __repr__(self) -> str:
+        total = '?' if self.total is None else self.total
+        return (f'{self.__class__.__name__}({self.name}: {self.skipped + self.done}/{total} chunks done '
+                f'({self.skipped} skipped), {self.failed} failed, {self.items} items, '
+                f'{self.chunks_per_second:.2f} chunks/s, {self.items_per_second:.1f} items/s)')
+
+
+class JobRunner(object):
+    """Runner of resumable bulk jobs.
+
+    The input of the job is split into chunks; the result of every chunk is written to its own file as soon
+    as it is received (atomically, via a temporary file) and the chunk is recorded in the SQLite journal.
+    When the job with the same name is run again (e.g. after a crash), completed chunks are skipped and
+    failed ones are retried. Chunks are identified by their position and fingerprint, so the input of
+    the resumed job should be the same.
+
+    Example:
+        runner = JobRunner('backfill')
+        runner.run_entities('humans', api_wrapper, ids, languages=['en'])
+        for entity_dicts in runner.iter_results('humans'):
+            ...
+    """
+    def __init__(self, directory: str, max_retries: int = 3, retry_delay: float = 1.0,
+                 progress: Optional[Callable[[JobProgress], Any]] = None, progress_interval: float = 10.0) -> None:
+        """
+        Args:
+            directory (str): directory for the journal and the results of chunks
+            max_retries (int, optional): number of retries of a failed chunk within one run. Defaults to 3.
+            retry_delay (float, optional): seconds before the first retry; it doubles with every retry.
+                                           Defaults to 1.0.
+            progress (Optional[Callable[[JobProgress], Any]], optional): called with the progress every
+                                                                          `progress_interval` seconds and at the
+                                                                          end of the run; if None, the progress
+                                                                          is logged. Defaults to None.
+            progress_interval (float, optional): seconds between progress reports. Defaults to 10.0.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.progress = progress if progress is not None else (lambda progress: logger.info('%s', progress))
+        self.progress_interval = progress_interval
+        self.connection = sqlite3.connect(os.path.join(directory, 'journal.sqlite'))
+        self.connection.execute('''CREATE TABLE IF NOT EXISTS chunks (
+                                       job TEXT NOT NULL,
+                                       chunk INTEGER NOT NULL,
+                                       fingerprint TEXT NOT NULL,
+                                       status TEXT NOT NULL,
+                                       attempts INTEGER NOT NULL,
+                                       items INTEGER,
+                                       bytes INTEGER,
+                                       path TEXT,
+                                       error TEXT,
+                                       updated REAL NOT NULL,
+                                       PRIMARY KEY (job, chunk)
+                                   ) WITHOUT ROWID''')
+        self.connection.commit()
+
+    @staticmethod
+    def fingerprint(data: Union[str, bytes]) -> str:
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        return hashlib.sha1(data).hexdigest()
+
+    def _chunk_path(self, name: str, chunk: int) -> str:
+        return os.path.join(self.directory, name, f'{chunk:08d}.json')
+
+    @staticmethod
+    def _write_atomically(path: str, data: bytes) -> None:
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _record(self, name: str, chunk: int, fingerprint: str, status: str, attempts: int,
+                items: Optional[int] = None, size: Optional[int] = None, path: Optional[str] = None,
+                error: Optional[str] = None) -> None:
+        with self.connection:
+            self.connection.execute('''INSERT INTO chunks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                                       ON CONFLICT (job, chunk) DO UPDATE SET
+                                       fingerprint = excluded.fingerprint, status = excluded.status,
+                                       attempts = attempts + excluded.attempts, items = excluded.items,
+                                       bytes = excluded.bytes, path = excluded.path, error = excluded.error,
+                                       updated = excluded.updated''',
+                                    (name, chunk, fingerprint, status, attempts, items, size, path, error,
+                                     time.time()))
+
+    def status(self, name: str) -> dict[str, int]:
+        """Numbers of chunks of the job by their status ('done' or 'failed')"""
+        rows = self.connection.execute('SELECT status, COUNT(*) FROM chunks WHERE job = ? GROUP BY status', (name,))
+        return dict(rows.fetchall())
+
+    def failed_chunks(self, name: str) -> list[tuple[int, int, str]]:
+        """Chunks of the job which failed in the last run: their positions, numbers of attempts and errors"""
+        return self.connection.execute('''SELECT chunk, attempts, error FROM chunks
+                                          WHERE job = ? AND status = ? ORDER BY chunk''', (name, FAILED)).fetchall()
+
+    def iter_results(self, name: str, decode: bool = True) -> Iterator[Union[dict, bytes]]:
+        """Reads results of completed chunks in the order of chunks
+
+        Args:
+            name (str): name of the job
+            decode (bool, optional): if True, results are decoded from JSON. Defaults to True.
+
+        Yields:
+            Union[dict, bytes]: result of every completed chunk
+        """
+        paths = self.connection.execute('SELECT path FROM chunks WHERE job = ? AND status = ? ORDER BY chunk',
+                                        (name, DONE)).fetchall()
+        for path, in paths:
+            with open(path, 'rb') as f:
+                data = f.read()
+            yield json.loads(data.decode('utf-8')) if decode else data
+
+    def reset(self, name: str) -> None:
+        """Removes the journal records and results of the job"""
+        paths = self.connection.execute('SELECT path FROM chunks WHERE job = ? AND path IS NOT NULL',
+                                        (name,)).fetchall()
+        for path, in paths:
+            if os.path.exists(path):
+                os.remove(path)
+        with self.connection:
+            self.connection.execute('DELETE FROM chunks WHERE job = ?', (name,))
+
+    async def run(self, name: str, chunks: Iterable, request: Callable[[aiohttp.ClientSession,
+                                                                          asyncio.BoundedSemaphore, Any],
+                                                                         Awaitable[tuple[bytes, Optional[int]]]],
+                  fingerprint: Callable[[Any], str], sema_value: int = 10,
+                  total: Optional[int] = None, sema: Optional[asyncio.BoundedSemaphore] = None) -> JobProgress:
+        """Runs the job: requests the chunks which are not completed yet and stores their results.
+
+        Args:
+            name (str): name of the job
+            chunks (Iterable): inputs of chunks; it is consumed lazily
+            request (Callable): coroutine function executing the chunk; it gets the session, the semaphore and the
+                                input of the chunk and returns the result to store and the number of items in it
+            fingerprint (Callable[[Any], str]): function returning the fingerprint of the input of the chunk
+            sema_value (int, optional): value of asyncio.BoundedSemaphore to limit concurrency. Defaults to 10.
+            total (Optional[int], optional): number of chunks if it is known. Defaults to None.
+            sema (Optional[asyncio.BoundedSemaphore], optional): semaphore (or AdaptiveLimiter) to limit concurrency;
+                                                                 if None, a new one is created with sema_value.
+                                                                 Defaults to None.
+
+        Raises:
+            ValueError: if the input of a completed chunk differs from the one it was completed with
+
+        Returns:
+            JobProgress: progress of the run; chunks which failed after all the retries are counted in `failed`
+        """
+        os.makedirs(os.path.join(self.directory, name), exist_ok=True)
+        completed = dict(self.connection.execute('SELECT chunk, fingerprint FROM chunks WHERE job = ? AND status = ?',
+                                                 (name, DONE)).fetchall())
+        progress = JobProgress(name, total)
+        last_report = time.perf_counter()
+        loop = asyncio.get_running_loop()
+
+        async def run_chunk(chunk: int, chunk_fingerprint: str, chunk_input: Any) -> None:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    data, items = await request(session, sema, chunk_input)
+                    break
+                except Exception as e:
+                    logger.debug('[%s] chunk %s attempt %s failed: %r', name, chunk, attempt, e)
+                    if attempt == self.max_retries:
+                        self._record(name, chunk, chunk_fingerprint, FAILED, attempt + 1, error=repr(e))
+                        progress.failed += 1
+                        return
+                    await asyncio.sleep(self.retry_delay * 2 ** attempt)
+            path = self._chunk_path(name, chunk)
+            # the file is written before the journal, so a recorded chunk always has its result
+            await loop.run_in_executor(None, self._write_atomically, path, data)
+            self._record(name, chunk, chunk_fingerprint, DONE, attempt + 1, items=items, size=len(data), path=path)
+            progress.done += 1
+            progress.items += items or 0
+            progress.bytes += len(data)
+
+        def chunk_runs() -> Iterator[Awaitable[None]]:
+            for chunk, chunk_input in enumerate(chunks):
+                chunk_fingerprint = fingerprint(chunk_input)
+                if chunk in completed:
+                    if completed[chunk] != chunk_fingerprint:
+                        raise ValueError(f'Input of chunk {chunk} of job {name} differs from the completed one')
+                    progress.skipped += 1
+                    continue
+                yield run_chunk(chunk, chunk_fingerprint, chunk_input)
+
+        async with aiohttp.ClientSession() as session:
+            if sema is None:
+                sema = asyncio.BoundedSemaphore(sema_value)
+            runs = bounded_as_completed(chunk_runs(), 2 * sema_value)
+            try:
+                async for _ in runs:
+                    if time.perf_counter() - last_report >= self.progress_interval:
+                        self.progress(progress)
+                        last_report = time.perf_counter()
+            finally:
+                await runs.aclose()
+        self.progress(progress)
+        return progress
+
+    def run_entities(self, name: str, wrapper: AsyncAPIWrapper, ids: Iterable[str], chunk_size: int = 50,
+                     format: str = 'json', **kwargs) -> JobProgress:
+        """Resumable wbgetentities calls. The result of every chunk is the dictionary of entity dictionaries
+        keyed by entity ID (see AsyncAPIWrapper.fetch_entity_dicts).
+
+        Args:
+            name (str): name of the job
+            wrapper (AsyncAPIWrapper): wrapper used to execute wbgetentities calls
+            ids (Iterable[str]): IDs of entities
+            chunk_size (int, optional): number of IDs in one call. Defaults to 50.
+            format (str, optional): format of the result (currently only json is supported). Defaults to 'json'.
+
+        Raises:
+            ValueError: if format is not json
+
+        Returns:
+            JobProgress: progress of the run
+        """
+        if format != 'json':
+            raise ValueError(f'Unsupported format {format}')
+        total = -(-len(ids) // chunk_size) if hasattr(ids, '__len__') else None
+
+        async def request(session, sema, ids_chunk):
+            entity_dicts = await wrapper.fetch_entity_dicts(session, sema, ids_chunk, format=format, **kwargs)
+            return json.dumps(entity_dicts).encode('utf-8'), len(entity_dicts)
+        return run_async(self.run, name, create_chunks(ids, chunk_size), request,
+                         lambda ids_chunk: self.fingerprint('|'.join(map(str, ids_chunk))), wrapper.sema_value,
+                         total, wrapper._create_sema())
+
+    def run_queries(self, name: str, wrapper: AsyncSPARQLWrapper, queries: Iterable[Query]) -> JobProgress:
+        """Resumable SPARQL queries (e.g. from Query.iter_split_by_values_clause). The result of every chunk is
+        the JSON result of the query.
+
+        Args:
+            name (str): name of the job
+            wrapper (AsyncSPARQLWrapper): wrapper used to execute the queries (with JSON return format)
+            queries (Iterable[Query]): queries to execute
+
+        Returns:
+            JobProgress: progress of the run
+        """
+        async def request(session, sema, query):
+            _, response_bytes = await wrapper._async_request(query, session, sema)
+            # the response is decoded to make sure that it is a valid result
+            result = json.loads(response_bytes.decode('utf-8'))
+            return response_bytes, len(result['results']['bindings'])
+        total = len(queries) if hasattr(queries, '__len__') else None
+        return run_async(self.run, name, queries, request, lambda query: self.fingerprint(query.query_string),
+                         wrapper.sema_value, total, wrapper._create_sema())
+
+    def run_calls(self, name: str, wrapper: AsyncAPIWrapper, split_by: str, chunk_size: int,
+                  **kwargs) -> JobProgress:
+        """Resumable version of AsyncAPIWrapper.execute_many. The result of every chunk is the JSON response.
+
+        Args:
+            name (str): name of the job
+            wrapper (AsyncAPIWrapper): wrapper used to execute the calls
+            split_by (str): parameter whose values are split into chunks
+            chunk_size (int): number of values in one call
+
+        Raises:
+            ValueError: if split_by is not in kwargs
+
+        Returns:
+            JobProgress: progress of the run
+        """
+        if split_by not in kwargs:
+            raise ValueError(f'Key {split_by} should be defined in the kwargs dict')
+        split_param = kwargs.pop(split_by)
+
+        async def request(session, sema, get_params):
+            response_bytes, _ = await wrapper._request(session, sema, get_params)
+            response = json.loads(response_bytes.decode('utf-8'))
+            if 'error' in response:
+                raise Exception(response['error'])
+            return response_bytes, None
+        params = (wrapper._create_request_params(**kwargs, **{split_by: split_param_chunk})
+                  for split_param_chunk in create_chunks(split_param, chunk_size))
+        total = -(-len(split_param) // chunk_size) if hasattr(split_param, '__len__') else None
+        return run_async(self.run, name, params, request,
+                         lambda get_params: self.fingerprint(json.dumps(get_params, sort_keys=True)),
+                         wrapper.sema_value, total, wrapper._create_sema())
+
+    def close(self) -> None:
+        self.connection.close()
@@ -0,0 +1,220 @@
+from __future__ import annotations
+import re
+import sqlite3
+from itertools import islice
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional, Union
+
+from asyncwikidata.chunkify import create_chunks
+
+if TYPE_CHECKING:
+    from asyncwikidata.api.async_api_wrapper import AsyncAPIWrapper
+    from asyncwikidata.api.dump_reader import DumpReader
+    from asyncwikidata.api.entity import Entity
+
+
+class LabelStore(object):
+    """Local store of labels and descriptions of entities backed by SQLite.
+
+    Rows are keyed by the namespace of the entity (Q, P, L), its integer ID and the language.
+    The store is filled in bulk from wbgetentities responses or dumps and used to attach labels to
+    SPARQL results after the fact, so that queries do not need `SERVICE wikibase:label`.
+    """
+    entity_id_pattern = re.compile(r'^([A-Z])(\d+)$')
+    # SQLite limits the number of host parameters in one statement
+    max_variables = 500
+
+    def __init__(self, path: str = ':memory:') -> None:
+        """
+        Args:
+            path (str, optional): filename of the database. Defaults to ':memory:'.
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('''CREATE TABLE IF NOT EXISTS labels (
+                                       namespace TEXT NOT NULL,
+                                       id INTEGER NOT NULL,
+                                       lang TEXT NOT NULL,
+                                       label TEXT,
+                                       description TEXT,
+                                       PRIMARY KEY (namespace, id, lang)
+                                   ) WITHOUT ROWID''')
+        self.connection.commit()
+
+    @classmethod
+    def split_id(cls, entity_id: str) -> Optional[tuple[str, int]]:
+        """Splits entity ID (e.g. Q42) into namespace and integer ID; returns None for other values"""
+        match = cls.entity_id_pattern.match(entity_id)
+        return (match.group(1), int(match.group(2))) if match else None
+
+    @classmethod
+    def _rows(cls, entity_dicts: Iterable[dict]) -> Iterator[tuple]:
+        for entity_dict in entity_dicts:
+            key = cls.split_id(entity_dict.get('id', ''))
+            if key is None:
+                continue
+            labels = entity_dict.get('labels', {})
+            descriptions = entity_dict.get('descriptions', {})
+            for lang in labels.keys() | descriptions.keys():
+                yield (*key, lang,
+                       labels[lang]['value'] if lang in labels else None,
+                       descriptions[lang]['value'] if lang in descriptions else None)
+
+    def add_entity_dicts(self, entity_dicts: Iterable[dict], batch_size: int = 10000) -> None:
+        """Stores labels and descriptions from the JSON representation of entities
+
+        Args:
+            entity_dicts (Iterable[dict]): entity dictionaries (from wbgetentities or dump)
+            batch_size (int, optional): number of rows written in one transaction. Defaults to 10000.
+        """
+        rows = self._rows(entity_dicts)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            with self.connection:
+                self.connection.executemany('''INSERT INTO labels VALUES (?, ?, ?, ?, ?)
+                                               ON CONFLICT (namespace, id, lang) DO UPDATE SET
+                                               label = COALESCE(excluded.label, label),
+                                               description = COALESCE(excluded.description, description)''',
+                                            batch)
+
+    def add_entities(self, entities: Iterable[Entity]) -> None:
+        self.add_entity_dicts(entity.entity_dict for entity in entities)
+
+    def fill_from_api(self, wrapper: AsyncAPIWrapper, ids: list[str], languages: list[str],
+                      chunk_size: int = 50) -> None:
+        """Requests labels and descriptions via wbgetentities and stores them
+
+        Args:
+            wrapper (AsyncAPIWrapper): wrapper used to execute wbgetentities calls
+            ids (list[str]): list of IDs of entities
+            languages (list[str]): languages of labels and descriptions
+            chunk_size (int, optional): Maximum number of values which can be used in a single request. Defaults to 50.
+        """
+        entity_dicts = wrapper.get_entity_dicts(ids, 'json', chunk_size=chunk_size,
+                                                props=['labels', 'descriptions'], languages=languages)
+        self.add_entity_dicts(entity_dicts.values())
+
+    def fill_from_dump(self, reader: DumpReader) -> None:
+        """Stores labels and descriptions of all the entities from the dump"""
+        self.add_entity_dicts(reader.iter_entity_dicts())
+
+    def _lookup(self, column: str, entity_ids: Iterable[str], lang: str) -> dict[str, str]:
+        keys = {}
+        for entity_id in entity_ids:
+            key = self.split_id(entity_id)
+            if key is not None:
+                keys[key] = entity_id
+        result = {}
+        for namespace in {namespace for namespace, _ in keys}:
+            numeric_ids = [numeric_id for ns, numeric_id in keys if ns == namespace]
+            for chunk in create_chunks(numeric_ids, self.max_variables):
+                cursor = self.connection.execute(
+                    f'''SELECT id, {column} FROM labels WHERE namespace = ? AND lang = ? AND {column} IS NOT NULL
+                        AND id IN ({", ".join("?" * len(chunk))})''', (namespace, lang, *chunk))
+                for numeric_id, value in cursor:
+                    result[keys[(namespace, numeric_id)]] = value
+        return result
+
+    def get_labels(self, entity_ids: Iterable[str], lang: str) -> dict[str, str]:
+        """Returns labels of the entities in the language; entities without the label are omitted"""
+        return self._lookup('label', entity_ids, lang)
+
+    def get_descriptions(self, entity_ids: Iterable[str], lang: str) -> dict[str, str]:
+        """Returns descriptions of the entities in the language; entities without the description are omitted"""
+        return self._lookup('description', entity_ids, lang)
+
+    def get_label(self, entity_id: str, lang: str) -> Optional[str]:
+        return self.get_labels([entity_id], lang).get(entity_id, None)
+
+    def get_description(self, entity_id: str, lang: str) -> Optional[str]:
+        return self.get_descriptions([entity_id], lang).get(entity_id, None)
+
+    def attach(self, results: Union[list[dict], dict[str, list[dict]]], lang: str,
+               columns: Optional[list[str]] = None, suffix: str = 'Label',
+               descriptions: bool = False) -> Union[list[dict], dict[str, list[dict]]]:
+        """Adds labels (and descriptions) to the results of WikidataJSONResultSimplifier in place.
+        For each column with entity IDs the column `<column><suffix>` is added; if the label is unknown,
+        the ID is used as wikibase:label does.
+
+        Args:
+            results (Union[list[dict], dict[str, list[dict]]]): simplified results (merged or keyed by query names)
+            lang (str): language of labels
+            columns (Optional[list[str]], optional): columns to label; if None, all columns are labelled.
+                                                     Defaults to None.
+            suffix (str, optional): suffix of the names of added columns. Defaults to 'Label'.
+            descriptions (bool, optional): if True, columns `<column>Description` are added too. Defaults to False.
+
+        Returns:
+            Union[list[dict], dict[str, list[dict]]]: results with labels
+        """
+        if isinstance(results, dict):
+            for value in results.values():
+                self.attach(value, lang, columns=columns, suffix=suffix, descriptions=descriptions)
+            return results
+
+        ids = {value for row in results for column, value in row.items() if columns is None or column in columns}
+        labels = self.get_labels(ids, lang)
+        description_values = self.get_descriptions(ids, lang) if descriptions else {}
+        for row in results:
+            for column, value in list(row.items()):
+                if (columns is not None and column not in columns) or self.split_id(value) is None:
+                    continue
+                row[f'{column}{suffix}'] = labels.get(value, value)
+                if descriptions and value in description_values:
+                    row[f'{column}Description'] = description_values[value]
+        return results
+
+    def attach_bindings(self, result: dict, lang: str, variables: Optional[list[str]] = None,
+                        suffix: str = 'Label') -> dict:
+        """Adds label bindings to the SPARQL JSON result (e.g. AsyncQueryResult.convert()) in place,
+        the same way `SERVICE wikibase:label` does.
+
+        Args:
+            result (dict): SPARQL JSON result (merged or keyed by query names)
+            lang (str): language of labels
+            variables (Optional[list[str]], optional): variables to label; if None, all variables bound to
+                                                       Wikidata entities are labelled. Defaults to None.
+            suffix (str, optional): suffix of the names of added variables. Defaults to 'Label'.
+
+        Returns:
+            dict: result with labels
+        """
+        if 'results' not in result:
+            for value in result.values():
+                self.attach_bindings(value, lang, variables=variables, suffix=suffix)
+            return result
+
+        def entity_id(binding: dict) -> Optional[str]:
+            if binding.get('type', None) != 'uri':
+                return None
+            value = binding['value'].split('/')[-1]
+            return value if self.split_id(value) is not None else None
+
+        bindings = result['results']['bindings']
+        ids = {entity_id(binding) for answer in bindings for variable, binding in answer.items()
+               if variables is None or variable in variables}
+        labels = self.get_labels(ids - {None}, lang)
+        labelled = set()
+        for answer in bindings:
+            for variable, binding in list(answer.items()):
+                if variables is not None and variable not in variables:
+                    continue
+                value = entity_id(binding)
+                if value is None:
+                    continue
+                label = {'type': 'literal', 'value': labels[value], 'xml:lang': lang} if value in labels \
+                    else {'type': 'literal', 'value': value}
+                answer[f'{variable}{suffix}'] = label
+                labelled.add(variable)
+        head_vars = result.get('head', {}).get('vars', None)
+        if head_vars is not None:
+            head_vars.extend(f'{variable}{suffix}' for variable in sorted(labelled)
+                             if f'{variable}{suffix}' not in head_vars)
+        return result
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __len__(self) -> int:
+        return self.connection.execute('SELECT COUNT(*) FROM labels').fetchone()[0]
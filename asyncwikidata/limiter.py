@@ -0,0 +1,156 @@
+from __future__ import annotations
+import asyncio
+import math
+import time
+from typing import Optional
+
+from asyncwikidata.instrumentation import Metrics
+
+
+class AdaptiveLimiter(object):
+    """Concurrency limiter with additive increase / multiplicative decrease (AIMD) of the limit.
+
+    It is used in place of asyncio.BoundedSemaphore (`async with limiter: ...`). The duration of every block
+    is taken as the latency of the request:
+
+    * after `limit` successful requests the limit is increased by `increase`;
+    * if the block raises an exception (e.g. timeout, connection error, unexpected status), `throttle` is
+      called inside it (e.g. on HTTP 429) or the latency exceeds the threshold, the limit is multiplied
+      by `decrease`, at most once per `cooldown` seconds.
+
+    The latency threshold is either fixed or `latency_tolerance` times the baseline latency (the lowest one
+    observed, slowly drifting upwards so that the baseline follows lasting changes).
+    The current limit is exposed as the `concurrency_limit` gauge of `metrics`.
+    """
+    def __init__(self, initial: int = 10, min_limit: int = 1, max_limit: int = 100, increase: int = 1,
+                 decrease: float = 0.5, latency_threshold: Optional[float] = None, latency_tolerance: float = 2.0,
+                 cooldown: float = 1.0, metrics: Optional[Metrics] = None,
+                 gauge_name: str = 'concurrency_limit') -> None:
+        """
+        Args:
+            initial (int, optional): initial limit. Defaults to 10.
+            min_limit (int, optional): lower bound of the limit. Defaults to 1.
+            max_limit (int, optional): upper bound of the limit. Defaults to 100.
+            increase (int, optional): additive increase of the limit. Defaults to 1.
+            decrease (float, optional): multiplicative decrease of the limit. Defaults to 0.5.
+            latency_threshold (Optional[float], optional): latency (seconds) above which the limit is decreased;
+                                                           if None, it is relative to the baseline latency.
+                                                           Defaults to None.
+            latency_tolerance (float, optional): ratio of the smoothed latency to the baseline above which the
+                                                 limit is decreased (if latency_threshold is None). Defaults to 2.0.
+            cooldown (float, optional): minimum number of seconds between decreases. Defaults to 1.0.
+            metrics (Optional[Metrics], optional): registry where the limit is exposed; if None, a new one is
+                                                   created. Defaults to None.
+            gauge_name (str, optional): name of the gauge with the limit. Defaults to 'concurrency_limit'.
+
+        Raises:
+            ValueError: if bounds are inconsistent
+        """
+        if not 1 <= min_limit <= initial <= max_limit:
+            raise ValueError(f'Expected 1 <= min_limit <= initial <= max_limit, '
+                             f'got {min_limit}, {initial}, {max_limit}')
+        if not 0 < decrease < 1:
+            raise ValueError(f'decrease should be in (0, 1), got {decrease}')
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_threshold = latency_threshold
+        self.latency_tolerance = latency_tolerance
+        self.cooldown = cooldown
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.gauge_name = gauge_name
+        self.in_flight = 0
+        self.latency = None  # exponentially weighted moving average
+        self.baseline = None
+        self.__limit = initial
+        self.__successes = 0
+        self.__last_decrease = 0.0
+        self.__started = {}  # task -> start of its block
+        self.__throttled = set()  # tasks which called throttle in their block
+        self.__condition = None
+        self.__loop = None
+        self.metrics.set_gauge(self.gauge_name, initial)
+
+    @property
+    def limit(self) -> int:
+        return self.__limit
+
+    def _set_limit(self, limit: int) -> None:
+        self.__limit = max(self.min_limit, min(self.max_limit, limit))
+        self.metrics.set_gauge(self.gauge_name, self.__limit)
+
+    @property
+    def _condition(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if self.__condition is None or self.__loop is not loop:
+            self.__condition = asyncio.Condition()
+            self.__loop = loop
+            self.in_flight = 0
+        return self.__condition
+
+    def locked(self) -> bool:
+        return self.in_flight >= self.__limit
+
+    async def acquire(self) -> None:
+        condition = self._condition
+        async with condition:
+            await condition.wait_for(lambda: self.in_flight < self.__limit)
+            self.in_flight += 1
+        self.__started[asyncio.current_task()] = time.perf_counter()
+
+    async def release(self) -> None:
+        condition = self._condition
+        async with condition:
+            self.in_flight -= 1
+            condition.notify(max(self.__limit - self.in_flight, 0))
+
+    def throttle(self) -> None:
+        """Marks the request of the current task as throttled (e.g. HTTP 429), so the limit is decreased"""
+        self.__throttled.add(asyncio.current_task())
+
+    def on_success(self, latency: float) -> None:
+        self.latency = latency if self.latency is None else 0.3 * latency + 0.7 * self.latency
+        self.baseline = latency if self.baseline is None else min(latency, self.baseline * 1.001)
+        if self.latency_threshold is not None:
+            too_slow = latency > self.latency_threshold
+        else:
+            too_slow = self.latency > self.latency_tolerance * self.baseline
+        if too_slow:
+            self.on_congestion()
+            return
+        self.__successes += 1
+        if self.__successes >= self.__limit:
+            self.__successes = 0
+            self._set_limit(self.__limit + self.increase)
+
+    def on_congestion(self) -> None:
+        self.__successes = 0
+        now = time.monotonic()
+        if now - self.__last_decrease < self.cooldown:
+            return
+        self.__last_decrease = now
+        self.metrics.inc('concurrency_decreases')
+        self._set_limit(math.floor(self.__limit * self.decrease))
+
+    async def __aenter__(self) -> None:
+        await self.acquire()
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        task = asyncio.current_task()
+        latency = time.perf_counter() - self.__started.pop(task)
+        throttled = task in self.__throttled
+        self.__throttled.discard(task)
+        try:
+            if exc_type is not None and issubclass(exc_type, asyncio.CancelledError):
+                pass
+            elif throttled or exc_type is not None:
+                self.on_congestion()
+            else:
+                self.on_success(latency)
+        finally:
+            await self.release()
+
+    def __repr__(self) -> str:
+        return (f'{self.__class__.__name__}(limit={self.__limit}, in_flight={self.in_flight}, '
+                f'latency={self.latency}, baseline={self.baseline})')
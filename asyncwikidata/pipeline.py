@@ -0,0 +1,142 @@
+from __future__ import annotations
+import asyncio
+import json
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Optional, Union
+
+import aiohttp
+
+from asyncwikidata import bounded_as_completed, run_async
+from asyncwikidata.api.entity import Entity
+
+if TYPE_CHECKING:
+    from asyncwikidata.api.async_api_wrapper import AsyncAPIWrapper
+    from asyncwikidata.sparql.async_sparqlwrapper import AsyncSPARQLWrapper
+    from asyncwikidata.sparql.query import Query
+
+_finished = object()
+
+
+async def sparql_to_entities(sparql_wrapper: AsyncSPARQLWrapper, queries: Union[Query, list[Query]],
+                             api_wrapper: AsyncAPIWrapper, variable: str = 'qid', batch_size: int = 50,
+                             queue_size: int = 1000, format: str = 'json', **kwargs) -> AsyncIterator[Entity]:
+    """Pipeline which executes SPARQL queries and gets entities bound to the variable via wbgetentities.
+
+    The stages are connected with bounded queues: IDs are taken from the results of each query as soon as
+    it completes, de-duplicated and packed into batches of `batch_size` IDs which are requested while
+    the remaining queries are still running. Entities are yielded in the order of arrival.
+
+    Args:
+        sparql_wrapper (AsyncSPARQLWrapper): wrapper used to execute the queries (with JSON return format)
+        queries (Union[Query, list[Query]]): queries to execute (e.g. from Query.split_by_values_clause)
+        api_wrapper (AsyncAPIWrapper): wrapper used to execute wbgetentities calls
+        variable (str, optional): name of the variable (without ?) bound to entities. Defaults to 'qid'.
+        batch_size (int, optional): number of IDs in one wbgetentities call. Defaults to 50.
+        queue_size (int, optional): maximum number of IDs and entities waiting in each queue. Defaults to 1000.
+        format (str, optional): format of the wbgetentities result (currently only json is supported).
+                                Defaults to 'json'.
+        kwargs: parameters of wbgetentities (props, languages, ...)
+
+    Raises:
+        ValueError: if format is not json
+
+    Yields:
+        Entity: entities bound to the variable in the results of the queries
+    """
+    if format != 'json':
+        raise ValueError(f'Unsupported format {format}')
+    if not isinstance(queries, list):
+        queries = [queries]
+    repr_lang = kwargs['languages'][0] if 'languages' in kwargs else None
+
+    ids_queue = asyncio.Queue(maxsize=queue_size)
+    entities_queue = asyncio.Queue(maxsize=queue_size)
+
+    async with aiohttp.ClientSession() as session:
+        sparql_sema = sparql_wrapper._create_sema()
+        api_sema = api_wrapper._create_sema()
+
+        async def produce_ids() -> None:
+            seen = set()
+            requests = (sparql_wrapper._async_request(query, session, sparql_sema) for query in queries)
+            try:
+                async for _, response_bytes in bounded_as_completed(requests, 2 * sparql_wrapper.sema_value):
+                    result = json.loads(response_bytes.decode("utf-8"))
+                    for answer in result['results']['bindings']:
+                        if variable not in answer:
+                            continue
+                        entity_id = answer[variable]['value'].split('/')[-1]
+                        if entity_id not in seen:
+                            seen.add(entity_id)
+                            await ids_queue.put(entity_id)
+            finally:
+                await ids_queue.put(_finished)
+
+        async def fetch(batch: list[str]) -> None:
+            entity_dicts = await api_wrapper.fetch_entity_dicts(session, api_sema, batch, format=format, **kwargs)
+            for entity_dict in entity_dicts.values():
+                if 'missing' not in entity_dict:
+                    await entities_queue.put(Entity(entity_dict, repr_lang=repr_lang))
+
+        async def batches() -> AsyncIterator[Awaitable[None]]:
+            batch = []
+            while True:
+                entity_id = await ids_queue.get()
+                if entity_id is _finished:
+                    break
+                batch.append(entity_id)
+                if len(batch) >= batch_size:
+                    yield fetch(batch)
+                    batch = []
+            if batch:
+                yield fetch(batch)
+
+        async def produce_entities() -> None:
+            try:
+                # the number of batches in flight is bounded to keep memory bounded
+                async for _ in bounded_as_completed(batches(), 2 * api_wrapper.sema_value):
+                    pass
+                await entities_queue.put(_finished)
+            except BaseException as e:
+                await entities_queue.put(e)
+                raise
+
+        stages = [asyncio.create_task(produce_ids()), asyncio.create_task(produce_entities())]
+        try:
+            while True:
+                item = await entities_queue.get()
+                if item is _finished:
+                    break
+                if isinstance(item, BaseException):
+                    if stages[0].done() and stages[0].exception() is not None:
+                        raise stages[0].exception()
+                    raise item
+                yield item
+            await stages[0]
+        finally:
+            for stage in stages:
+                stage.cancel()
+
+
+def get_entities_from_sparql(sparql_wrapper: AsyncSPARQLWrapper, queries: Union[Query, list[Query]],
+                             api_wrapper: AsyncAPIWrapper, variable: str = 'qid',
+                             limit: Optional[int] = None, **kwargs) -> list[Entity]:
+    """Synchronous version of sparql_to_entities collecting the entities into the list
+
+    Args:
+        sparql_wrapper (AsyncSPARQLWrapper): wrapper used to execute the queries (with JSON return format)
+        queries (Union[Query, list[Query]]): queries to execute
+        api_wrapper (AsyncAPIWrapper): wrapper used to execute wbgetentities calls
+        variable (str, optional): name of the variable (without ?) bound to entities. Defaults to 'qid'.
+        limit (Optional[int], optional): maximum number of entities to collect. Defaults to None.
+
+    Returns:
+        list[Entity]: list of Entity objects in the order they were received
+    """
+    async def collect():
+        entities = []
+        async for entity in sparql_to_entities(sparql_wrapper, queries, api_wrapper, variable=variable, **kwargs):
+            entities.append(entity)
+            if limit is not None and len(entities) >= limit:
+                break
+        return entities
+    return run_async(collect)
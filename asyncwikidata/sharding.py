@@ -0,0 +1,285 @@
+from __future__ import annotations
+import asyncio
+import multiprocessing as mp
+import queue
+import time
+import traceback
+from typing import TYPE_CHECKING, Any, Iterator, Optional, Sequence, Union
+
+import aiohttp
+
+from asyncwikidata import bounded_as_completed
+from asyncwikidata.api.entity import Entity
+from asyncwikidata.api.statements import StatementTable
+from asyncwikidata.chunkify import create_chunks
+
+if TYPE_CHECKING:
+    from asyncwikidata.api.async_api_wrapper import AsyncAPIWrapper
+    from asyncwikidata.sparql.async_sparqlwrapper import AsyncSPARQLWrapper
+
+
+class SharedRateLimiter(object):
+    """Rate limit shared by processes: requests of all the processes are spaced by 1/rate seconds
+    (with the burst of `burst` requests). The state is kept in shared memory, so the limiter should be
+    passed to processes when they are created.
+    """
+    def __init__(self, rate: float, burst: int = 1, context: Optional[Any] = None) -> None:
+        """
+        Args:
+            rate (float): maximum number of requests per second of all the processes
+            burst (int, optional): number of requests which can be sent at once after idle time. Defaults to 1.
+            context (Optional[Any], optional): multiprocessing context. Defaults to None.
+        """
+        context = context or mp.get_context()
+        self.interval = 1 / rate
+        self.burst = burst
+        self.__next = context.Value('d', 0.0, lock=False)  # time when the next request can be sent
+        self.__lock = context.Lock()
+
+    def reserve(self) -> float:
+        """Reserves the slot for one request and returns the number of seconds to wait for it"""
+        with self.__lock:
+            now = time.time()
+            start = max(self.__next.value, now - (self.burst - 1) * self.interval)
+            self.__next.value = start + self.interval
+        return max(0.0, start - now)
+
+    async def wait(self) -> None:
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+_ERROR = 'error'
+_RESULT = 'result'
+_DONE = 'done'
+
+
+async def _run_shard(wrapper: Union[AsyncAPIWrapper, AsyncSPARQLWrapper], kind: str, shard: int,
+                     values: Sequence, params: dict, results: mp.Queue,
+                     rate_limiter: Optional[SharedRateLimiter]) -> None:
+    """Executes requests of one shard in the event loop of the worker and puts converted results of chunks
+    to the queue as (shard, chunk, kind, result)"""
+    loop = asyncio.get_running_loop()
+    params = dict(params)
+    chunk_size = params.pop('chunk_size')
+    if kind == 'query':
+        from asyncwikidata.sparql.query import Query
+        query_string = params.pop('query_string')
+        chunkify_by = params.pop('chunkify_by')
+        inputs = Query.iter_split_by_values_clause(query_string, chunkify_by=chunkify_by, chunksize=chunk_size,
+                                                   **{chunkify_by: values}, **params)
+    else:
+        inputs = create_chunks(values, chunk_size)
+        properties = params.pop('properties', None)
+        qualifiers = params.pop('qualifiers', True)
+        repr_lang = params['languages'][0] if 'languages' in params else None
+
+    def convert(result: Any) -> Any:
+        if kind == 'query':
+            return wrapper._convert_response(result)
+        if kind == 'statements':
+            return StatementTable.from_entity_dicts(result.values(), properties=properties, qualifiers=qualifiers)
+        entity_dicts = [entity_dict for entity_dict in result.values() if 'missing' not in entity_dict]
+        if kind == 'entities':
+            return [Entity(entity_dict, repr_lang=repr_lang, properties=properties) for entity_dict in entity_dicts]
+        return entity_dicts
+
+    async with aiohttp.ClientSession() as session:
+        sema = wrapper._create_sema()
+
+        async def request(chunk: int, chunk_input: Any) -> tuple[int, Any]:
+            if rate_limiter is not None:
+                await rate_limiter.wait()
+            if kind == 'query':
+                return chunk, await wrapper._async_request(chunk_input, session, sema)
+            return chunk, await wrapper.fetch_entity_dicts(session, sema, chunk_input, **params)
+
+        requests = (request(chunk, chunk_input) for chunk, chunk_input in enumerate(inputs))
+        chunk_results = bounded_as_completed(requests, 2 * wrapper.sema_value)
+        try:
+            async for chunk, result in chunk_results:
+                # conversion is the CPU-bound part which is parallelized by shards
+                converted = convert(result)
+                # the queue is bounded, so the worker waits while the parent is behind
+                await loop.run_in_executor(None, results.put, (shard, chunk, _RESULT, converted))
+        finally:
+            await chunk_results.aclose()
+
+
+def _worker(wrapper: Union[AsyncAPIWrapper, AsyncSPARQLWrapper], kind: str, shard: int, values: Sequence,
+            params: dict, results: mp.Queue, rate_limiter: Optional[SharedRateLimiter]) -> None:
+    """Entry point of the worker process"""
+    try:
+        asyncio.run(_run_shard(wrapper, kind, shard, values, params, results, rate_limiter))
+        results.put((shard, None, _DONE, None))
+    except BaseException:
+        results.put((shard, None, _ERROR, traceback.format_exc()))
+
+
+class ShardedExecutor(object):
+    """Executes requests for a large list of IDs in several processes.
+
+    The IDs are partitioned into contiguous shards, one per worker process; each worker has its own event loop,
+    aiohttp session and semaphore (so up to `processes * sema_value` requests are in flight) and does JSON
+    decoding and conversion of results (Entity objects, statement tables, simplified bindings) on its own core.
+    Converted results of chunks are streamed back to the parent process. If `rate` is set, requests of all the
+    workers share the global budget of `rate` requests per second.
+
+    The wrapper is copied to the workers, so it should be picklable (e.g. it should not use a disk cache).
+    Results are pickled to the parent process: statement tables (numpy arrays) are the cheapest to transfer,
+    while unpickling Entity objects may take as long as creating them.
+
+    Example:
+        executor = ShardedExecutor(api_wrapper, processes=4, rate=50)
+        statements = executor.get_statements(ids, languages=['en'])
+    """
+    def __init__(self, wrapper: Union[AsyncAPIWrapper, AsyncSPARQLWrapper], processes: Optional[int] = None,
+                 rate: Optional[float] = None, burst: int = 1, queue_size: Optional[int] = None,
+                 context: Optional[Any] = None) -> None:
+        """
+        Args:
+            wrapper (Union[AsyncAPIWrapper, AsyncSPARQLWrapper]): wrapper used by the workers
+            processes (Optional[int], optional): number of worker processes; if None, the number of CPUs is used.
+                                                 Defaults to None.
+            rate (Optional[float], optional): maximum number of requests per second of all the workers; None means
+                                              unlimited. Defaults to None.
+            burst (int, optional): burst of the rate limit. Defaults to 1.
+            queue_size (Optional[int], optional): maximum number of chunk results waiting to be taken by the parent;
+                                                  if None, it is 4 per process. Defaults to None.
+            context (Optional[Any], optional): multiprocessing context. Defaults to None.
+        """
+        self.wrapper = wrapper
+        self.processes = processes or mp.cpu_count()
+        self.context = context or mp.get_context()
+        self.rate_limiter = SharedRateLimiter(rate, burst, self.context) if rate else None
+        self.queue_size = queue_size or 4 * self.processes
+
+    def shards(self, values: Sequence) -> list[Sequence]:
+        """Partitions values into contiguous shards of nearly equal size"""
+        n = len(values)
+        bounds = [n * i // self.processes for i in range(self.processes + 1)]
+        return [values[start:end] for start, end in zip(bounds, bounds[1:]) if end > start]
+
+    def iter_results(self, kind: str, values: Sequence, **params) -> Iterator[tuple[int, int, Any]]:
+        """Runs workers and yields converted results of chunks in the order of arrival
+
+        Args:
+            kind (str): one of 'entities', 'entity_dicts', 'statements' (for AsyncAPIWrapper) or 'query'
+                        (for AsyncSPARQLWrapper)
+            values (Sequence): IDs to partition across workers
+
+        Raises:
+            ValueError: if kind is not supported
+            Exception: if a worker fails (with its traceback)
+
+        Yields:
+            tuple[int, int, Any]: shard, chunk within the shard and converted result of the chunk
+        """
+        if kind not in ('entities', 'entity_dicts', 'statements', 'query'):
+            raise ValueError(f'Unsupported kind {kind}')
+        results = self.context.Queue(maxsize=self.queue_size)
+        workers = [self.context.Process(target=_worker, daemon=True,
+                                        args=(self.wrapper, kind, shard, shard_values, params, results,
+                                              self.rate_limiter))
+                   for shard, shard_values in enumerate(self.shards(values))]
+        for worker in workers:
+            worker.start()
+        try:
+            running = len(workers)
+            while running:
+                try:
+                    shard, chunk, status, result = results.get(timeout=1.0)
+                except queue.Empty:
+                    dead = [shard for shard, worker in enumerate(workers)
+                            if worker.exitcode is not None and worker.exitcode != 0]
+                    if dead:
+                        raise Exception(f'Worker of shard {dead[0]} exited with code {workers[dead[0]].exitcode}')
+                    continue
+                if status == _DONE:
+                    running -= 1
+                elif status == _ERROR:
+                    raise Exception(f'Worker of shard {shard} failed:\n{result}')
+                else:
+                    yield shard, chunk, result
+        finally:
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+                worker.join()
+
+    def _collect(self, kind: str, values: Sequence, **params) -> list:
+        """Results of all chunks in the order of shards and chunks"""
+        return [result for _, _, result in sorted(self.iter_results(kind, values, **params),
+                                                  key=lambda item: item[:2])]
+
+    def iter_entities(self, ids: Sequence[str], chunk_size: int = 50, properties: Optional[list[str]] = None,
+                      format: str = 'json', **kwargs) -> Iterator[Entity]:
+        """The wbgetentities call yielding Entity objects in the order of arrival (see AsyncAPIWrapper.get_entities)
+
+        Raises:
+            ValueError: if format is not json
+        """
+        if format != 'json':
+            raise ValueError(f'Unsupported format {format}')
+        for _, _, entities in self.iter_results('entities', ids, chunk_size=chunk_size, properties=properties,
+                                                format=format, **kwargs):
+            yield from entities
+
+    def get_entities(self, ids: Sequence[str], chunk_size: int = 50, properties: Optional[list[str]] = None,
+                     format: str = 'json', **kwargs) -> list[Entity]:
+        """The wbgetentities call returning Entity objects in the order of IDs (see AsyncAPIWrapper.get_entities)
+
+        Raises:
+            ValueError: if format is not json
+        """
+        if format != 'json':
+            raise ValueError(f'Unsupported format {format}')
+        return [entity for entities in self._collect('entities', ids, chunk_size=chunk_size, properties=properties,
+                                                     format=format, **kwargs)
+                for entity in entities]
+
+    def get_entity_dicts(self, ids: Sequence[str], chunk_size: int = 50, format: str = 'json',
+                         **kwargs) -> list[dict]:
+        """The wbgetentities call returning raw entity dictionaries in the order of IDs
+
+        Raises:
+            ValueError: if format is not json
+        """
+        if format != 'json':
+            raise ValueError(f'Unsupported format {format}')
+        return [entity_dict for entity_dicts in self._collect('entity_dicts', ids, chunk_size=chunk_size,
+                                                              format=format, **kwargs)
+                for entity_dict in entity_dicts]
+
+    def get_statements(self, ids: Sequence[str], chunk_size: int = 50, properties: Optional[list[str]] = None,
+                       qualifiers: bool = True, format: str = 'json', **kwargs) -> StatementTable:
+        """The wbgetentities call returning claims as a statement table (see AsyncAPIWrapper.get_statements);
+        props is always 'claims'
+
+        Raises:
+            ValueError: if format is not json
+        """
+        if format != 'json':
+            raise ValueError(f'Unsupported format {format}')
+        kwargs['props'] = 'claims'
+        return StatementTable.concat(self._collect('statements', ids, chunk_size=chunk_size, properties=properties,
+                                                   qualifiers=qualifiers, format=format, **kwargs))
+
+    def query(self, query_string: str, chunkify_by: str, values: Sequence[str], chunksize: int = 50,
+              **call_params) -> list[dict]:
+        """Executes the query split by its VALUES clause (see Query.split_by_values_clause) returning rows
+        simplified by simplifier_cls of the wrapper (or values of bindings if it is not set) in the order of values
+
+        Args:
+            query_string (str): template for the query containing format parameters
+            chunkify_by (str): parameter of the query in the VALUES clause
+            values (Sequence[str]): values of the VALUES clause
+            chunksize (int, optional): number of values in one query. Defaults to 50.
+
+        Returns:
+            list[dict]: rows of the results
+        """
+        return [row for rows in self._collect('query', values, chunk_size=chunksize, query_string=query_string,
+                                              chunkify_by=chunkify_by, **call_params)
+                for row in rows]
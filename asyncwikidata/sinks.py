@@ -0,0 +1,206 @@
+from __future__ import annotations
+import asyncio
+import csv
+import json
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Iterable, Optional, Union
+
+from asyncwikidata import bounded_as_completed
+
+if TYPE_CHECKING:
+    from asyncwikidata.api.statements import StatementTable
+
+
+class Sink(ABC):
+    """Destination of results written incrementally, chunk by chunk.
+
+    Rows are dictionaries keyed by column names; StatementTable chunks are written with `write_table`
+    (their `qualifier_of` references are shifted so that they refer to rows of the whole output).
+    """
+    def __init__(self) -> None:
+        self.rows = 0  # number of rows written
+
+    @abstractmethod
+    def write(self, rows: list[dict]) -> None:
+        """Appends rows to the output"""
+        pass
+
+    def write_table(self, table: StatementTable) -> None:
+        """Appends rows of the statement table to the output"""
+        self.write(self._shift(table).to_rows())
+
+    def _shift(self, table: StatementTable) -> StatementTable:
+        if self.rows:
+            import numpy as np
+
+            qualifier_of = table['qualifier_of']
+            table = table.__class__({**table.columns,
+                                     'qualifier_of': np.where(qualifier_of >= 0, qualifier_of + self.rows,
+                                                              qualifier_of)})
+        return table
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> Sink:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class JSONLSink(Sink):
+    """Writes every row as a JSON object on its own line"""
+    def __init__(self, path: str, mode: str = 'w') -> None:
+        """
+        Args:
+            path (str): filename of the output
+            mode (str, optional): 'w' to overwrite the file or 'a' to append to it. Defaults to 'w'.
+        """
+        super().__init__()
+        self.path = path
+        self.file = open(path, mode, encoding='utf-8')
+
+    def write(self, rows: list[dict]) -> None:
+        self.file.writelines(json.dumps(row, ensure_ascii=False, default=str) + '\n' for row in rows)
+        self.file.flush()
+        self.rows += len(rows)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class CSVSink(Sink):
+    """Writes rows into the CSV file. Columns are taken from the first chunk unless they are given."""
+    def __init__(self, path: str, columns: Optional[list[str]] = None, **fmtparams) -> None:
+        """
+        Args:
+            path (str): filename of the output
+            columns (Optional[list[str]], optional): columns of the output; keys of rows which are not in them are
+                                                     ignored. Defaults to None.
+            fmtparams: formatting parameters of csv.writer (delimiter, ...)
+        """
+        super().__init__()
+        self.path = path
+        self.columns = columns
+        self.fmtparams = fmtparams
+        self.file = open(path, 'w', encoding='utf-8', newline='')
+        self.writer = None
+
+    def write(self, rows: list[dict]) -> None:
+        if not rows:
+            return
+        if self.writer is None:
+            if self.columns is None:
+                self.columns = list(dict.fromkeys(key for row in rows for key in row))
+            self.writer = csv.DictWriter(self.file, self.columns, extrasaction='ignore', **self.fmtparams)
+            self.writer.writeheader()
+        self.writer.writerows(rows)
+        self.file.flush()
+        self.rows += len(rows)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class ParquetSink(Sink):
+    """Writes every chunk as a row group of the Parquet file (requires pyarrow).
+
+    The schema of the file is fixed when the first chunk is written, so it does not depend on the values of
+    one chunk. Statement tables use StatementTable.arrow_schema(); if time values may not fit into date32
+    (e.g. geological ones), pass `schema=StatementTable.arrow_schema(time_as_days=True)`. For rows, columns
+    which are empty in the first chunk are strings.
+    """
+    def __init__(self, path: str, schema=None, compression: str = 'snappy') -> None:
+        """
+        Args:
+            path (str): filename of the output
+            schema (Optional[pyarrow.Schema], optional): schema of the output. Defaults to None.
+            compression (str, optional): compression codec. Defaults to 'snappy'.
+        """
+        import pyarrow.parquet
+        super().__init__()
+        self.path = path
+        self.schema = schema
+        self.compression = compression
+        self.writer = None
+
+    def write_arrow(self, table) -> None:
+        """Appends pyarrow.Table to the output"""
+        import pyarrow.parquet as pq
+        if not table.num_rows:
+            return
+        if self.writer is None:
+            if self.schema is None:
+                self.schema = table.schema
+            self.writer = pq.ParquetWriter(self.path, self.schema, compression=self.compression)
+        self.writer.write_table(table.select(self.schema.names).cast(self.schema))
+        self.rows += table.num_rows
+
+    def _rows_to_arrow(self, rows: list[dict]):
+        import pyarrow as pa
+        if self.schema is None:
+            table = pa.Table.from_pylist(rows)
+            # the type of a column without values is unknown, so it is stored as strings
+            self.schema = pa.schema([field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                                     for field in table.schema])
+            return table.cast(self.schema)
+        try:
+            return pa.Table.from_pylist(rows, schema=self.schema)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # other values of string columns (e.g. of the ones which were empty in the first chunk)
+            strings = [field.name for field in self.schema if pa.types.is_string(field.type)]
+            rows = [{**row, **{name: str(row[name]) for name in strings
+                               if row.get(name) is not None and not isinstance(row[name], str)}}
+                    for row in rows]
+            return pa.Table.from_pylist(rows, schema=self.schema)
+
+    def write(self, rows: list[dict]) -> None:
+        if rows:
+            self.write_arrow(self._rows_to_arrow(rows))
+
+    def write_table(self, table: StatementTable) -> None:
+        if self.schema is None:
+            from asyncwikidata.api.statements import StatementTable
+            self.schema = StatementTable.arrow_schema()
+        self.write_arrow(self._shift(table).to_arrow(self.schema))
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def stream_to_sink(sink: Sink, inputs: Iterable, request: Callable[[Any], Awaitable],
+                         convert: Callable[[Any], Union[list[dict], StatementTable]], window: int) -> int:
+    """Executes requests for the inputs concurrently and writes their converted results to the sink
+    in the order of completion. At most `window` requests are in flight, so only their results are kept
+    in memory; conversion and writing are done in the thread pool while the requests are running.
+
+    Args:
+        sink (Sink): destination of the results
+        inputs (Iterable): inputs of requests; it is consumed lazily
+        request (Callable[[Any], Awaitable]): coroutine function executing the request for one input
+        convert (Callable[[Any], Union[list[dict], StatementTable]]): function converting the result of the
+                                                                     request into rows or statement table
+        window (int): maximum number of requests in flight
+
+    Returns:
+        int: number of rows written
+    """
+    loop = asyncio.get_running_loop()
+    rows_before = sink.rows
+
+    def consume(result: Any) -> None:
+        converted = convert(result)
+        if isinstance(converted, list):
+            sink.write(converted)
+        else:
+            sink.write_table(converted)
+
+    results = bounded_as_completed((request(request_input) for request_input in inputs), window)
+    try:
+        async for result in results:
+            await loop.run_in_executor(None, consume, result)
+    finally:
+        await results.aclose()
+    return sink.rows - rows_before
@@ -1,4 +1,35 @@
-from asyncwikidata.sparql.async_sparqlwrapper import AsyncSPARQLWrapper
-from asyncwikidata.sparql.async_sparqlwrapper import JSON
-from asyncwikidata.sparql.query import Query
-from asyncwikidata.sparql.result_simplifiers import WikidataJSONResultSimplifier
\ No newline at end of file
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+# submodules are imported on first access (PEP 562), so that importing the package does not pull in
+# SPARQLWrapper and aiohttp until they are needed
+_EXPORTS = {
+    'AsyncSPARQLWrapper': 'asyncwikidata.sparql.async_sparqlwrapper',
+    'JSON': 'asyncwikidata.sparql.async_sparqlwrapper',
+    'EndpointPool': 'asyncwikidata.sparql.endpoint_pool',
+    'Query': 'asyncwikidata.sparql.query',
+    'QueryBatcher': 'asyncwikidata.sparql.query_batcher',
+    'WikidataJSONResultSimplifier': 'asyncwikidata.sparql.result_simplifiers',
+}
+
+__all__ = list(_EXPORTS)
+
+if TYPE_CHECKING:
+    from asyncwikidata.sparql.async_sparqlwrapper import AsyncSPARQLWrapper
+    from asyncwikidata.sparql.async_sparqlwrapper import JSON
+    from asyncwikidata.sparql.endpoint_pool import EndpointPool
+    from asyncwikidata.sparql.query import Query
+    from asyncwikidata.sparql.query_batcher import QueryBatcher
+    from asyncwikidata.sparql.result_simplifiers import WikidataJSONResultSimplifier
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
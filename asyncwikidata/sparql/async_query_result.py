@@ -1,7 +1,7 @@
 from __future__ import annotations
 import json
-from asyncwikidata.sparql.async_sparqlwrapper import JSON
-from asyncwikidata.sparql.async_sparqlwrapper import logger
+
+from SPARQLWrapper.Wrapper import JSON
 
 class AsyncQueryResult:
     """Wrapper around queries results. Merges the results obtained from concurrent tasks.
@@ -1,25 +1,43 @@
 from __future__ import annotations
 import asyncio
 import base64
-import sys
-from typing import Union, Optional, Awaitable
+import json
+import logging
+import time
+from itertools import chain
+from typing import Union, Optional, Awaitable, Iterable, Iterator
 
 import aiohttp
-from aiohttp import web
-from loguru import logger
 from SPARQLWrapper import SPARQLWrapper
 from SPARQLWrapper.SPARQLExceptions import QueryBadFormed, EndPointNotFound, EndPointInternalError, Unauthorized, URITooLong
+from SPARQLWrapper.SPARQLExceptions import SPARQLWrapperException
 from SPARQLWrapper.Wrapper import POST, POSTDIRECTLY, BASIC, DIGEST, _allowedAuth, GET, JSON
 from SPARQLWrapper.Wrapper import QueryResult
 
 from asyncwikidata.sparql.query import Query
+from asyncwikidata.sparql.endpoint_pool import EndpointPool
 from asyncwikidata.sparql.async_query_result import AsyncQueryResult
 from asyncwikidata.sparql.result_simplifiers import Simplifier
 from asyncwikidata.sparql.http_response_wrapper import HTTPResponseWrapper
-from asyncwikidata import run_async
+from asyncwikidata.sinks import Sink, stream_to_sink
+from asyncwikidata.limiter import AdaptiveLimiter
+from asyncwikidata.hedging import HedgePolicy
+from asyncwikidata import bounded_as_completed, run_async, set_selector_event_loop_policy
 
-logger.remove()
-logger.add(sys.stdout, level="INFO")
+logger = logging.getLogger(__name__)
+
+# exceptions raised by SPARQLWrapper.query for error statuses of the endpoint
+STATUS_ERRORS = {400: QueryBadFormed, 401: Unauthorized, 404: EndPointNotFound, 414: URITooLong,
+                 500: EndPointInternalError}
+
+
+def raise_for_status(status: int, response_bytes: bytes) -> None:
+    """Raises the SPARQLWrapper exception for the error status of the endpoint as SPARQLWrapper.query does:
+    EndPointInternalError for other 5xx statuses and SPARQLWrapperException for other 4xx ones"""
+    if status < 400:
+        return
+    error = STATUS_ERRORS.get(status, EndPointInternalError if status >= 500 else SPARQLWrapperException)
+    raise error(response_bytes)
 
 
 class AsyncSPARQLWrapper(SPARQLWrapper):
@@ -27,7 +45,10 @@ class AsyncSPARQLWrapper(SPARQLWrapper):
     def __init__(self, endpoint: str, merge_results: bool,
                  simplifier_cls: Optional[Simplifier] = None,
                  sema_value: int = 10, cache_results: bool = True,
-                 delay_after_request: int = 0, **kwargs) -> None:
+                 delay_after_request: int = 0,
+                 endpoints: Optional[Union[list[str], EndpointPool]] = None,
+                 limiter: Optional[AdaptiveLimiter] = None, hedge: Optional[HedgePolicy] = None,
+                 **kwargs) -> None:
         """
         Args:
             endpoint (str): url to SPARQL endpoint
@@ -36,6 +57,13 @@ class AsyncSPARQLWrapper(SPARQLWrapper):
             sema_value (int, optional): initial value of asyncio.BoundedSemaphore to limit concurrency. Defaults to 10.
             cache_results (bool, optional): if True then query results will be cached . Defaults to True.
             delay_after_request (int, optional): seconds to sleep after each request . Defaults to 0.
+            endpoints (Optional[Union[list[str], EndpointPool]], optional): equivalent endpoints which the concurrent
+                queries are distributed across (with failover); single queries are still sent to `endpoint`.
+                Defaults to None.
+            limiter (Optional[AdaptiveLimiter], optional): adaptive limiter used instead of the fixed semaphore;
+                sema_value is set to its max_limit and its limit is exposed in `limiter.metrics`. Defaults to None.
+            hedge (Optional[HedgePolicy], optional): policy of hedged requests: a slow query is duplicated (to
+                another endpoint of the pool if there is one) and the first response is used. Defaults to None.
 
         """
         super().__init__(endpoint, **kwargs)
@@ -45,15 +73,22 @@ class AsyncSPARQLWrapper(SPARQLWrapper):
         self.cache_results = cache_results
         self.delay_after_request = delay_after_request
         self.use_sync_wrapper = True
+        self.endpoint_pool = EndpointPool(endpoints) if isinstance(endpoints, list) else endpoints
+        self.limiter = limiter
+        if limiter is not None:
+            self.sema_value = limiter.max_limit
+        self.hedge = hedge
         self.__cache = {}
+        self.__queries_consumed = False
 
 
-    def _create_request_params(self, qstr: str) -> tuple[str, bytes, dict]:
+    def _create_request_params(self, qstr: str, endpoint: Optional[str] = None) -> tuple[str, bytes, dict]:
         """Build URI, data and headers for the request. Based on parents' `_createRequest` method but
         instead of `urllib2.Request` object returns the tuple containing all the parameters for the request
 
         Args:
             qstr (str): string containing valid SPARQL query
+            endpoint (Optional[str], optional): url of the endpoint; if None, `endpoint` is used. Defaults to None.
 
         Raises:
             NotImplementedError: if it is the update query
@@ -68,7 +103,7 @@ class AsyncSPARQLWrapper(SPARQLWrapper):
             raise NotImplementedError('Update is not implemented; use SPARQLWrapper instead')
         else:
             #protocol details at http://www.w3.org/TR/sparql11-protocol/#query-operation
-            uri = self.endpoint
+            uri = endpoint if endpoint else self.endpoint
 
             if self.method == POST:
                 if self.requestMethod == POSTDIRECTLY:
@@ -100,8 +135,14 @@ class AsyncSPARQLWrapper(SPARQLWrapper):
 
         return uri, data, headers
 
+    def _create_sema(self) -> Union[asyncio.BoundedSemaphore, AdaptiveLimiter]:
+        """Semaphore limiting concurrency of the requests: the limiter if it is set, otherwise
+        asyncio.BoundedSemaphore with sema_value"""
+        return self.limiter if self.limiter is not None else asyncio.BoundedSemaphore(self.sema_value)
+
     async def _async_request(self, query: Query, session: aiohttp.ClientSession, sema: asyncio.BoundedSemaphore) -> Awaitable[tuple[Query, bytes]]:
-        """Execute the request asynchronously
+        """Execute the request asynchronously. If `hedge` is set, a slow request is duplicated
+        (see asyncwikidata.hedging.HedgePolicy).
 
         Args:
             qstr (str): string containing valid SPARQL query
@@ -115,8 +156,8 @@ class AsyncSPARQLWrapper(SPARQLWrapper):
             EndPointNotFound: if the requests return code 404
             Unauthorized: if the requests return code 401
             URITooLong: if the requests return code 414
-            EndPointInternalError: if the requests return code 500
-            web.HTTPError: if the requests some other code
+            EndPointInternalError: if the requests return code 500 (or other 5xx code)
+            SPARQLWrapperException: if the requests return some other 4xx code
 
         Returns:
             Awaitable[tuple[str, bytes]]: query object and resulting bytes of the request
@@ -124,41 +165,139 @@ class AsyncSPARQLWrapper(SPARQLWrapper):
         if self.returnFormat != JSON:
             raise NotImplementedError(f'returnFormat = {self.returnFormat} is not implemented; use SPARQLWrapper instead')
 
+        if self.hedge is None:
+            return await self._send_request(query, session, sema)
+        # endpoints are shared by the request and its hedge, so the hedge is sent to another endpoint of the pool
+        tried = [] if self.hedge.other_endpoint else None
+        result, _ = await self.hedge.run(lambda: self._send_request(query, session, sema, tried),
+                                         can_hedge=lambda: not sema.locked())
+        return result
+
+    async def _send_request(self, query: Query, session: aiohttp.ClientSession, sema: asyncio.BoundedSemaphore,
+                            tried: Optional[list] = None) -> Awaitable[tuple[Query, bytes]]:
+        """Execute the request once (see _async_request); with the endpoint pool, the endpoints in `tried`
+        are not used while there are other ones"""
+        if self.endpoint_pool is not None:
+            if self.method not in [GET, POST]:
+                raise NotImplementedError(f'method = {self.method} is not implemented; use SPARQLWrapper instead')
+            return await self._pooled_request(query, session, sema, tried)
 
+        if self.method not in [GET, POST]:
+            raise NotImplementedError(f'method = {self.method} is not implemented; use SPARQLWrapper instead')
         uri, data, headers = self._create_request_params(query.query_string)
-        try:
-            if self.method in [GET, POST]:
-                async with sema, session.request(method=self.method, url=uri,
-                                                 data=data, headers=headers) as resp:
-                    if self.delay_after_request:
-                        await asyncio.sleep(self.delay_after_request)
-                    return (query, await resp.read())
-            else:
-                raise NotImplementedError(f'method = {self.method} is not implemented; use SPARQLWrapper instead')
+        async with sema, session.request(method=self.method, url=uri, data=data, headers=headers) as resp:
+            if (resp.status == 429 or resp.status >= 500) and isinstance(sema, AdaptiveLimiter):
+                sema.throttle()
+            response_bytes = await resp.read()
+            raise_for_status(resp.status, response_bytes)
+            if self.delay_after_request:
+                await asyncio.sleep(self.delay_after_request)
+            return (query, response_bytes)
+
+    async def _pooled_request(self, query: Query, session: aiohttp.ClientSession, sema: asyncio.BoundedSemaphore,
+                              tried: Optional[list] = None) -> Awaitable[tuple[Query, bytes]]:
+        """Execute the request on one of the endpoints of the pool failing over to other endpoints
+        if the chosen one returns 429/5xx status, times out or is unreachable. Other 4xx statuses are errors
+        of the request rather than of the endpoint, so they are raised at once (see raise_for_status).
+        Endpoints used by the request are appended to `tried` (it may be shared with the hedge of the request).
 
-        except web.HTTPError as e:
-            if e.code == 400:
-                raise QueryBadFormed(e.read())
-            elif e.code == 404:
-                raise EndPointNotFound(e.read())
-            elif e.code == 401:
-                raise Unauthorized(e.read())
-            elif e.code == 414:
-                raise URITooLong(e.read())
-            elif e.code == 500:
-                raise EndPointInternalError(e.read())
-            else:
-                raise e
+        Raises:
+            QueryBadFormed, EndPointNotFound, Unauthorized, URITooLong, SPARQLWrapperException: if the endpoint
+                returned 4xx status (except 429)
+            EndPointInternalError: if all the endpoints returned an error status
+            aiohttp.ClientError: if all the endpoints were unreachable (the last error is raised)
+            asyncio.TimeoutError: if the requests to all the endpoints timed out (the last error is raised)
+
+        Returns:
+            Awaitable[tuple[Query, bytes]]: query object and resulting bytes of the request
+        """
+        pool = self.endpoint_pool
+        timeout = aiohttp.ClientTimeout(total=pool.request_timeout) if pool.request_timeout else None
+        tried = [] if tried is None else tried
+        last_error = None
+        while True:
+            async with sema:
+                # the endpoint is chosen when the request can be sent, so the choice uses up-to-date state
+                endpoint = pool.choose(exclude=tried)
+                if endpoint is None:
+                    if last_error is not None:
+                        raise last_error
+                    # all the endpoints are used by the hedges of the request
+                    endpoint = pool.choose()
+                tried.append(endpoint)
+                uri, data, headers = self._create_request_params(query.query_string, endpoint.url)
+                endpoint.in_flight += 1
+                try:
+                    async with endpoint.sema:
+                        start = time.perf_counter()
+                        async with session.request(method=self.method, url=uri, data=data,
+                                                   headers=headers, timeout=timeout) as resp:
+                            status = resp.status
+                            response_bytes = await resp.read()
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    pool.report_failure(endpoint, time.perf_counter() - start)
+                    if isinstance(sema, AdaptiveLimiter):
+                        sema.throttle()
+                    logger.debug('[%s] %r', endpoint.url, e)
+                    last_error = e
+                    continue
+                finally:
+                    endpoint.in_flight -= 1
+                if (status == 429 or status >= 500) and isinstance(sema, AdaptiveLimiter):
+                    sema.throttle()
+            latency = time.perf_counter() - start
+            if status == 429 or status >= 500:
+                pool.report_failure(endpoint, latency)
+                logger.debug('[%s] status %s', endpoint.url, status)
+                last_error = EndPointInternalError(response_bytes)
+                continue
+            raise_for_status(status, response_bytes)
+            pool.report_success(endpoint, latency)
+            if self.delay_after_request:
+                await asyncio.sleep(self.delay_after_request)
+            return (query, response_bytes)
+
+    def check_endpoints(self) -> dict[str, bool]:
+        """Sends the health check query to every endpoint of the pool
+
+        Raises:
+            ValueError: if endpoints are not set
+
+        Returns:
+            dict[str, bool]: health of endpoints keyed by their urls
+        """
+        if self.endpoint_pool is None:
+            raise ValueError('Endpoints are not set')
+
+        async def check():
+            async with aiohttp.ClientSession() as session:
+                return await self.endpoint_pool.check_health(session, {'User-Agent': self.agent})
+        return run_async(check)
+
+    def _take_queries(self) -> Iterable[Query]:
+        """Queries to execute (see setQuery)
+
+        Raises:
+            ValueError: if the queries are an iterator which has already been executed
+        """
+        if isinstance(self.queries, Iterator):
+            if self.__queries_consumed:
+                raise ValueError('The query iterator has already been executed; set the queries again')
+            self.__queries_consumed = True
+        return self.queries
 
-    def setQuery(self, query: Union[str, Query, list[Query]]) -> None:
+    def setQuery(self, query: Union[str, Query, list[Query], Iterator[Query]]) -> None:
         """Set the query.
 
         Args:
-            query (Union[str, Query]): query (queries) to execute
+            query (Union[str, Query, list[Query], Iterator[Query]]): query (queries) to execute; an iterator
+                (e.g. Query.iter_split_by_values_clause) is consumed lazily while the queries are executed,
+                so it can be executed only once; set it again to repeat the queries
 
         Raises:
             NotImplementedError: if query is not string or Query
         """
+        self.__queries_consumed = False
 
         if isinstance(query, str):
             logger.debug('[setQuery] setting string...')
@@ -179,6 +318,15 @@ class AsyncSPARQLWrapper(SPARQLWrapper):
                 self.queries = query
                 self.queryType = self._parseQueryType(self.queries[0].query_string)
                 self.use_sync_wrapper = False
+        elif isinstance(query, Iterator):
+            logger.debug('[setQuery] setting iterator of Query objects...')
+            first_query = next(query, None)
+            if not isinstance(first_query, Query):
+                raise ValueError('Cannot set empty query iterator.' if first_query is None
+                                 else f'Unsupported query type {type(first_query)}')
+            self.queries = chain([first_query], query)
+            self.queryType = self._parseQueryType(first_query.query_string)
+            self.use_sync_wrapper = False
         else:
             raise NotImplementedError(f'Unsupported query type {type(query)}')
 
@@ -202,15 +350,22 @@ class AsyncSPARQLWrapper(SPARQLWrapper):
         Returns:
             Awaitable: tasks to run concurrently.
         """
-        tasks = []
         async with aiohttp.ClientSession() as session:
-            sema = asyncio.BoundedSemaphore(self.sema_value)
-            for query in self.queries:
+            sema = self._create_sema()
+
+            async def request(index: int, query: Query) -> tuple[int, tuple]:
                 if self.cache_results and query in self.__cache:
-                    tasks.append(asyncio.create_task(self._get_from_cache(query)))
-                else:
-                    tasks.append(asyncio.create_task(self._async_request(query, session, sema)))
-            return await asyncio.gather(*tasks)
+                    return index, await self._get_from_cache(query)
+                return index, await self._async_request(query, session, sema)
+
+            # queries are taken from self.queries only when there is room for them, so if it is an iterator
+            # only a window of queries exists at a time
+            responses = {}
+            async for index, response in bounded_as_completed(
+                    (request(index, query) for index, query in enumerate(self._take_queries())),
+                    2 * self.sema_value):
+                responses[index] = response
+            return [responses[index] for index in range(len(responses))]
 
     def query(self) -> Union[Simplifier, AsyncQueryResult, QueryResult]:
         """Execute the query.
@@ -232,7 +387,7 @@ class AsyncSPARQLWrapper(SPARQLWrapper):
                     query_result.response = HTTPResponseWrapper(query_result.response)
                     self.__cache[self.queryString] = query_result
         else:
-            asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+            set_selector_event_loop_policy()
             logger.debug('Asynchronous SPARQL Wrapper is used')
             responses = run_async(self.gather_tasks)
             if self.cache_results:
@@ -245,6 +400,40 @@ class AsyncSPARQLWrapper(SPARQLWrapper):
 
         return self.simplifier_cls(query_result) if self.simplifier_cls else query_result
 
+    def query_to_sink(self, sink: Sink) -> int:
+        """Execute the query (queries) writing the results to the sink as soon as every query completes,
+        so only results of the queries in flight are kept in memory. Results are written in the order of
+        completion and are not cached.
+
+        Every binding is written as a row; if simplifier_cls is set, the result of each query is simplified
+        by it, otherwise rows contain values of the bindings.
+
+        Args:
+            sink (Sink): destination of the results (see asyncwikidata.sinks)
+
+        Returns:
+            int: number of rows written
+        """
+        if self.returnFormat != JSON:
+            raise NotImplementedError(f'returnFormat = {self.returnFormat} is not implemented; use SPARQLWrapper instead')
+        queries = [Query.from_query_string(self.queryString)] if self.use_sync_wrapper else self._take_queries()
+
+        async def write():
+            async with aiohttp.ClientSession() as session:
+                sema = self._create_sema()
+                return await stream_to_sink(sink, queries, lambda query: self._async_request(query, session, sema),
+                                            self._convert_response, 2 * self.sema_value)
+        return run_async(write)
+
+    def _convert_response(self, response: tuple[Query, bytes]) -> list[dict]:
+        """Rows of the result of one query: simplified by simplifier_cls if it is set, otherwise
+        values of the bindings"""
+        if self.simplifier_cls:
+            query_result = AsyncQueryResult(responses=[response], format=self.returnFormat, merge_results=True)
+            return self.simplifier_cls(query_result).convert()
+        result = json.loads(response[1].decode("utf-8"))
+        return [{k: v['value'] for k, v in answer.items()} for answer in result['results']['bindings']]
+
     async def _get_from_cache(self, query) -> Awaitable[tuple]:
         '''Coroutine to get query and query result from the cache'''
         return (query, self.__cache[query])
\ No newline at end of file
@@ -0,0 +1,155 @@
+from __future__ import annotations
+import asyncio
+import time
+from typing import Iterable, Optional, Union
+
+import aiohttp
+
+
+class Endpoint(object):
+    """State of one SPARQL endpoint in the EndpointPool"""
+    def __init__(self, url: str, max_concurrency: int = 10, initial_latency: float = 1.0) -> None:
+        """
+        Args:
+            url (str): url of the endpoint
+            max_concurrency (int, optional): maximum number of concurrent requests to the endpoint. Defaults to 10.
+            initial_latency (float, optional): latency estimate (seconds) used before the first response.
+                                               Defaults to 1.0.
+        """
+        self.url = url
+        self.max_concurrency = max_concurrency
+        self.latency = initial_latency  # exponentially weighted moving average
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self.unhealthy_until = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.__sema = None
+        self.__loop = None
+
+    @property
+    def sema(self) -> asyncio.BoundedSemaphore:
+        """Semaphore limiting concurrency of the endpoint (one per event loop)"""
+        loop = asyncio.get_running_loop()
+        if self.__sema is None or self.__loop is not loop:
+            self.__sema = asyncio.BoundedSemaphore(self.max_concurrency)
+            self.__loop = loop
+        return self.__sema
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.unhealthy_until
+
+    def score(self) -> float:
+        """Expected time to get the response: the less, the better"""
+        return self.latency * (self.in_flight + 1) / self.max_concurrency
+
+    def __repr__(self) -> str:
+        return (f'{self.__class__.__name__}(url={self.url}, latency={self.latency:.3f}, in_flight={self.in_flight}, '
+                f'healthy={self.healthy}, requests={self.requests}, errors={self.errors})')
+
+
+class EndpointPool(object):
+    """Pool of equivalent SPARQL endpoints (e.g. WDQS and local mirrors).
+
+    Requests are routed to the healthy endpoint with the smallest expected latency (moving average of
+    latencies weighted by the number of requests in flight). An endpoint which fails `failure_threshold`
+    times in a row (HTTP 429/5xx, timeouts, connection errors) is skipped for `cooldown` seconds;
+    the request is retried on another endpoint.
+    """
+    def __init__(self, endpoints: Union[Iterable[str], dict[str, int]], max_concurrency: int = 10,
+                 alpha: float = 0.3, failure_threshold: int = 3, cooldown: float = 30.0,
+                 request_timeout: Optional[float] = None, health_check_query: str = 'ASK {}') -> None:
+        """
+        Args:
+            endpoints (Union[Iterable[str], dict[str, int]]): urls of endpoints or dictionary mapping urls to
+                                                              their concurrency limits
+            max_concurrency (int, optional): concurrency limit of endpoints given without it. Defaults to 10.
+            alpha (float, optional): smoothing factor of the latency moving average. Defaults to 0.3.
+            failure_threshold (int, optional): number of consecutive failures after which the endpoint is
+                                               considered unhealthy. Defaults to 3.
+            cooldown (float, optional): seconds during which the unhealthy endpoint is not used. Defaults to 30.0.
+            request_timeout (Optional[float], optional): seconds after which the request is considered failed and
+                                                         retried on another endpoint. Defaults to None.
+            health_check_query (str, optional): query used by check_health. Defaults to 'ASK {}'.
+        """
+        if not isinstance(endpoints, dict):
+            endpoints = {url: max_concurrency for url in endpoints}
+        if not endpoints:
+            raise ValueError('At least one endpoint should be given')
+        self.endpoints = [Endpoint(url, limit) for url, limit in endpoints.items()]
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.request_timeout = request_timeout
+        self.health_check_query = health_check_query
+
+    def choose(self, exclude: Iterable[Endpoint] = ()) -> Optional[Endpoint]:
+        """Chooses the endpoint for the next request
+
+        Args:
+            exclude (Iterable[Endpoint], optional): endpoints which should not be used (e.g. already failed for
+                                                    the request). Defaults to ().
+
+        Returns:
+            Optional[Endpoint]: the best healthy endpoint; if all of them are unhealthy, the one which recovers
+                                first; None if all the endpoints are excluded
+        """
+        candidates = [endpoint for endpoint in self.endpoints if endpoint not in exclude]
+        if not candidates:
+            return None
+        healthy = [endpoint for endpoint in candidates if endpoint.healthy]
+        if healthy:
+            return min(healthy, key=Endpoint.score)
+        return min(candidates, key=lambda endpoint: endpoint.unhealthy_until)
+
+    def report_success(self, endpoint: Endpoint, latency: float) -> None:
+        endpoint.requests += 1
+        endpoint.consecutive_failures = 0
+        endpoint.unhealthy_until = 0.0
+        endpoint.latency = self.alpha * latency + (1 - self.alpha) * endpoint.latency
+
+    def report_failure(self, endpoint: Endpoint, latency: Optional[float] = None) -> None:
+        endpoint.requests += 1
+        endpoint.errors += 1
+        endpoint.consecutive_failures += 1
+        if latency is not None:
+            endpoint.latency = self.alpha * latency + (1 - self.alpha) * endpoint.latency
+        if endpoint.consecutive_failures >= self.failure_threshold:
+            endpoint.unhealthy_until = time.monotonic() + self.cooldown
+
+    async def check_health(self, session: aiohttp.ClientSession, headers: Optional[dict] = None) -> dict[str, bool]:
+        """Sends the health check query to every endpoint and updates their state
+
+        Args:
+            session (aiohttp.ClientSession): aiohttp session for the requests
+            headers (Optional[dict], optional): headers of the requests. Defaults to None.
+
+        Returns:
+            dict[str, bool]: health of endpoints keyed by their urls
+        """
+        headers = {'Accept': 'application/sparql-results+json', **(headers or {})}
+        timeout = aiohttp.ClientTimeout(total=self.request_timeout) if self.request_timeout else None
+
+        async def check(endpoint: Endpoint) -> bool:
+            start = time.perf_counter()
+            try:
+                async with session.get(endpoint.url, params={'query': self.health_check_query},
+                                       headers=headers, timeout=timeout) as resp:
+                    await resp.read()
+                    ok = resp.status == 200
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                ok = False
+            if ok:
+                self.report_success(endpoint, time.perf_counter() - start)
+            else:
+                endpoint.errors += 1
+                endpoint.consecutive_failures = max(endpoint.consecutive_failures + 1, self.failure_threshold)
+                endpoint.unhealthy_until = time.monotonic() + self.cooldown
+            return ok
+
+        results = await asyncio.gather(*(check(endpoint) for endpoint in self.endpoints))
+        return {endpoint.url: ok for endpoint, ok in zip(self.endpoints, results)}
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({self.endpoints})'
@@ -1,17 +1,70 @@
 from __future__ import annotations
-from typing import Optional
+from typing import Iterator, Optional
 
 from asyncwikidata.chunkify import create_chunks
 
 
+class ValuesClause(object):
+    """Lazily formatted content of the VALUES clause: identifiers are joined only when the query string is built"""
+    __slots__ = ('values', 'prefix')
+
+    def __init__(self, values: list, prefix: str = 'wd:') -> None:
+        self.values = values
+        self.prefix = prefix
+
+    def __str__(self) -> str:
+        return ' '.join(f'{self.prefix}{str(value).strip()}' for value in self.values)
+
+    def __format__(self, format_spec: str) -> str:
+        return format(str(self), format_spec)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
 class Query(object):
-    """Class for a representation of SPARQL query along with parameters
+    """Class for a representation of SPARQL query along with parameters.
+
+    The query string is formatted on the first access and its hash is computed once, so many Query objects
+    can be created up front cheaply.
     """
+    __slots__ = ('__query_string_raw', '__name', '__call_params', '__query_string', '__hash')
+
     def __init__(self, query_string: str, name: Optional[str]=None, **call_params) -> None:
         self.__query_string_raw = query_string
-        self.__name = name if name else str(f'{self.__class__.__name__} {id(self)}')
+        self.__name = name
         self.__call_params = call_params
-        self.__query_string = self.query_string_raw.format(**self.__call_params)
+        self.__query_string = None
+        self.__hash = None
+
+    @classmethod
+    def from_query_string(cls, query_string: str, name: Optional[str] = None) -> Query:
+        """Query object for the final query string: it is sent as it is, without formatting
+        (so braces of SPARQL group patterns do not need to be escaped)"""
+        query = cls(query_string, name=name)
+        query.__query_string = query_string
+        return query
+
+    @classmethod
+    def iter_split_by_values_clause(cls, query_string: str, chunkify_by: Optional[str] = None,
+                                    chunksize: Optional[int] = None, prefix: str = 'wd:',
+                                    **call_params) -> Iterator[Query]:
+        """Lazy version of split_by_values_clause: identifiers may be given by any iterable (e.g. a generator,
+        a NumPy array or EntityIds) and Query objects are created one by one as the result is consumed.
+
+        Raises:
+            ValueError: if chunkify_by is not in call_params
+
+        Yields:
+            Query: Query objects
+        """
+        if chunkify_by not in call_params:
+            raise ValueError(f'{chunkify_by} should be in {call_params}')
+        else:
+            chunkify_values = call_params.pop(chunkify_by, None)
+
+        for chunk in create_chunks(chunkify_values, chunksize):
+            yield cls(query_string, **{chunkify_by: ValuesClause(chunk, prefix), **call_params})
 
     @classmethod
     def split_by_values_clause(cls, query_string: str, chunkify_by: Optional[str] = None,
@@ -34,14 +87,8 @@ class Query(object):
         Returns:
             list[Query]: list of Query objects
         """
-        if chunkify_by not in call_params:
-            raise ValueError(f'{chunkify_by} should be in {call_params}')
-        else:
-            chunkify_values = call_params.pop(chunkify_by, None)
-
-        chunkify_values_bins = create_chunks(chunkify_values, chunksize)
-        chunkify_values_bins = [' '.join(f'{prefix}{qid.strip()}' for qid in chunk) for chunk in chunkify_values_bins]
-        return [cls(query_string, **{chunkify_by: chunk, **call_params}) for chunk in chunkify_values_bins]
+        return list(cls.iter_split_by_values_clause(query_string, chunkify_by=chunkify_by, chunksize=chunksize,
+                                                    prefix=prefix, **call_params))
 
     def __str__(self) -> str:
         return f'{self.__class__.__name__}({self.query_string})'
@@ -52,16 +99,26 @@ class Query(object):
 
     @property
     def name(self):
+        if self.__name is None:
+            self.__name = str(f'{self.__class__.__name__} {id(self)}')
         return self.__name
 
+    @property
+    def call_params(self) -> dict:
+        return self.__call_params
+
     @property
     def query_string(self):
+        if self.__query_string is None:
+            self.__query_string = self.query_string_raw.format(**self.__call_params)
         return self.__query_string
 
     def __hash__(self):
-        return hash(self.__query_string)
+        if self.__hash is None:
+            self.__hash = hash(self.query_string)
+        return self.__hash
 
     def __eq__(self, o: object) -> bool:
         if not isinstance(o, Query):
             return False
-        return self.__query_string == o.__query_string
\ No newline at end of file
+        return self is o or (hash(self) == hash(o) and self.query_string == o.query_string)
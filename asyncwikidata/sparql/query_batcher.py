@@ -0,0 +1,193 @@
+from __future__ import annotations
+import asyncio
+import json
+import re
+from typing import TYPE_CHECKING, Optional
+
+import aiohttp
+
+from asyncwikidata import fail_futures
+from asyncwikidata.sparql.query import Query, ValuesClause
+from asyncwikidata.sparql.result_simplifiers import WikidataJSONResultSimplifier
+
+if TYPE_CHECKING:
+    from asyncwikidata.sparql.async_sparqlwrapper import AsyncSPARQLWrapper
+
+
+class QueryBatcher(object):
+    """Micro-batching of independent lookups which use the same query template with one value each.
+
+    Values submitted by concurrent callers within `batch_window` seconds (or until `max_batch_size` values
+    are queued) are put into the VALUES clause of one query; its bindings are routed back to the callers
+    by the value of the variable bound by the VALUES clause. Submissions with different values of the other
+    parameters of the template (e.g. language) are batched separately.
+
+    The batcher has to be used inside one event loop; it is closed with `close` or by `async with`.
+
+    Example:
+        q = '''SELECT ?qid ?qidLabel WHERE {{
+            VALUES ?qid {{ {qids} }}.
+            SERVICE wikibase:label {{ bd:serviceParam wikibase:language "{lang}". }}
+            }}'''
+        async with QueryBatcher(sparql_wrapper, q, key='qids') as batcher:
+            bindings = await batcher.submit(qids='Q42', lang='en')
+    """
+    def __init__(self, wrapper: AsyncSPARQLWrapper, query_string: str, key: str, variable: Optional[str] = None,
+                 max_batch_size: int = 50, batch_window: float = 0.005, prefix: str = 'wd:',
+                 simplify: bool = False, session: Optional[aiohttp.ClientSession] = None,
+                 sema: Optional[asyncio.BoundedSemaphore] = None) -> None:
+        """
+        Args:
+            wrapper (AsyncSPARQLWrapper): wrapper used to execute the queries (with JSON return format)
+            query_string (str): template of the query containing the VALUES clause
+            key (str): parameter of the template placed in the VALUES clause
+            variable (Optional[str], optional): variable (without ?) bound by the VALUES clause; if None, it is found
+                                                in the template. Defaults to None.
+            max_batch_size (int, optional): maximum number of values in one query. Defaults to 50.
+            batch_window (float, optional): seconds to wait for other values after the first one is queued.
+                                            Defaults to 0.005.
+            prefix (str, optional): prefix for each value in the VALUES clause. Defaults to 'wd:'.
+            simplify (bool, optional): if True, bindings are simplified as by WikidataJSONResultSimplifier.
+                                       Defaults to False.
+            session (Optional[aiohttp.ClientSession], optional): aiohttp session for the requests; if None, a new
+                                                                 one is created on the first query and closed by
+                                                                 `close`. Defaults to None.
+            sema (Optional[asyncio.BoundedSemaphore], optional): semaphore to limit concurrency; if None, a new one is
+                                                                 created by the wrapper.
+                                                                 Defaults to None.
+
+        Raises:
+            ValueError: if variable is not given and cannot be found in the template
+            ValueError: if max_batch_size is not positive
+        """
+        if variable is None:
+            match = re.search(r'VALUES\s+\?(\w+)\s*\{\{\s*\{' + re.escape(key) + r'\}\s*\}\}', query_string,
+                              flags=re.IGNORECASE)
+            if match is None:
+                raise ValueError(f'Cannot find the variable bound to {{{key}}}; set it explicitly')
+            variable = match.group(1)
+        if max_batch_size < 1:
+            raise ValueError(f'max_batch_size should be positive, got {max_batch_size}')
+        self.wrapper = wrapper
+        self.query_string = query_string
+        self.key = key
+        self.variable = variable
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+        self.prefix = prefix
+        self.simplify = simplify
+        self.session = session
+        self.sema = sema
+        self.__own_session = session is None
+        self.__futures = {}  # (group, value) -> future of the bindings (queued or in flight)
+        self.__queues = {}  # group -> (other parameters, values waiting for the next query)
+        self.__timer = None
+        self.__tasks = set()
+
+    @staticmethod
+    def _group(params: dict) -> tuple:
+        return tuple(sorted((name, str(value)) for name, value in params.items()))
+
+    async def submit(self, **params) -> list[dict]:
+        """Executes the template with one value of the key parameter batching it with other submissions
+
+        Args:
+            params: parameters of the template; the key parameter is a single value (e.g. 'Q42')
+
+        Raises:
+            ValueError: if the key parameter is not given
+            Exception: if the query fails (it is raised for all the submissions of the batch)
+
+        Returns:
+            list[dict]: bindings whose variable is bound to the submitted value
+        """
+        if self.key not in params:
+            raise ValueError(f'{self.key} should be in {params}')
+        value = str(params.pop(self.key)).strip()
+        group = self._group(params)
+        future = self.__futures.get((group, value))
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self.__futures[group, value] = future
+            _, values = self.__queues.setdefault(group, (params, []))
+            values.append(value)
+            if len(values) >= self.max_batch_size:
+                self._dispatch_group(group)
+            elif self.__timer is None:
+                self.__timer = asyncio.get_running_loop().call_later(self.batch_window, self.dispatch)
+        return await asyncio.shield(future)
+
+    def dispatch(self) -> None:
+        """Sends the queued values immediately without waiting for the end of the batch window"""
+        if self.__timer is not None:
+            self.__timer.cancel()
+            self.__timer = None
+        for group in list(self.__queues):
+            self._dispatch_group(group)
+
+    def _dispatch_group(self, group: tuple) -> None:
+        params, values = self.__queues.pop(group)
+        for start in range(0, len(values), self.max_batch_size):
+            task = asyncio.get_running_loop().create_task(
+                self._run_batch(group, params, values[start:start + self.max_batch_size]))
+            self.__tasks.add(task)
+            task.add_done_callback(self.__tasks.discard)
+
+    async def _run_batch(self, group: tuple, params: dict, values: list[str]) -> None:
+        """Executes the query for the batch of values and resolves futures of the submissions"""
+        # futures stay registered while the query is in flight, so the same value submitted meanwhile
+        # waits for this query instead of being requested again
+        futures = [self.__futures[group, value] for value in values]
+        try:
+            await self._resolve_batch(params, values, futures)
+        finally:
+            for value, future in zip(values, futures):
+                if self.__futures.get((group, value)) is future:
+                    del self.__futures[group, value]
+
+    async def _resolve_batch(self, params: dict, values: list[str], futures: list[asyncio.Future]) -> None:
+        """Executes the query and sets the bindings (or the error) as results of the futures"""
+        try:
+            if self.session is None:
+                self.session = aiohttp.ClientSession()
+            if self.sema is None:
+                self.sema = self.wrapper._create_sema()
+            query = Query(self.query_string, **{self.key: ValuesClause(values, self.prefix), **params})
+            _, response_bytes = await self.wrapper._async_request(query, self.session, self.sema)
+            result = json.loads(response_bytes.decode("utf-8"))
+        except BaseException as e:
+            fail_futures(futures, e)
+            if not isinstance(e, Exception):
+                raise
+            return
+
+        routed = {value: [] for value in values}
+        remove_prefix = WikidataJSONResultSimplifier.remove_prefix
+        for answer in result['results']['bindings']:
+            if self.variable not in answer:
+                continue
+            bound = answer[self.variable]
+            bound_value = remove_prefix(bound['value']) if bound['type'] == 'uri' else bound['value']
+            if bound_value not in routed:
+                continue
+            if self.simplify:
+                answer = {k: remove_prefix(v['value']) for k, v in answer.items()}
+            routed[bound_value].append(answer)
+        for value, future in zip(values, futures):
+            if not future.done():
+                future.set_result(routed[value])
+
+    async def close(self) -> None:
+        """Sends the queued values, waits for the queries in flight and closes the own session"""
+        self.dispatch()
+        if self.__tasks:
+            await asyncio.gather(*self.__tasks, return_exceptions=True)
+        if self.__own_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self) -> QueryBatcher:
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
@@ -1,10 +1,14 @@
+from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import Union
+from typing import TYPE_CHECKING, Optional, Union
 
 from SPARQLWrapper.Wrapper import QueryResult
 
 from asyncwikidata.sparql.async_query_result import AsyncQueryResult
 
+if TYPE_CHECKING:
+    from asyncwikidata.entity_ids import EntityIds
+
 class Simplifier(ABC):
     @abstractmethod
     def convert(self):
@@ -33,3 +37,23 @@ class WikidataJSONResultSimplifier(Simplifier):
 
     def convert(self):
         return self.simplifier_operator(self.query_result.convert())
+
+    def entity_ids(self, variable: str, namespace: Optional[str] = None) -> Union[EntityIds, dict[str, EntityIds]]:
+        """IDs bound to the variable parsed directly into integer arrays (see asyncwikidata.entity_ids);
+        values which are not entities of the namespace are skipped
+
+        Args:
+            variable (str): variable of the query (without ?)
+            namespace (Optional[str], optional): 'Q', 'P' or 'L'; if None, the namespace of the first ID is used.
+                                                 Defaults to None.
+
+        Returns:
+            Union[EntityIds, dict[str, EntityIds]]: IDs or, if results are not merged, IDs keyed by query names
+        """
+        from asyncwikidata.entity_ids import EntityIds
+
+        def parse(results):
+            if 'results' in results:
+                return EntityIds.from_bindings(results['results']['bindings'], variable, namespace=namespace)
+            return {key: parse(value) for key, value in results.items()}
+        return parse(self.query_result.convert())
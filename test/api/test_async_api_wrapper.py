@@ -0,0 +1,64 @@
+from aiohttp import web
+
+from asyncwikidata.api import AsyncAPIWrapper
+from test.entities import entity_dict, item_claim
+
+PARTS = {'info': ['lastrevid'], 'labels': ['labels'], 'descriptions': ['descriptions'], 'aliases': ['aliases'],
+         'claims': ['claims']}
+
+
+def projecting_app(entity_dicts: dict, log: list) -> web.Application:
+    """wbgetentities returning only the parts of entities requested by props"""
+    async def handler(request: web.Request) -> web.Response:
+        log.append(dict(request.query))
+        keys = {'type', 'id'}.union(*(PARTS.get(part, []) for part in request.query['props'].split('|')))
+        entities = {}
+        for entity_id in request.query['ids'].split('|'):
+            if entity_id in entity_dicts:
+                entities[entity_id] = {k: v for k, v in entity_dicts[entity_id].items() if k in keys}
+            else:
+                entities[entity_id] = {'id': entity_id, 'missing': ''}
+        return web.json_response({'entities': entities, 'success': 1})
+
+    app = web.Application()
+    app.router.add_get('/w/api.php', handler)
+    return app
+
+
+def items() -> dict:
+    claims = {'P31': [item_claim('P31', 5)], 'P279': [item_claim('P279', 6), item_claim('P279', 7)]}
+    return {'Q1': entity_dict('Q1', claims=claims), 'Q2': entity_dict('Q2')}
+
+
+def test_missing_entities_are_skipped(local_server):
+    log = []
+    aw = AsyncAPIWrapper(local_server(projecting_app(items(), log)).url('/w/api.php'))
+    entities = aw.get_entities(['Q1', 'Q9', 'Q2'], 'json', chunk_size=2)
+    assert [entity.id for entity in entities] == ['Q1', 'Q2']
+    # raw entity dictionaries keep the missing ones
+    assert aw.get_entity_dicts(['Q9'], 'json') == {'Q9': {'id': 'Q9', 'missing': ''}}
+
+
+def test_props_projection(local_server):
+    log = []
+    aw = AsyncAPIWrapper(local_server(projecting_app(items(), log)).url('/w/api.php'))
+    first, second = aw.get_entities(['Q1', 'Q2'], 'json', props=['labels', 'claims'], languages=['en'])
+    assert log[0]['props'] == 'labels|claims'
+    assert first.labels['en'].value == 'label-Q1' and first.descriptions == {} and first.aliases == {}
+    assert sorted(first.claims) == ['P279', 'P31']
+    assert second.repr_lang == 'en'
+
+    first, = aw.get_entities(['Q1'], 'json', props='labels')
+    assert log[1]['props'] == 'labels'
+    assert first.claims == {} and first.labels['en'].value == 'label-Q1'
+
+
+def test_properties_projection(local_server):
+    log = []
+    aw = AsyncAPIWrapper(local_server(projecting_app(items(), log)).url('/w/api.php'))
+    first, second = aw.get_entities(['Q1', 'Q2'], 'json', properties=['P279'])
+    # all the claims are downloaded, only the ones of the properties are parsed
+    assert 'claims' in log[0]['props'].split('|')
+    assert list(first.claims) == ['P279'] and len(first.claims['P279']) == 2
+    assert second.claims == {}
+    assert first.labels['en'].value == 'label-Q1'
@@ -0,0 +1,66 @@
+import bz2
+import gzip
+import json
+
+import pytest
+
+from asyncwikidata.api import DumpReader
+from test.entities import entity_dict, item_claim, quantity_claim
+
+N = 30
+
+
+def dump_entities() -> list[dict]:
+    # every third item also has population (P1082)
+    entities = []
+    for i in range(1, N + 1):
+        claims = {'P31': [item_claim('P31', 5)]}
+        if i % 3 == 0:
+            claims['P1082'] = [quantity_claim('P1082', f'+{i}000')]
+        entities.append(entity_dict(f'Q{i}', claims=claims))
+    return entities
+
+
+@pytest.fixture(params=['.json', '.json.gz', '.json.bz2'])
+def dump_path(request, tmp_path) -> str:
+    lines = ['[\n'] + [json.dumps(entity) + ',\n' for entity in dump_entities()[:-1]]
+    lines += [json.dumps(dump_entities()[-1]) + '\n', ']\n']
+    text = ''.join(lines)
+    path = tmp_path / f'dump{request.param}'
+    opener = {'.json': open, '.json.gz': gzip.open, '.json.bz2': bz2.open}[request.param]
+    with opener(path, 'wt', encoding='utf-8') as f:
+        f.write(text)
+    return str(path)
+
+
+@pytest.mark.parametrize('processes', [0, 2])
+@pytest.mark.parametrize('use_external_decompressor', [True, False])
+def test_all_entities_in_dump_order(dump_path, processes, use_external_decompressor):
+    reader = DumpReader(dump_path, processes=processes, batch_size=7,
+                        use_external_decompressor=use_external_decompressor)
+    assert [entity_dict['id'] for entity_dict in reader.iter_entity_dicts()] == [f'Q{i}' for i in range(1, N + 1)]
+
+
+@pytest.mark.parametrize('processes', [0, 2])
+def test_id_filter(dump_path, processes):
+    reader = DumpReader(dump_path, processes=processes, batch_size=4, ids=['Q2', 'Q17', 'Q999'])
+    entities = list(reader.iter_entities())
+    assert [entity.id for entity in entities] == ['Q2', 'Q17']
+    assert entities[0].labels['en'].value == 'label-Q2'
+
+
+@pytest.mark.parametrize('processes', [0, 2])
+def test_property_filter(dump_path, processes):
+    reader = DumpReader(dump_path, processes=processes, batch_size=4, properties=['P1082'])
+    entities = list(reader.iter_entities())
+    assert [entity.id for entity in entities] == [f'Q{i}' for i in range(3, N + 1, 3)]
+    # only claims of the filtered properties are parsed
+    assert all(set(entity.claims) == {'P1082'} for entity in entities)
+
+
+@pytest.mark.parametrize('processes', [0, 2])
+def test_statements(dump_path, processes):
+    reader = DumpReader(dump_path, processes=processes, batch_size=8, properties=['P1082'])
+    tables = list(reader.iter_statements())
+    assert sum(len(table) for table in tables) == N // 3
+    assert [amount for table in tables for amount in table['amount']] == [float(i * 1000) for i in range(3, N + 1, 3)]
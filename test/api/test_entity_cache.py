@@ -0,0 +1,57 @@
+from asyncwikidata.api import AsyncAPIWrapper
+from asyncwikidata.api.entity_cache import EntityCache
+from test.entities import api_app, entity_dict
+
+
+def test_lru_eviction():
+    cache = EntityCache(maxsize=2)
+    cache.put('Q1', entity_dict('Q1', lastrevid=1))
+    cache.put('Q2', entity_dict('Q2', lastrevid=2))
+    assert cache.revision('Q1') == 1  # Q1 becomes the most recently used
+    cache.put('Q3', entity_dict('Q3', lastrevid=3))
+    assert 'Q2' not in cache
+    assert cache.revision('Q1') == 1 and cache.revision('Q3') == 3
+    assert len(cache) == 2
+
+
+def test_entities_without_lastrevid_are_not_cached():
+    cache = EntityCache()
+    cache.put('Q404', {'id': 'Q404', 'missing': ''})
+    assert cache.get('Q404') is None
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_disk_tier_is_write_through(tmp_path):
+    path = str(tmp_path / 'entities')
+    cache = EntityCache(maxsize=1, path=path)
+    cache.put('Q1', entity_dict('Q1', lastrevid=1))
+    cache.put('Q2', entity_dict('Q2', lastrevid=2))
+    # Q1 is evicted from memory but promoted back from disk
+    assert cache.revision('Q1') == 1
+    assert len(cache) == 2
+    cache.close()
+
+    reopened = EntityCache(maxsize=1, path=path)
+    assert reopened.revision('Q2') == 2
+    reopened.invalidate('Q2')
+    assert 'Q2' not in reopened
+    reopened.close()
+
+
+def test_wrapper_revalidates_cached_entities_by_lastrevid(local_server):
+    entities = {'Q1': entity_dict('Q1', lastrevid=10), 'Q2': entity_dict('Q2', lastrevid=20)}
+    log = []
+    server = local_server(api_app(entities, log))
+    aw = AsyncAPIWrapper(server.url('/w/api.php'), cache=EntityCache())
+
+    aw.get_entity_dicts(['Q1', 'Q2'], 'json', props=['labels', 'claims'], redirects='no')
+    assert [params['props'] for params in log] == ['info|labels|claims']
+
+    # Q2 was edited: only it is requested again
+    entities['Q2'] = entity_dict('Q2', lastrevid=21)
+    log.clear()
+    entity_dicts = aw.get_entity_dicts(['Q1', 'Q2'], 'json', props=['labels', 'claims'], redirects='no')
+    assert [entity_dicts[entity_id]['lastrevid'] for entity_id in ['Q1', 'Q2']] == [10, 21]
+    assert [(params['props'], params['ids']) for params in log] == [('info', 'Q1|Q2'), ('info|labels|claims', 'Q2')]
+    # other parameters of the call are kept when the revisions are requested
+    assert all(params['redirects'] == 'no' for params in log)
@@ -0,0 +1,51 @@
+import asyncio
+
+from aiohttp import web
+
+from asyncwikidata.api import AsyncAPIWrapper, EntityLoader
+from test.entities import api_app, entity_dict
+
+
+def failing_once_app(entity_dicts: dict, log: list):
+    """wbgetentities returning an API error for the first request and the entities afterwards"""
+    async def handler(request):
+        log.append(dict(request.query))
+        if len(log) == 1:
+            return web.json_response({'error': {'code': 'internal_api_error', 'info': 'try again'}})
+        ids = request.query['ids'].split('|')
+        return web.json_response({'entities': {entity_id: entity_dicts[entity_id] for entity_id in ids}, 'success': 1})
+
+    app = web.Application()
+    app.router.add_get('/w/api.php', handler)
+    return app
+
+
+def test_concurrent_loads_are_batched_and_deduplicated(local_server):
+    log = []
+    server = local_server(api_app({f'Q{i}': entity_dict(f'Q{i}') for i in range(1, 4)}, log))
+    aw = AsyncAPIWrapper(server.url('/w/api.php'))
+
+    async def main():
+        async with EntityLoader(aw) as loader:
+            return await asyncio.gather(loader.load('Q1'), loader.load('Q2'), loader.load('Q1'), loader.load('Q9'))
+    first, second, again, missing = asyncio.run(main())
+    assert len(log) == 1
+    assert sorted(log[0]['ids'].split('|')) == ['Q1', 'Q2', 'Q9']
+    assert (first.id, second.id, missing) == ('Q1', 'Q2', None)
+    assert again is first
+
+
+def test_failed_batch_fails_every_caller_and_is_not_cached(local_server):
+    log = []
+    server = local_server(failing_once_app({'Q1': entity_dict('Q1'), 'Q2': entity_dict('Q2')}, log))
+    aw = AsyncAPIWrapper(server.url('/w/api.php'))
+
+    async def main():
+        async with EntityLoader(aw) as loader:
+            results = await asyncio.gather(loader.load('Q1'), loader.load('Q2'), return_exceptions=True)
+            assert 'try again' in str(results[0]) and results[1] is results[0]
+            # the failed IDs are requested again
+            return await loader.load_many(['Q1', 'Q2'])
+    entities = asyncio.run(main())
+    assert [entity.id for entity in entities] == ['Q1', 'Q2']
+    assert len(log) == 2
@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from asyncwikidata.api import AsyncAPIWrapper
+from asyncwikidata.api.paginator import paginate, paginate_many
+
+PAGES = 3
+
+
+def search_app(log: list, lagged: int = 0) -> web.Application:
+    """list=search returning PAGES pages of two results for every srsearch; the first `lagged` requests
+    get the maxlag error; srsearch=fail gets another error"""
+    async def handler(request: web.Request) -> web.Response:
+        params = dict(request.query)
+        log.append(params)
+        if len(log) <= lagged:
+            return web.json_response({'error': {'code': 'maxlag', 'info': 'Waiting for a database server', 'lag': 7}},
+                                     headers={'Retry-After': '0'})
+        if params['srsearch'] == 'fail':
+            return web.json_response({'error': {'code': 'badvalue', 'info': 'srsearch'}})
+        # pages take a while, so an error arrives before the other paginations finish
+        await asyncio.sleep(0.01)
+        if params['action'] == 'wbsearchentities':
+            offset = int(params.get('continue', 0))
+            page = {'search': [{'id': f'Q{offset + i}'} for i in range(2)]}
+            if offset + 2 < 2 * PAGES:
+                page['search-continue'] = offset + 2
+            return web.json_response(page)
+        offset = int(params.get('sroffset', 0))
+        page = {'query': {'search': [{'title': f'{params["srsearch"]}-{offset + i}'} for i in range(2)]}}
+        if offset + 2 < 2 * PAGES:
+            page['continue'] = {'sroffset': offset + 2, 'continue': '-||'}
+        return web.json_response(page)
+
+    app = web.Application()
+    app.router.add_get('/w/api.php', handler)
+    return app
+
+
+def titles(pages: list[dict]) -> list[str]:
+    return [result['title'] for page in pages for result in page['query']['search']]
+
+
+def test_continuation_is_followed(local_server):
+    log = []
+    aw = AsyncAPIWrapper(local_server(search_app(log)).url('/w/api.php'))
+    pages = aw.execute_paginated(action='query', list='search', srsearch='cat')
+    assert titles(pages) == [f'cat-{i}' for i in range(6)]
+    assert [params.get('sroffset') for params in log] == [None, '2', '4']
+    assert all(params['continue'] in ('', '-||') and params['maxlag'] == '5' and params['format'] == 'json'
+               for params in log)
+    assert len(aw.execute_paginated(max_pages=2, action='query', list='search', srsearch='cat')) == 2
+    assert len(log) == 5
+
+    pages = aw.execute_paginated(action='wbsearchentities', search='cat', srsearch='cat')
+    assert [result['id'] for page in pages for result in page['search']] == [f'Q{i}' for i in range(6)]
+    assert [params.get('continue') for params in log[5:]] == [None, '2', '4']
+
+
+def test_maxlag_errors_are_retried_after_retry_after(local_server):
+    log = []
+    aw = AsyncAPIWrapper(local_server(search_app(log, lagged=2)).url('/w/api.php'))
+
+    async def collect():
+        # maxlag_delay is not waited for, since the responses have the Retry-After header
+        return [page async for page in paginate(aw, maxlag=1, maxlag_delay=60.0,
+                                                 action='query', list='search', srsearch='cat')]
+    pages = asyncio.run(asyncio.wait_for(collect(), 5))
+    assert titles(pages) == [f'cat-{i}' for i in range(6)]
+    assert len(log) == 5 and log[0]['maxlag'] == '1'
+    assert aw.metrics.counters['maxlag_retries'] == 2
+    assert [record.retries for record in aw.requests] == [0, 1, 2, 0, 0]
+    assert aw.requests.records[0].retry_after == 0.0
+
+
+def test_maxlag_retries_are_limited(local_server):
+    log = []
+    aw = AsyncAPIWrapper(local_server(search_app(log, lagged=10)).url('/w/api.php'))
+    with pytest.raises(Exception, match='maxlag'):
+        aw.execute_paginated(maxlag_retries=2, action='query', list='search', srsearch='cat')
+    assert len(log) == 3
+
+
+def test_paginate_many(local_server):
+    log = []
+    aw = AsyncAPIWrapper(local_server(search_app(log)).url('/w/api.php'))
+
+    async def collect(searches):
+        params_list = [{'action': 'query', 'list': 'search', 'srsearch': search} for search in searches]
+        return [item async for item in paginate_many(aw, params_list)]
+    items = asyncio.run(collect(['cat', 'dog']))
+    assert titles(page for index, page in items if index == 0) == [f'cat-{i}' for i in range(6)]
+    assert titles(page for index, page in items if index == 1) == [f'dog-{i}' for i in range(6)]
+    assert asyncio.run(collect([])) == []
+
+
+def test_paginate_many_raises_the_error_of_a_pagination(local_server):
+    log = []
+    aw = AsyncAPIWrapper(local_server(search_app(log)).url('/w/api.php'))
+
+    async def collect():
+        params_list = [{'action': 'query', 'list': 'search', 'srsearch': search} for search in ('cat', 'fail')]
+        items = []
+        with pytest.raises(Exception, match='badvalue'):
+            async for item in paginate_many(aw, params_list):
+                items.append(item)
+        # the other pagination is cancelled
+        await asyncio.sleep(0.1)
+        return items
+    items = asyncio.run(collect())
+    assert all(index == 0 for index, _ in items)
+    assert len([params for params in log if params['srsearch'] == 'cat']) < PAGES
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from asyncwikidata.api import AsyncAPIWrapper
+from asyncwikidata.api.statements import StatementTable
+from test.entities import api_app, entity_dict, item_claim, quantity_claim, time_snak
+
+
+def sample_entity_dicts() -> list[dict]:
+    """Q1: instance of Q5 since 2001-02-03 (qualifier P580), population 12; Q2: instance of Q3"""
+    claims = {'P31': [item_claim('P31', 5, qualifiers={'P580': [time_snak('P580', '+2001-02-03T00:00:00Z')]})],
+              'P1082': [quantity_claim('P1082', '+12')]}
+    return [entity_dict('Q1', claims=claims), entity_dict('Q2')]
+
+
+def test_columns_of_statements_and_qualifiers():
+    table = StatementTable.from_entity_dicts(sample_entity_dicts())
+    assert len(table) == 4
+    assert table['subject'].tolist() == ['Q1', 'Q1', 'Q1', 'Q2']
+    assert table['property'].tolist() == ['P31', 'P580', 'P1082', 'P31']
+    # the qualifier refers to the row of its statement
+    assert table['qualifier_of'].tolist() == [-1, 0, -1, -1]
+    assert table['item_id'].tolist() == [5, -1, -1, 3]
+    assert table['time'][1] == np.datetime64('2001-02-03')
+    assert np.isnat(table['time'][0])
+    assert table['amount'][2] == 12.0 and np.isnan(table['amount'][0])
+    assert table['subject_id'].tolist() == [1, 1, 1, 2]
+
+
+def test_property_filter_and_no_qualifiers():
+    table = StatementTable.from_entity_dicts(sample_entity_dicts(), properties=['P31'], qualifiers=False)
+    assert table['property'].tolist() == ['P31', 'P31']
+    assert table['qualifier_of'].tolist() == [-1, -1]
+
+
+def test_concat_shifts_qualifier_references():
+    first, second = sample_entity_dicts()
+    table = StatementTable.concat([StatementTable.from_entity_dicts([second]),
+                                   StatementTable.from_entity_dicts([first])])
+    assert table['qualifier_of'].tolist() == [-1, -1, 1, -1]
+    assert len(StatementTable.concat([])) == 0
+
+
+def test_to_rows_uses_none_for_missing_values():
+    row = StatementTable.from_entity_dicts(sample_entity_dicts()[1:]).to_rows()[0]
+    assert row['value'] == 'Q3' and row['item_id'] == 3
+    assert row['time'] is None and row['amount'] is None
+
+
+def test_from_responses_raises_api_error():
+    with pytest.raises(Exception):
+        StatementTable.from_responses([b'{"error": {"code": "no-such-entity"}}'])
+
+
+def test_wrapper_requests_claims_only(local_server):
+    log = []
+    entity_dicts = {entity['id']: entity for entity in sample_entity_dicts()}
+    aw = AsyncAPIWrapper(local_server(api_app(entity_dicts, log)).url('/w/api.php'))
+    # props of the caller do not conflict with the ones of the call
+    table = aw.get_statements(['Q1', 'Q2'], 'json', props=['labels'], languages=['en'])
+    assert len(table) == 4
+    assert [params['props'] for params in log] == ['claims']
@@ -0,0 +1,91 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from asyncwikidata.api.time_parser import days_from_civil, pack_time, parse_time, parse_times, unpack_time
+
+TIMES = ['+1952-03-11T00:00:00Z', '+2001-12-31T23:59:58Z', '-0044-03-15T00:00:00Z', '+0001-01-01T00:00:00Z',
+         '-13798000000-00-00T00:00:00Z', '+1900-02-29T00:00:00Z', '+20000-06-00T00:00:00Z']
+
+
+def test_parse_time():
+    assert parse_time('+1952-03-11T10:20:30Z') == (1952, 3, 11, 10, 20, 30)
+    assert parse_time('-13798000000-00-00T00:00:00Z') == (-13798000000, 0, 0, 0, 0, 0)
+    # fields finer than the precision are dropped
+    assert parse_time('+1952-03-11T10:20:30Z', precision=10) == (1952, 3, 0, 0, 0, 0)
+    assert parse_time('+1952-03-11T00:00:00Z', precision=9) == (1952, 0, 0, 0, 0, 0)
+    assert parse_time('+1952-03-11T10:20:30Z', precision=11) == (1952, 3, 11, 0, 0, 0)
+    assert parse_time('+1952-03-11T10:20:30Z', precision=12) == (1952, 3, 11, 10, 0, 0)
+    assert parse_time('+1952-03-11T10:20:30Z', precision=13) == (1952, 3, 11, 10, 20, 0)
+    assert parse_time('+1952-03-11T10:20:30Z', precision=14) == (1952, 3, 11, 10, 20, 30)
+
+
+INVALID_TIMES = ['', '1952', '+1952-03-11 00:00:00Z', '+1952-03-11T00:00:00', '+1952-+3-11T00:00:00Z',
+                 '+1952-03-11T -1:00:00Z', '+1_952-03-11T00:00:00Z', '+-03-11T00:00:00Z', '+1952-03-١١T00:00:00Z',
+                 '+1952-03-11T00:00:00Zé']
+
+
+@pytest.mark.parametrize('time', INVALID_TIMES)
+def test_parse_time_rejects_invalid(time):
+    with pytest.raises(ValueError):
+        parse_time(time)
+
+
+def test_parse_times_agrees_on_invalid_values():
+    parsed = parse_times(INVALID_TIMES + ['+1952-03-11T00:00:00Z'])
+    assert parsed['valid'].tolist() == [False] * len(INVALID_TIMES) + [True]
+    assert parsed['year'][-1] == 1952
+    # non-ASCII strings in NumPy arrays are invalid too
+    times = np.array(['+1952-03-11T00:00:00Zé', '-0044-03-15T00:00:00Z'])
+    assert parse_times(times)['valid'].tolist() == [False, True]
+
+
+def test_packed_times_keep_chronological_order():
+    dates = [(-44, 3, 15), (1952, 0, 0), (1952, 3, 0), (1952, 3, 11), (1952, 3, 12), (2001, 1, 1)]
+    packed = [pack_time(year, month, day, 11) for year, month, day in dates]
+    assert packed == sorted(packed)
+    assert unpack_time(pack_time(-13798000000, 0, 0, 0)) == (-13798000000, 0, 0, 0)
+    assert unpack_time(packed[3]) == (1952, 3, 11, 11)
+
+
+def test_days_from_civil_matches_datetime():
+    epoch = datetime.date(1970, 1, 1).toordinal()
+    dates = [datetime.date(1, 1, 1) + datetime.timedelta(days=d) for d in range(0, 800000, 997)]
+    expected = [date.toordinal() - epoch for date in dates]
+    assert [days_from_civil(date.year, date.month, date.day) for date in dates] == expected
+    years, months, days = (np.array([getattr(date, name) for date in dates]) for name in ('year', 'month', 'day'))
+    assert days_from_civil(years, months, days).tolist() == expected
+
+
+def test_parse_times_matches_parse_time():
+    parsed = parse_times(TIMES)
+    assert parsed['valid'].all()
+    for i, time in enumerate(TIMES):
+        fields = tuple(int(parsed[name][i]) for name in ('year', 'month', 'day', 'hour', 'minute', 'second'))
+        assert fields == parse_time(time)
+    assert parsed['date'][0] == np.datetime64('1952-03-11')
+    # 44 BCE is the astronomical year -43; missing month and day are the first ones
+    assert parsed['date'][2] == np.datetime64('-0043-03-15')
+    assert parsed['date'][6] == np.datetime64('20000-06-01')
+
+
+def test_parse_times_precision_and_invalid_values():
+    parsed = parse_times(['+1952-03-11T10:20:30Z', 'garbage', '+1952-0x-11T00:00:00Z', '+1952-03-11T00:00:00Z'],
+                         precisions=[9, 11, 11, 10])
+    assert parsed['valid'].tolist() == [True, False, False, True]
+    assert np.isnat(parsed['date'][1]) and np.isnat(parsed['date'][2])
+    assert (parsed['month'][0], parsed['day'][0], parsed['hour'][0]) == (0, 0, 0)
+    assert parsed['date'][3] == np.datetime64('1952-03-01')
+    assert unpack_time(int(parsed['packed'][3])) == (1952, 3, 0, 10)
+    assert parse_times([])['date'].shape == (0,)
+
+
+def test_parse_times_precision_of_time_of_day():
+    times = ['+1952-03-11T10:20:30Z'] * 4
+    parsed = parse_times(times, precisions=[11, 12, 13, 14])
+    for i, precision in enumerate([11, 12, 13, 14]):
+        fields = tuple(int(parsed[name][i]) for name in ('year', 'month', 'day', 'hour', 'minute', 'second'))
+        assert fields == parse_time(times[i], precision=precision)
+    assert parsed['hour'].tolist() == [0, 10, 10, 10]
+    assert parsed['second'].tolist() == [0, 0, 0, 30]
@@ -0,0 +1,37 @@
+from asyncwikidata.api import AsyncAPIWrapper
+from test.entities import api_app, entity_dict, item_claim, quantity_claim
+
+
+def subclass_tree(n: int) -> dict:
+    """Q2..Qn are subclasses (P279) of Q(i // 2); every item also has P31 and P1082 claims"""
+    entities = {}
+    for i in range(1, n + 1):
+        claims = {'P31': [item_claim('P31', 16889133)], 'P1082': [quantity_claim('P1082', f'+{i}')]}
+        if i > 1:
+            claims['P279'] = [item_claim('P279', i // 2)]
+        entities[f'Q{i}'] = entity_dict(f'Q{i}', claims=claims)
+    return entities
+
+
+def test_closure_follows_properties_and_keeps_other_claims(local_server):
+    server = local_server(api_app(subclass_tree(15)))
+    aw = AsyncAPIWrapper(server.url('/w/api.php'))
+    entities = aw.get_closure(['Q12'], ['P279'], format='json')
+    assert sorted(entity.id for entity in entities) == ['Q1', 'Q12', 'Q3', 'Q6']
+    # claims of other properties are not dropped
+    assert all(set(entity.claims) >= {'P31', 'P1082'} for entity in entities)
+
+
+def test_entity_properties_filter_parsed_claims_only(local_server):
+    server = local_server(api_app(subclass_tree(15)))
+    aw = AsyncAPIWrapper(server.url('/w/api.php'))
+    entities = aw.get_closure(['Q12'], ['P279'], format='json', entity_properties=['P1082'])
+    assert sorted(entity.id for entity in entities) == ['Q1', 'Q12', 'Q3', 'Q6']
+    assert all(set(entity.claims) == {'P1082'} for entity in entities)
+
+
+def test_max_depth(local_server):
+    server = local_server(api_app(subclass_tree(15)))
+    aw = AsyncAPIWrapper(server.url('/w/api.php'))
+    entities = aw.get_closure(['Q12'], ['P279'], format='json', max_depth=1)
+    assert sorted(entity.id for entity in entities) == ['Q12', 'Q6']
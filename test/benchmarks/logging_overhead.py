@@ -0,0 +1,52 @@
+"""Overhead of library logging on the per-request code paths: building request parameters and setting queries.
+
+Every case is measured with the library logger silent (the default: records are dropped by the level check),
+with DEBUG records handled by a handler writing to memory and with logging disabled altogether.
+
+Run from the root of the repository with the package importable, e.g. PYTHONPATH=. python test/benchmarks/logging_overhead.py
+"""
+# %%
+import io
+import logging
+import timeit
+
+from asyncwikidata.api import AsyncAPIWrapper
+from asyncwikidata.sparql import AsyncSPARQLWrapper, Query
+
+NUMBER = 20000
+
+aw = AsyncAPIWrapper(base_url='https://www.wikidata.org/w/api.php')
+sw = AsyncSPARQLWrapper('https://query.wikidata.org/sparql', merge_results=True)
+ids = [f'Q{i}' for i in range(50)]
+query = Query('SELECT ?qid WHERE {{ VALUES ?qid {{ {qids} }} }}', qids='wd:Q42')
+
+cases = {
+    '_create_request_params (50 ids)': lambda: aw._create_request_params(action='wbgetentities', ids=ids,
+                                                                         format='json', languages=['en']),
+    'setQuery (Query)': lambda: sw.setQuery(query),
+}
+
+
+def measure(label: str) -> None:
+    print(label)
+    for name, case in cases.items():
+        seconds = min(timeit.repeat(case, number=NUMBER, repeat=5)) / NUMBER
+        print(f'  {name:40} {seconds * 1e6:8.2f} us')
+
+
+library_logger = logging.getLogger('asyncwikidata')
+
+measure('silent (default)')
+
+stream = io.StringIO()
+handler = logging.StreamHandler(stream)
+library_logger.addHandler(handler)
+library_logger.setLevel(logging.DEBUG)
+measure('DEBUG handled')
+library_logger.removeHandler(handler)
+library_logger.setLevel(logging.NOTSET)
+print(f'  {len(stream.getvalue()) / 1e6:.1f} MB of records written')
+
+logging.disable(logging.CRITICAL)
+measure('logging disabled')
+logging.disable(logging.NOTSET)
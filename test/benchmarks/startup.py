@@ -0,0 +1,53 @@
+"""Cold import time of the packages (each measured in a fresh interpreter) and construction time of the wrappers.
+
+Run from the root of the repository with the package importable, e.g. PYTHONPATH=. python test/benchmarks/startup.py
+"""
+# %%
+import statistics
+import subprocess
+import sys
+import timeit
+
+REPEATS = 7
+
+IMPORTS = [
+    'asyncwikidata',
+    'asyncwikidata.api',
+    'asyncwikidata.sparql',
+    'asyncwikidata.sparql.query',
+    'asyncwikidata.api.async_api_wrapper',
+    'asyncwikidata.sparql.async_sparqlwrapper',
+    'asyncwikidata.api.statements',
+]
+
+CODE = 'import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)'
+
+
+def cold_import_seconds(module: str) -> float:
+    """Median time of importing the module in a new interpreter"""
+    timings = []
+    for _ in range(REPEATS):
+        output = subprocess.run([sys.executable, '-c', CODE.format(module=module)],
+                                capture_output=True, text=True, check=True).stdout
+        timings.append(float(output.split()[-1]))
+    return statistics.median(timings)
+
+
+print('cold import, ms (median of {})'.format(REPEATS))
+for module in IMPORTS:
+    print(f'  {module:45} {cold_import_seconds(module) * 1000:8.1f}')
+
+# %%
+from asyncwikidata.api import AsyncAPIWrapper
+from asyncwikidata.sparql import AsyncSPARQLWrapper
+
+constructors = {
+    'AsyncAPIWrapper': lambda: AsyncAPIWrapper(base_url='https://www.wikidata.org/w/api.php'),
+    'AsyncSPARQLWrapper': lambda: AsyncSPARQLWrapper('https://query.wikidata.org/sparql', merge_results=True),
+}
+
+print('construction, us per instance')
+for name, constructor in constructors.items():
+    number = 200
+    seconds = min(timeit.repeat(constructor, number=number, repeat=3)) / number
+    print(f'  {name:45} {seconds * 1e6:8.1f}')
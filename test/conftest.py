@@ -0,0 +1,51 @@
+import asyncio
+import threading
+from typing import Callable
+
+import pytest
+from aiohttp import web
+
+
+class LocalServer(object):
+    """aiohttp application served on a free local port by its own event loop in a background thread,
+    so it can be requested both by synchronous wrapper methods (run_async) and by coroutines of the test"""
+    def __init__(self, app: web.Application) -> None:
+        self.app = app
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.runner = web.AppRunner(app)
+        self.port = None
+
+    async def _start(self) -> None:
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    def start(self) -> None:
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self.loop).result()
+
+    def stop(self) -> None:
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    def url(self, path: str = '/') -> str:
+        return f'http://127.0.0.1:{self.port}{path}'
+
+
+@pytest.fixture
+def local_server() -> Callable[[web.Application], LocalServer]:
+    """Starts applications on local ports; they are stopped at the end of the test"""
+    servers = []
+
+    def start(app: web.Application) -> LocalServer:
+        server = LocalServer(app)
+        server.start()
+        servers.append(server)
+        return server
+    yield start
+    for server in servers:
+        server.stop()
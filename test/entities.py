@@ -0,0 +1,62 @@
+"""Synthetic entity dictionaries in the format of wbgetentities and JSON dumps"""
+
+
+def item_claim(pid: str, numeric_id: int, qualifiers: dict = None) -> dict:
+    claim = {'mainsnak': {'snaktype': 'value', 'property': pid, 'datatype': 'wikibase-item',
+                          'datavalue': {'value': {'entity-type': 'item', 'numeric-id': numeric_id,
+                                                  'id': f'Q{numeric_id}'},
+                                        'type': 'wikibase-entityid'}},
+             'type': 'statement', 'rank': 'normal'}
+    if qualifiers:
+        claim['qualifiers'] = qualifiers
+    return claim
+
+
+def time_snak(pid: str, time: str, precision: int = 11) -> dict:
+    return {'snaktype': 'value', 'property': pid, 'datatype': 'time',
+            'datavalue': {'value': {'time': time, 'timezone': 0, 'before': 0, 'after': 0, 'precision': precision,
+                                    'calendarmodel': 'http://www.wikidata.org/entity/Q1985727'},
+                          'type': 'time'}}
+
+
+def quantity_claim(pid: str, amount: str) -> dict:
+    return {'mainsnak': {'snaktype': 'value', 'property': pid, 'datatype': 'quantity',
+                         'datavalue': {'value': {'amount': amount, 'unit': '1'}, 'type': 'quantity'}},
+            'type': 'statement', 'rank': 'normal'}
+
+
+def entity_dict(entity_id: str, lastrevid: int = 100, claims: dict = None) -> dict:
+    """Item with English label and description; by default it is an instance of (P31) the next item"""
+    numeric_id = int(entity_id[1:])
+    if claims is None:
+        claims = {'P31': [item_claim('P31', numeric_id + 1)]}
+    return {
+        'type': 'item',
+        'id': entity_id,
+        'lastrevid': lastrevid,
+        'labels': {'en': {'language': 'en', 'value': f'label-{entity_id}'}},
+        'descriptions': {'en': {'language': 'en', 'value': f'desc-{entity_id}'}},
+        'aliases': {},
+        'claims': claims,
+    }
+
+
+def api_app(entity_dicts: dict, log: list = None):
+    """aiohttp application serving wbgetentities for the given entity dictionaries keyed by ID;
+    the parameters of every request are appended to log"""
+    from aiohttp import web
+
+    async def handler(request):
+        params = dict(request.query)
+        if log is not None:
+            log.append(params)
+        if params.get('action') != 'wbgetentities':
+            return web.json_response({'error': {'code': 'badvalue', 'info': params.get('action')}})
+        entities = {}
+        for entity_id in params['ids'].split('|'):
+            entities[entity_id] = entity_dicts.get(entity_id, {'id': entity_id, 'missing': ''})
+        return web.json_response({'entities': entities, 'success': 1})
+
+    app = web.Application()
+    app.router.add_get('/w/api.php', handler)
+    return app
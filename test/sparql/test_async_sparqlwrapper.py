@@ -0,0 +1,74 @@
+import asyncio
+import re
+import subprocess
+import sys
+
+import pytest
+from aiohttp import web
+from SPARQLWrapper.SPARQLExceptions import EndPointInternalError, QueryBadFormed
+
+from asyncwikidata.sparql import AsyncSPARQLWrapper, JSON, Query
+
+
+def status_app(status: int) -> web.Application:
+    async def handler(request: web.Request) -> web.Response:
+        return web.Response(status=status, text='error')
+
+    app = web.Application()
+    app.router.add_get('/sparql', handler)
+    return app
+
+
+@pytest.mark.parametrize('status, error', [(400, QueryBadFormed), (500, EndPointInternalError)])
+def test_error_status_raises_sparqlwrapper_exception(local_server, status, error):
+    sw = AsyncSPARQLWrapper(local_server(status_app(status)).url('/sparql'), merge_results=True, cache_results=False)
+    sw.setReturnFormat(JSON)
+    # split queries are sent by aiohttp (a single query string is executed by SPARQLWrapper itself)
+    sw.setQuery(Query.split_by_values_clause('SELECT ?x WHERE {{ VALUES ?x {{ {xs} }} }}', 'xs', 1, xs=['1', '2']))
+    with pytest.raises(error):
+        sw.query()
+
+
+def counting_app(received: list) -> web.Application:
+    """SPARQL endpoint binding ?qid to the wd: identifier of the query after a short delay"""
+    async def handler(request: web.Request) -> web.Response:
+        qid = re.search(r'wd:(Q\d+)', request.query['query']).group(1)
+        received.append(qid)
+        await asyncio.sleep(0.01)
+        binding = {'qid': {'type': 'uri', 'value': f'http://www.wikidata.org/entity/{qid}'}}
+        return web.json_response({'head': {'vars': ['qid']}, 'results': {'bindings': [binding]}})
+
+    app = web.Application()
+    app.router.add_get('/sparql', handler)
+    return app
+
+
+def test_query_iterator_is_consumed_within_the_window(local_server):
+    received = []
+    ahead = []
+
+    def queries():
+        for i in range(10):
+            # queries taken from the iterator but not yet received by the endpoint
+            ahead.append(i - len(received))
+            yield Query.from_query_string(f'SELECT ?qid WHERE {{ VALUES ?qid {{ wd:Q{i} }} }}')
+
+    sw = AsyncSPARQLWrapper(local_server(counting_app(received)).url('/sparql'), merge_results=True,
+                            sema_value=1, cache_results=False)
+    sw.setReturnFormat(JSON)
+    sw.setQuery(queries())
+    result = sw.query().convert()
+    assert [binding['qid']['value'] for binding in result['results']['bindings']] == [
+        f'http://www.wikidata.org/entity/Q{i}' for i in range(10)]
+    assert max(ahead) <= 2 * sw.sema_value
+    # the iterator is executed once
+    with pytest.raises(ValueError):
+        sw.query()
+    assert len(received) == 10
+
+
+@pytest.mark.parametrize('name', ['AsyncSPARQLWrapper', 'EndpointPool', 'JSON', 'Query', 'QueryBatcher',
+                                  'WikidataJSONResultSimplifier'])
+def test_lazy_export_imports_first(name):
+    # every name is imported first in a fresh interpreter, so the import order cannot hide circular imports
+    subprocess.run([sys.executable, '-c', f'from asyncwikidata.sparql import {name}'], check=True)
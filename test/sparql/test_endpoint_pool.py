@@ -0,0 +1,141 @@
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+from SPARQLWrapper.SPARQLExceptions import QueryBadFormed
+
+from asyncwikidata.sparql import AsyncSPARQLWrapper, EndpointPool, JSON, Query
+from asyncwikidata.sparql.endpoint_pool import Endpoint
+
+
+class StandIn(object):
+    """Local SPARQL endpoint whose behaviour is switched by the test: 'ok', 'error' (HTTP 503), 'bad' (HTTP 400)
+    or 'slow'"""
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.mode = 'ok'
+        self.received = 0
+
+    async def handler(self, request: web.Request) -> web.Response:
+        self.received += 1
+        if self.mode == 'error':
+            return web.Response(status=503, text='Service Unavailable')
+        if self.mode == 'bad':
+            return web.Response(status=400, text='Parse error')
+        if self.mode == 'slow':
+            await asyncio.sleep(2)
+        bindings = [{'server': {'type': 'literal', 'value': self.name}}]
+        return web.json_response({'head': {'vars': ['server']}, 'results': {'bindings': bindings}})
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/sparql', self.handler)
+        return app
+
+
+def start_pair(local_server):
+    primary, secondary = StandIn('primary'), StandIn('secondary')
+    primary_url = local_server(primary.app()).url('/sparql')
+    secondary_url = local_server(secondary.app()).url('/sparql')
+    return primary, secondary, primary_url, secondary_url
+
+
+def run_queries(sw: AsyncSPARQLWrapper, n: int = 2) -> list[str]:
+    """Executes n queries and returns names of the servers which answered them"""
+    sw.setQuery(Query.split_by_values_clause('SELECT ?server WHERE {{ VALUES ?x {{ {xs} }} }} # {t}', 'xs', 1,
+                                             xs=[str(i) for i in range(n)], t=time.perf_counter()))
+    result = sw.query().convert()
+    return [answer['server']['value'] for answer in result['results']['bindings']]
+
+
+def create_wrapper(pool: EndpointPool) -> AsyncSPARQLWrapper:
+    sw = AsyncSPARQLWrapper(pool.endpoints[0].url, merge_results=True, cache_results=False, endpoints=pool)
+    sw.setReturnFormat(JSON)
+    return sw
+
+
+def test_failover_on_5xx_and_recovery(local_server):
+    primary, secondary, primary_url, secondary_url = start_pair(local_server)
+    # the primary is preferred while it is healthy: it allows more concurrent requests
+    pool = EndpointPool({primary_url: 10, secondary_url: 1}, failure_threshold=1, cooldown=0.5)
+    sw = create_wrapper(pool)
+    assert run_queries(sw) == ['primary', 'primary']
+
+    primary.mode = 'error'
+    primary.received = 0
+    assert run_queries(sw) == ['secondary', 'secondary']
+    assert primary.received == 2
+    assert not pool.endpoints[0].healthy
+
+    # while the primary cools down, it is not requested at all
+    primary.received = 0
+    assert run_queries(sw) == ['secondary', 'secondary']
+    assert primary.received == 0
+
+    primary.mode = 'ok'
+    time.sleep(0.6)
+    assert run_queries(sw) == ['primary', 'primary']
+    assert pool.endpoints[0].healthy
+
+
+def test_failover_on_timeout_and_recovery(local_server):
+    primary, secondary, primary_url, secondary_url = start_pair(local_server)
+    pool = EndpointPool({primary_url: 10, secondary_url: 1}, failure_threshold=1, cooldown=0.5, request_timeout=0.3)
+    sw = create_wrapper(pool)
+
+    primary.mode = 'slow'
+    assert run_queries(sw) == ['secondary', 'secondary']
+    assert primary.received == 2
+    assert pool.endpoints[0].errors == 2
+
+    primary.mode = 'ok'
+    time.sleep(0.6)
+    assert run_queries(sw) == ['primary', 'primary']
+
+
+def test_client_error_is_raised_without_failover(local_server):
+    primary, secondary, primary_url, secondary_url = start_pair(local_server)
+    pool = EndpointPool({primary_url: 10, secondary_url: 1}, failure_threshold=1, cooldown=0.5)
+    sw = create_wrapper(pool)
+    latency = pool.endpoints[0].latency
+
+    primary.mode = 'bad'
+    with pytest.raises(QueryBadFormed):
+        run_queries(sw)
+    # the malformed query is not sent to other endpoints and the endpoint is neither failed nor measured
+    assert primary.received >= 1 and secondary.received == 0
+    assert pool.endpoints[0].healthy and pool.endpoints[0].errors == 0
+    assert pool.endpoints[0].latency == latency
+
+
+def test_choose_prefers_low_expected_latency_and_skips_unhealthy():
+    pool = EndpointPool({'a': 10, 'b': 10}, failure_threshold=2, cooldown=60)
+    a, b = pool.endpoints
+    pool.report_success(a, 0.1)
+    pool.report_success(b, 2.0)
+    assert pool.choose() is a
+    assert pool.choose(exclude=[a]) is b
+    assert pool.choose(exclude=[a, b]) is None
+
+    # requests in flight increase the expected latency
+    a.in_flight = 20
+    assert pool.choose() is b
+    a.in_flight = 0
+
+    pool.report_failure(a)
+    assert a.healthy
+    pool.report_failure(a)
+    assert not a.healthy
+    assert pool.choose() is b
+    # all the endpoints are unhealthy: the one which recovers first is used
+    pool.report_failure(b)
+    pool.report_failure(b)
+    assert pool.choose() is a
+
+
+def test_endpoint_score():
+    endpoint = Endpoint('a', max_concurrency=4, initial_latency=2.0)
+    assert endpoint.score() == 0.5
+    endpoint.in_flight = 3
+    assert endpoint.score() == 2.0
@@ -0,0 +1,62 @@
+from asyncwikidata.sparql import Query
+from asyncwikidata.sparql.query import ValuesClause
+
+
+class Value(object):
+    """Value counting how many times it is formatted"""
+    def __init__(self, value: str, formatted: list) -> None:
+        self.value = value
+        self.formatted = formatted
+
+    def __str__(self) -> str:
+        self.formatted.append(self.value)
+        return self.value
+
+
+def test_values_clause():
+    clause = ValuesClause(['Q1', ' Q2 '])
+    assert len(clause) == 2
+    assert str(clause) == 'wd:Q1 wd:Q2'
+    assert f'{{ {clause} }}' == '{ wd:Q1 wd:Q2 }'
+    assert str(ValuesClause(['P31'], prefix='wdt:')) == 'wdt:P31'
+
+
+def test_query_string_is_formatted_once_on_first_access():
+    formatted = []
+    query = Query('VALUES ?x {{ {xs} }}', xs=ValuesClause([Value('Q1', formatted), Value('Q2', formatted)]))
+    assert formatted == []
+    assert query.query_string == 'VALUES ?x { wd:Q1 wd:Q2 }'
+    assert hash(query) == hash(query.query_string)
+    assert query == Query('VALUES ?x {{ {xs} }}', xs='wd:Q1 wd:Q2')
+    assert formatted == ['Q1', 'Q2']
+
+
+def test_hash_is_computed_once():
+    query = Query('SELECT ?x WHERE {{ ?x ?p {o} }}', o='wd:Q1')
+    computed = []
+
+    class String(str):
+        def __hash__(self) -> int:
+            computed.append(self)
+            return super().__hash__()
+
+    query._Query__query_string = String(query.query_string)
+    assert hash(query) == hash(query) == hash('SELECT ?x WHERE { ?x ?p wd:Q1 }')
+    assert len(computed) == 1
+    # queries are used as keys of the cache
+    assert {query: 1}[Query('SELECT ?x WHERE {{ ?x ?p {o} }}', o='wd:Q1')] == 1
+
+
+def test_split_queries_are_created_lazily():
+    taken = []
+
+    def qids():
+        for i in range(1, 6):
+            taken.append(i)
+            yield f'Q{i}'
+
+    queries = Query.iter_split_by_values_clause('VALUES ?x {{ {xs} }}', 'xs', 2, xs=qids())
+    assert taken == []
+    assert next(queries).query_string == 'VALUES ?x { wd:Q1 wd:Q2 }'
+    assert taken == [1, 2]
+    assert [query.query_string for query in queries] == ['VALUES ?x { wd:Q3 wd:Q4 }', 'VALUES ?x { wd:Q5 }']
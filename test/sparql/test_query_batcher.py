@@ -0,0 +1,85 @@
+import asyncio
+import re
+
+from aiohttp import web
+
+from asyncwikidata.sparql import AsyncSPARQLWrapper, JSON, QueryBatcher
+
+TEMPLATE = '''SELECT ?qid ?label WHERE {{
+    VALUES ?qid {{ {qids} }}.
+    ?qid rdfs:label ?label. FILTER(LANG(?label) = "{lang}")
+    }}'''
+
+
+def labels_app(received: list, fail: bool = False, delay: float = 0) -> web.Application:
+    """SPARQL endpoint binding a label to every wd: identifier of the query (or failing with HTTP 500)"""
+    async def handler(request: web.Request) -> web.Response:
+        query = request.query['query']
+        received.append(query)
+        await asyncio.sleep(delay)
+        if fail:
+            return web.Response(status=500, text='Internal Server Error')
+        lang = re.search(r'LANG\(\?label\) = "(\w+)"', query).group(1)
+        bindings = [{'qid': {'type': 'uri', 'value': f'http://www.wikidata.org/entity/{qid}'},
+                     'label': {'type': 'literal', 'value': f'{qid}@{lang}', 'xml:lang': lang}}
+                    for qid in re.findall(r'wd:(Q\d+)', query)]
+        return web.json_response({'head': {'vars': ['qid', 'label']}, 'results': {'bindings': bindings}})
+
+    app = web.Application()
+    app.router.add_get('/sparql', handler)
+    return app
+
+
+def create_wrapper(url: str) -> AsyncSPARQLWrapper:
+    sw = AsyncSPARQLWrapper(url, merge_results=True, cache_results=False)
+    sw.setReturnFormat(JSON)
+    return sw
+
+
+def test_submissions_are_batched_by_other_parameters(local_server):
+    received = []
+    sw = create_wrapper(local_server(labels_app(received)).url('/sparql'))
+
+    async def main():
+        async with QueryBatcher(sw, TEMPLATE, key='qids', simplify=True) as batcher:
+            return await asyncio.gather(batcher.submit(qids='Q1', lang='en'), batcher.submit(qids='Q2', lang='en'),
+                                        batcher.submit(qids='Q1', lang='de'))
+    q1_en, q2_en, q1_de = asyncio.run(main())
+    assert len(received) == 2
+    assert q1_en == [{'qid': 'Q1', 'label': 'Q1@en'}]
+    assert q2_en == [{'qid': 'Q2', 'label': 'Q2@en'}]
+    assert q1_de == [{'qid': 'Q1', 'label': 'Q1@de'}]
+
+
+def test_failed_query_fails_every_submission(local_server):
+    received = []
+    sw = create_wrapper(local_server(labels_app(received, fail=True)).url('/sparql'))
+
+    async def main():
+        async with QueryBatcher(sw, TEMPLATE, key='qids') as batcher:
+            return await asyncio.gather(batcher.submit(qids='Q1', lang='en'), batcher.submit(qids='Q2', lang='en'),
+                                        return_exceptions=True)
+    results = asyncio.run(main())
+    assert len(received) == 1
+    # every submission of the batch gets the error of the query
+    assert isinstance(results[0], Exception) and results[1] is results[0]
+
+
+def test_value_in_flight_is_not_requested_again(local_server):
+    received = []
+    sw = create_wrapper(local_server(labels_app(received, delay=0.2)).url('/sparql'))
+
+    async def main():
+        async with QueryBatcher(sw, TEMPLATE, key='qids', simplify=True) as batcher:
+            first = asyncio.create_task(batcher.submit(qids='Q1', lang='en'))
+            while not received:
+                await asyncio.sleep(0.01)
+            # the batch of the first submission is in flight
+            second = await batcher.submit(qids='Q1', lang='en')
+            assert await first == second
+            # the value is requested again once its query has completed
+            third = await batcher.submit(qids='Q1', lang='en')
+        return second, third
+    second, third = asyncio.run(main())
+    assert second == third == [{'qid': 'Q1', 'label': 'Q1@en'}]
+    assert len(received) == 2
@@ -0,0 +1,59 @@
+import json
+import re
+
+from aiohttp import web
+
+from asyncwikidata.sinks import JSONLSink
+from asyncwikidata.sparql import AsyncSPARQLWrapper, JSON, Query
+
+
+def sparql_app(received: list) -> web.Application:
+    """SPARQL endpoint binding ?qid to every wd: identifier of the query"""
+    async def handler(request: web.Request) -> web.Response:
+        query = request.query['query']
+        received.append(query)
+        qids = re.findall(r'wd:(Q\d+)', query) or ['Q1']
+        bindings = [{'qid': {'type': 'uri', 'value': f'http://www.wikidata.org/entity/{qid}'}} for qid in qids]
+        return web.json_response({'head': {'vars': ['qid']}, 'results': {'bindings': bindings}})
+
+    app = web.Application()
+    app.router.add_get('/sparql', handler)
+    return app
+
+
+def read_rows(path) -> list[dict]:
+    with open(path, encoding='utf-8') as file:
+        return [json.loads(line) for line in file]
+
+
+def test_single_query_with_braces_is_sent_unformatted(local_server, tmp_path):
+    received = []
+    server = local_server(sparql_app(received))
+    query_string = 'SELECT ?x WHERE { ?x ?p ?o } LIMIT 1'
+    sw = AsyncSPARQLWrapper(server.url('/sparql'), merge_results=True)
+    sw.setReturnFormat(JSON)
+    sw.setQuery(query_string)
+    with JSONLSink(str(tmp_path / 'rows.jsonl')) as sink:
+        assert sw.query_to_sink(sink) == 1
+    assert received == [query_string]
+    assert read_rows(tmp_path / 'rows.jsonl') == [{'qid': 'http://www.wikidata.org/entity/Q1'}]
+
+
+def test_split_queries_are_written(local_server, tmp_path):
+    received = []
+    server = local_server(sparql_app(received))
+    sw = AsyncSPARQLWrapper(server.url('/sparql'), merge_results=True)
+    sw.setReturnFormat(JSON)
+    sw.setQuery(Query.split_by_values_clause('SELECT ?qid WHERE {{ VALUES ?qid {{ {qids} }} }}', 'qids', 2,
+                                             qids=['Q1', 'Q2', 'Q3']))
+    with JSONLSink(str(tmp_path / 'rows.jsonl')) as sink:
+        assert sw.query_to_sink(sink) == 3
+    assert len(received) == 2
+    assert sorted(row['qid'] for row in read_rows(tmp_path / 'rows.jsonl')) == [
+        f'http://www.wikidata.org/entity/Q{i}' for i in (1, 2, 3)]
+
+
+def test_query_from_query_string_is_not_formatted():
+    query = Query.from_query_string('SELECT ?x WHERE { ?x ?p ?o }')
+    assert query.query_string == 'SELECT ?x WHERE { ?x ?p ?o }'
+    assert query == Query.from_query_string('SELECT ?x WHERE { ?x ?p ?o }')
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from asyncwikidata import bounded_as_completed
+
+
+def test_window_of_a_lazy_generator():
+    running = []
+    peak = 0
+    created = []
+
+    async def job(i: int) -> int:
+        nonlocal peak
+        running.append(i)
+        peak = max(peak, len(running))
+        await asyncio.sleep(0.01 * (i % 3))
+        running.remove(i)
+        return i
+
+    def jobs():
+        for i in range(10):
+            created.append(i)
+            yield job(i)
+
+    async def main():
+        results = []
+        async for result in bounded_as_completed(jobs(), 3):
+            # coroutines are created only when there is room for them
+            assert len(created) - len(results) <= 3
+            results.append(result)
+        return results
+    results = asyncio.run(main())
+    assert sorted(results) == list(range(10))
+    assert peak == 3
+
+
+def test_asynchronous_iterable():
+    async def main():
+        queue = asyncio.Queue()
+
+        async def job(i: int) -> int:
+            await asyncio.sleep(0.01)
+            return i
+
+        async def jobs():
+            while True:
+                i = await queue.get()
+                if i is None:
+                    return
+                yield job(i)
+
+        for i in (1, 2, None):
+            queue.put_nowait(i)
+        assert sorted([result async for result in bounded_as_completed(jobs(), 1)]) == [1, 2]
+    asyncio.run(main())
+
+
+def test_error_cancels_the_awaitables_in_flight():
+    async def main():
+        queue = asyncio.Queue()
+        slow = []
+
+        async def fail():
+            raise ValueError('failed')
+
+        async def sleep():
+            slow.append(asyncio.current_task())
+            await asyncio.sleep(10)
+
+        async def jobs():
+            yield sleep()
+            yield fail()
+            # the error is raised while the iterable waits for the next input
+            await queue.get()
+
+        with pytest.raises(ValueError):
+            async for _ in bounded_as_completed(jobs(), 2):
+                pass
+        await asyncio.sleep(0)
+        assert slow[0].cancelled()
+        assert asyncio.all_tasks() == {asyncio.current_task()}
+
+        results = bounded_as_completed([sleep(), asyncio.sleep(0, 'done')], 2)
+        assert await results.__anext__() == 'done'
+        await results.aclose()
+        await asyncio.sleep(0)
+        assert slow[1].cancelled()
+    asyncio.run(main())
@@ -0,0 +1,34 @@
+import numpy as np
+
+from asyncwikidata.chunkify import create_chunks
+
+
+def test_chunks_of_lists():
+    assert list(create_chunks([1, 2, 3, 4, 5], 2)) == [[1, 2], [3, 4], [5]]
+    data = [1, 2, 3]
+    assert next(create_chunks(data)) is data
+    assert list(create_chunks([], 2)) == []
+
+
+def test_chunks_of_generators_are_taken_lazily():
+    taken = []
+
+    def values():
+        for i in range(5):
+            taken.append(i)
+            yield i
+
+    chunks = create_chunks(values(), 2)
+    assert taken == []
+    assert next(chunks) == [0, 1]
+    # only the values of the chunk are taken from the generator
+    assert taken == [0, 1]
+    assert list(chunks) == [[2, 3], [4]]
+    assert list(create_chunks(iter(range(3)))) == [[0, 1, 2]]
+
+
+def test_chunks_of_numpy_arrays_are_lists():
+    chunks = list(create_chunks(np.arange(5), 2))
+    assert chunks == [[0, 1], [2, 3], [4]]
+    assert all(type(chunk) is list and type(chunk[0]) is int for chunk in chunks)
+    assert list(create_chunks(np.array(['Q1', 'Q2']))) == [['Q1', 'Q2']]
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from asyncwikidata.api import AsyncAPIWrapper
+from asyncwikidata.chunkify import create_chunks
+from asyncwikidata.entity_ids import EntityIds
+from asyncwikidata.sparql import Query
+from test.entities import api_app, entity_dict
+
+
+def test_formatting_and_indexing():
+    ids = EntityIds([1, 5, 42], dtype=np.int32)
+    assert ids.numbers.dtype == np.int32
+    assert list(ids) == ['Q1', 'Q5', 'Q42']
+    assert ids.tolist(prefix='wd:') == ['wd:Q1', 'wd:Q5', 'wd:Q42']
+    assert ids[2] == 'Q42'
+    assert ids[1:] == EntityIds([5, 42])
+    assert len(ids) == 3
+    assert np.asarray(ids).tolist() == [1, 5, 42]
+
+
+def test_namespace_and_dtype_are_validated():
+    with pytest.raises(ValueError):
+        EntityIds([1], namespace='X')
+    with pytest.raises(ValueError):
+        EntityIds(np.array([1.5]))
+    assert list(EntityIds([31], namespace='P')) == ['P31']
+
+
+def test_contains_and_unique():
+    ids = EntityIds([3, 1, 3, 2, 1])
+    assert 'Q3' in ids and 3 in ids and 'wd:Q2' in ids
+    assert 'P3' not in ids and 'Q3 Q1' not in ids and 'Q7' not in ids
+    assert ids.unique() == EntityIds([3, 1, 2])
+
+
+def test_from_strings():
+    assert EntityIds.from_strings(['Q1', 'wd:Q2', 'http://www.wikidata.org/entity/Q3']) == EntityIds([1, 2, 3])
+    assert EntityIds.from_strings(['P31', 'P279']) == EntityIds([31, 279], namespace='P')
+    assert EntityIds.from_strings([]) == EntityIds([])
+    assert EntityIds.from_strings(np.array(['Q10', 'Q20'])) == EntityIds([10, 20])
+    assert EntityIds.from_strings(['Q1', 'P2', 'foo', 'Q3'], strict=False) == EntityIds([1, 3])
+
+
+@pytest.mark.parametrize('values', [['Q1', 'P2'], ['Q1', 'Q2 Q3'], ['Q1', 'Q'], ['Q1', 'Q²'], ['Q1', 'Q2\tQ3']])
+def test_from_strings_rejects_invalid_values(values):
+    with pytest.raises(ValueError):
+        EntityIds.from_strings(values)
+
+
+def test_from_strings_skips_values_with_spaces():
+    assert EntityIds.from_strings(['Q1', 'Q2 Q3', 'Q4'], strict=False) == EntityIds([1, 4])
+
+
+def test_from_bindings():
+    bindings = [
+        {'item': {'type': 'uri', 'value': 'http://www.wikidata.org/entity/Q42'}},
+        {'item': {'type': 'literal', 'value': 'Q2 Q3'}},
+        {'other': {'type': 'uri', 'value': 'http://www.wikidata.org/entity/Q5'}},
+        {'item': {'type': 'uri', 'value': 'http://www.wikidata.org/entity/Q7'}},
+    ]
+    assert EntityIds.from_bindings(bindings, 'item') == EntityIds([42, 7])
+
+
+def test_chunks_and_values_clause_are_formatted_lazily():
+    ids = EntityIds(range(1, 6))
+    # chunks stay compact; they are formatted when the request or the query is built
+    assert list(create_chunks(ids, 2)) == [EntityIds([1, 2]), EntityIds([3, 4]), EntityIds([5])]
+    assert list(create_chunks(np.array(['Q1', 'Q2', 'Q3']), 2)) == [['Q1', 'Q2'], ['Q3']]
+    queries = Query.split_by_values_clause('VALUES ?x {{ {xs} }}', 'xs', 3, xs=ids)
+    assert [query.query_string for query in queries] == ['VALUES ?x { wd:Q1 wd:Q2 wd:Q3 }', 'VALUES ?x { wd:Q4 wd:Q5 }']
+
+
+def test_request_parameters():
+    aw = AsyncAPIWrapper('http://127.0.0.1/w/api.php')
+    assert aw._create_request_params(ids=EntityIds([1, 2]), format='json') == {'ids': 'Q1|Q2', 'format': 'json'}
+    with pytest.raises(ValueError):
+        aw._create_request_params(ids=np.array([1, 2]))
+
+
+def test_entity_dicts_of_entity_ids(local_server, monkeypatch):
+    log = []
+    aw = AsyncAPIWrapper(local_server(api_app({f'Q{i}': entity_dict(f'Q{i}') for i in range(1, 4)}, log))
+                         .url('/w/api.php'))
+    chunks = []
+    fetch_entity_dicts = aw.fetch_entity_dicts
+
+    async def spy(session, sema, ids, **kwargs):
+        chunks.append(ids)
+        return await fetch_entity_dicts(session, sema, ids, **kwargs)
+    monkeypatch.setattr(aw, 'fetch_entity_dicts', spy)
+
+    entity_dicts = aw.get_entity_dicts(EntityIds([3, 1, 3, 2, 9]), 'json', chunk_size=2)
+    assert list(entity_dicts) == ['Q3', 'Q1', 'Q2', 'Q9']
+    # the IDs are de-duplicated as numbers and every chunk is formatted only for its request
+    assert all(isinstance(chunk, EntityIds) for chunk in chunks)
+    assert [params['ids'] for params in log] == ['Q3|Q1', 'Q2|Q9']
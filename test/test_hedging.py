@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from asyncwikidata.hedging import HedgePolicy
+
+
+def requests_with_latencies(*latencies: float, error: bool = False):
+    """Coroutine function whose n-th call takes the n-th latency and returns n (or raises if error)"""
+    calls = []
+
+    async def request() -> int:
+        calls.append(len(calls))
+        n = calls[-1]
+        await asyncio.sleep(latencies[n])
+        if error:
+            raise ValueError(f'request {n} failed')
+        return n
+    return request, calls
+
+
+def test_delay_is_percentile_of_latencies():
+    policy = HedgePolicy(percentile=0.9, min_samples=10, initial_delay=5.0)
+    assert policy.delay() == 5.0
+    for i in range(1, 11):
+        policy.observe(i / 10)
+    assert policy.delay() == pytest.approx(0.9)
+
+    clamped = HedgePolicy(percentile=0.5, min_samples=1, min_delay=0.3, max_delay=0.6)
+    clamped.observe(0.1)
+    assert clamped.delay() == 0.3
+    for _ in range(9):
+        clamped.observe(1.0)
+    assert clamped.delay() == 0.6
+
+
+def test_no_hedging_without_samples_or_initial_delay():
+    policy = HedgePolicy(budget=1.0)
+    request, calls = requests_with_latencies(0.05)
+    assert asyncio.run(policy.run(request)) == (0, False)
+    assert len(calls) == 1
+    assert policy.latencies[0] >= 0.05
+
+
+def test_hedge_wins_and_its_own_latency_is_observed():
+    policy = HedgePolicy(budget=1.0, max_tokens=1.0, initial_delay=0.1)
+    request, calls = requests_with_latencies(2.0, 0.01)
+    assert asyncio.run(policy.run(request)) == (1, True)
+    assert policy.metrics.counters['hedge_wins'] == 1
+    # the latency of the hedge does not include the delay before it was sent
+    assert 0.01 <= policy.latencies[0] < 0.1
+
+
+def test_budget_limits_hedges():
+    policy = HedgePolicy(budget=0.5, initial_delay=0.01)
+
+    async def run_twice():
+        first = await policy.run(requests_with_latencies(0.1, 0.01)[0])
+        second = await policy.run(requests_with_latencies(0.1, 0.01)[0])
+        return first, second
+    # the first request collects half of the token, the second one completes it
+    assert asyncio.run(run_twice()) == ((0, False), (1, True))
+    assert policy.metrics.counters['hedged_requests'] == 1
+
+
+def test_can_hedge_and_errors():
+    policy = HedgePolicy(budget=1.0, initial_delay=0.01)
+    request, calls = requests_with_latencies(0.05, 0.01)
+    assert asyncio.run(policy.run(request, can_hedge=lambda: False)) == (0, False)
+    assert len(calls) == 1
+
+    request, calls = requests_with_latencies(0.05, 0.01, error=True)
+    with pytest.raises(ValueError):
+        asyncio.run(policy.run(request))
+    assert len(calls) == 2
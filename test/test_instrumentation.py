@@ -0,0 +1,122 @@
+import asyncio
+
+from aiohttp import web
+
+from asyncwikidata.api import AsyncAPIWrapper
+from asyncwikidata.hedging import HedgePolicy
+from asyncwikidata.instrumentation import Histogram, Metrics, RequestLog, RequestRecord
+from test.entities import api_app, entity_dict
+
+
+def test_request_log_keeps_the_most_recent_records():
+    log = RequestLog(maxlen=2)
+    for i in range(3):
+        log.append(RequestRecord(url=f'http://localhost/{i}'))
+    assert len(log) == 2
+    assert log.urls() == ['http://localhost/1', 'http://localhost/2']
+    # iteration is over a copy, so records can be appended meanwhile
+    for record in log:
+        log.append(record)
+    assert len(log) == 2
+    log.clear()
+    assert log.urls() == []
+    unbounded = RequestLog(maxlen=None)
+    for _ in range(5000):
+        unbounded.append(RequestRecord())
+    assert len(unbounded) == 5000
+
+
+def test_record_as_dict():
+    record = RequestRecord(url='http://localhost/', status=200, bytes=10)
+    assert record.as_dict() == {'url': 'http://localhost/', 'status': 200, 'started': None, 'latency': None,
+                                'bytes': 10, 'retries': 0, 'hedged': False, 'retry_after': None,
+                                'entities': None, 'error': None}
+    assert repr(record).startswith('RequestRecord(url=http://localhost/, status=200')
+
+
+def test_counters_gauges_and_histograms():
+    metrics = Metrics(buckets=(0.1, 1.0))
+    observed = []
+    metrics.subscribe(lambda name, value: observed.append((name, value)))
+    metrics.inc('requests')
+    metrics.inc('requests', 2)
+    metrics.set_gauge('limit', 4)
+    metrics.set_gauge('limit', 3)
+    for value in (0.05, 0.1, 0.5, 2.0):
+        metrics.observe('seconds', value)
+    with metrics.timer('block'):
+        pass
+    snapshot = metrics.snapshot()
+    assert snapshot['counters'] == {'requests': 3}
+    assert snapshot['gauges'] == {'limit': 3}
+    # buckets are cumulative and their upper bounds are inclusive
+    assert snapshot['histograms']['seconds'] == {'count': 4, 'sum': 2.65,
+                                                 'buckets': {0.1: 2, 1.0: 3, float('inf'): 4}}
+    assert snapshot['histograms']['block']['count'] == 1
+    assert observed[:4] == [('seconds', 0.05), ('seconds', 0.1), ('seconds', 0.5), ('seconds', 2.0)]
+    metrics.reset()
+    assert metrics.snapshot() == {'counters': {}, 'gauges': {}, 'histograms': {}}
+
+
+def test_histogram_quantiles():
+    histogram = Histogram((0.1, 1.0))
+    assert histogram.quantile(0.5) is None
+    for value in (0.01, 0.02, 0.5, 5.0):
+        histogram.observe(value)
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(0.75) == 1.0
+    assert histogram.quantile(1.0) == float('inf')
+
+
+def test_prometheus_text_format():
+    metrics = Metrics(prefix='wd', buckets=(0.5,))
+    metrics.inc('requests', 2)
+    metrics.set_gauge('concurrency_limit', 5)
+    metrics.observe('request_seconds', 0.25)
+    assert metrics.to_prometheus() == '\n'.join([
+        '# TYPE wd_requests_total counter',
+        'wd_requests_total 2',
+        '# TYPE wd_concurrency_limit gauge',
+        'wd_concurrency_limit 5',
+        '# TYPE wd_request_seconds histogram',
+        'wd_request_seconds_bucket{le="0.5"} 1',
+        'wd_request_seconds_bucket{le="+Inf"} 1',
+        'wd_request_seconds_sum 0.25',
+        'wd_request_seconds_count 1',
+    ]) + '\n'
+    assert Metrics().to_prometheus() == '\n'
+
+
+def test_requests_are_recorded(local_server):
+    server = local_server(api_app({'Q1': entity_dict('Q1'), 'Q2': entity_dict('Q2')}))
+    aw = AsyncAPIWrapper(server.url('/w/api.php'), history_size=2)
+    aw.get_entity_dicts(['Q1', 'Q2', 'Q3'], 'json', chunk_size=1)
+    assert len(aw.requests) == 2
+    # history keeps the urls of the most recent requests
+    assert aw.history == [record.url for record in aw.requests]
+    assert all(url.startswith(server.url('/w/api.php?')) for url in aw.history)
+    for record in aw.requests:
+        assert record.status == 200 and record.bytes > 0 and record.latency >= 0
+        assert (record.retries, record.hedged, record.error) == (0, False, None)
+    assert aw.metrics.counters['requests'] == 3
+    assert aw.metrics.histograms['request_seconds'].count == 3
+
+
+def test_hedged_request_is_recorded(local_server):
+    calls = []
+
+    async def handler(request):
+        calls.append(request.query['ids'])
+        # the first request is slow, so it is hedged
+        await asyncio.sleep(0.5 if len(calls) == 1 else 0)
+        return web.json_response({'entities': {'Q1': entity_dict('Q1')}, 'success': 1})
+
+    app = web.Application()
+    app.router.add_get('/w/api.php', handler)
+    aw = AsyncAPIWrapper(local_server(app).url('/w/api.php'),
+                         hedge=HedgePolicy(budget=1.0, max_tokens=1.0, initial_delay=0.05))
+    assert list(aw.get_entity_dicts(['Q1'], 'json')) == ['Q1']
+    record, = aw.requests
+    assert len(calls) == 2
+    assert (record.hedged, record.retries, record.status) == (True, 0, 200)
+    assert record.latency < 0.5
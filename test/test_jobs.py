@@ -0,0 +1,64 @@
+import pytest
+from aiohttp import web
+
+from asyncwikidata.api import AsyncAPIWrapper
+from asyncwikidata.entity_ids import EntityIds
+from asyncwikidata.jobs import JobRunner
+from test.entities import api_app, entity_dict
+
+
+def test_resumed_job_skips_completed_chunks(local_server, tmp_path):
+    log = []
+    entity_dicts = {f'Q{i}': entity_dict(f'Q{i}') for i in range(1, 6)}
+    aw = AsyncAPIWrapper(local_server(api_app(entity_dicts, log)).url('/w/api.php'))
+    runner = JobRunner(str(tmp_path), progress=lambda progress: None)
+
+    progress = runner.run_entities('items', aw, list(entity_dicts), chunk_size=2)
+    assert (progress.done, progress.skipped, progress.items) == (3, 0, 5)
+    assert [sorted(result) for result in runner.iter_results('items')] == [['Q1', 'Q2'], ['Q3', 'Q4'], ['Q5']]
+
+    # the same IDs in another representation have the same fingerprints
+    progress = runner.run_entities('items', aw, EntityIds([1, 2, 3, 4, 5]), chunk_size=2)
+    assert (progress.done, progress.skipped) == (0, 3)
+    assert len(log) == 3
+
+    with pytest.raises(ValueError):
+        runner.run_entities('items', aw, ['Q1', 'Q3', 'Q2'], chunk_size=2)
+    runner.close()
+
+
+def test_failed_chunk_is_completed_on_resume(local_server, tmp_path):
+    log = []
+    failing = {'Q3'}
+    entity_dicts = {f'Q{i}': entity_dict(f'Q{i}') for i in range(1, 6)}
+
+    async def handler(request: web.Request) -> web.Response:
+        ids = request.query['ids'].split('|')
+        log.append(ids)
+        if failing.intersection(ids):
+            return web.json_response({'error': {'code': 'internal_api_error', 'info': 'try again'}})
+        return web.json_response({'entities': {entity_id: entity_dicts[entity_id] for entity_id in ids},
+                                  'success': 1})
+
+    app = web.Application()
+    app.router.add_get('/w/api.php', handler)
+    aw = AsyncAPIWrapper(local_server(app).url('/w/api.php'))
+    runner = JobRunner(str(tmp_path), max_retries=1, retry_delay=0.0, progress=lambda progress: None)
+
+    progress = runner.run_entities('items', aw, list(entity_dicts), chunk_size=2)
+    assert (progress.done, progress.skipped, progress.failed) == (2, 0, 1)
+    assert runner.status('items') == {'done': 2, 'failed': 1}
+    (chunk, attempts, error), = runner.failed_chunks('items')
+    assert (chunk, attempts) == (1, 2) and 'internal_api_error' in error
+    assert [sorted(result) for result in runner.iter_results('items')] == [['Q1', 'Q2'], ['Q5']]
+
+    failing.clear()
+    log.clear()
+    progress = runner.run_entities('items', aw, list(entity_dicts), chunk_size=2)
+    # only the failed chunk is requested again
+    assert (progress.done, progress.skipped, progress.failed) == (1, 2, 0)
+    assert log == [['Q3', 'Q4']]
+    assert runner.status('items') == {'done': 3}
+    assert runner.failed_chunks('items') == []
+    assert [sorted(result) for result in runner.iter_results('items')] == [['Q1', 'Q2'], ['Q3', 'Q4'], ['Q5']]
+    runner.close()
@@ -0,0 +1,78 @@
+from asyncwikidata.api import AsyncAPIWrapper
+from asyncwikidata.label_store import LabelStore
+from test.entities import api_app, entity_dict
+
+
+def german(entity: dict, label: str = None, description: str = None) -> dict:
+    if label is not None:
+        entity['labels']['de'] = {'language': 'de', 'value': label}
+    if description is not None:
+        entity['descriptions']['de'] = {'language': 'de', 'value': description}
+    return entity
+
+
+def test_labels_and_descriptions_by_language():
+    store = LabelStore()
+    store.add_entity_dicts([german(entity_dict('Q1'), label='eins'), entity_dict('P31'), {'id': 'not an ID'}])
+    assert len(store) == 3
+    assert store.get_labels(['Q1', 'P31', 'Q2', 'foo'], 'en') == {'Q1': 'label-Q1', 'P31': 'label-P31'}
+    assert store.get_label('Q1', 'de') == 'eins'
+    assert store.get_description('Q1', 'de') is None
+    assert store.get_description('P31', 'en') == 'desc-P31'
+    # Q1 and P1 are different entities
+    assert store.get_label('P1', 'en') is None
+
+
+def test_updates_keep_known_values():
+    store = LabelStore()
+    store.add_entity_dicts([german(entity_dict('Q1'), label='eins')])
+    # a later response with the description only does not remove the label
+    update = entity_dict('Q1')
+    update['labels'] = {}
+    store.add_entity_dicts([german(update, description='Zahl')])
+    assert (store.get_label('Q1', 'de'), store.get_description('Q1', 'de')) == ('eins', 'Zahl')
+
+
+def test_lookup_of_more_ids_than_sqlite_variables():
+    store = LabelStore()
+    store.add_entity_dicts(entity_dict(f'Q{i}') for i in range(1, 1201))
+    labels = store.get_labels([f'Q{i}' for i in range(1, 1301)], 'en')
+    assert len(labels) == 1200 and labels['Q1200'] == 'label-Q1200'
+
+
+def test_attach_to_simplified_results():
+    store = LabelStore()
+    store.add_entity_dicts([entity_dict('Q1'), entity_dict('Q2')])
+    results = {'query_0': [{'item': 'Q1', 'class': 'Q2', 'name': 'x'}, {'item': 'Q3', 'class': 'Q2', 'name': 'y'}]}
+    store.attach(results, 'en', columns=['item'], descriptions=True)
+    assert results['query_0'] == [
+        {'item': 'Q1', 'class': 'Q2', 'name': 'x', 'itemLabel': 'label-Q1', 'itemDescription': 'desc-Q1'},
+        # unknown labels fall back to the ID as wikibase:label does
+        {'item': 'Q3', 'class': 'Q2', 'name': 'y', 'itemLabel': 'Q3'},
+    ]
+
+
+def test_attach_bindings():
+    store = LabelStore()
+    store.add_entity_dicts([entity_dict('Q1')])
+    result = {'head': {'vars': ['item', 'n']}, 'results': {'bindings': [
+        {'item': {'type': 'uri', 'value': 'http://www.wikidata.org/entity/Q1'}, 'n': {'type': 'literal', 'value': '1'}},
+        {'item': {'type': 'uri', 'value': 'http://www.wikidata.org/entity/Q9'}},
+    ]}}
+    store.attach_bindings(result, 'en')
+    assert result['head']['vars'] == ['item', 'n', 'itemLabel']
+    first, second = result['results']['bindings']
+    assert first['itemLabel'] == {'type': 'literal', 'value': 'label-Q1', 'xml:lang': 'en'}
+    assert 'nLabel' not in first
+    assert second['itemLabel'] == {'type': 'literal', 'value': 'Q9'}
+
+
+def test_fill_from_api(local_server, tmp_path):
+    log = []
+    aw = AsyncAPIWrapper(local_server(api_app({'Q1': entity_dict('Q1')}, log)).url('/w/api.php'))
+    path = str(tmp_path / 'labels.sqlite')
+    store = LabelStore(path)
+    store.fill_from_api(aw, ['Q1', 'Q2'], ['en'])
+    store.close()
+    assert [(params['props'], params['languages']) for params in log] == [('labels|descriptions', 'en')]
+    assert LabelStore(path).get_labels(['Q1', 'Q2'], 'en') == {'Q1': 'label-Q1'}
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from asyncwikidata.limiter import AdaptiveLimiter
+
+
+def test_additive_increase_after_limit_successes():
+    limiter = AdaptiveLimiter(initial=4, max_limit=5, latency_threshold=1.0)
+    for _ in range(3):
+        limiter.on_success(0.1)
+    assert limiter.limit == 4
+    limiter.on_success(0.1)
+    assert limiter.limit == 5
+    for _ in range(10):
+        limiter.on_success(0.1)
+    assert limiter.limit == 5
+    assert limiter.metrics.gauges['concurrency_limit'] == 5
+
+
+def test_multiplicative_decrease_with_cooldown():
+    limiter = AdaptiveLimiter(initial=10, min_limit=2, cooldown=60.0)
+    limiter.on_congestion()
+    assert limiter.limit == 5
+    # the second congestion signal within the cooldown is ignored
+    limiter.on_congestion()
+    assert limiter.limit == 5
+
+    limiter = AdaptiveLimiter(initial=10, min_limit=2, cooldown=0.0)
+    for _ in range(3):
+        limiter.on_congestion()
+    assert limiter.limit == 2
+    assert limiter.metrics.counters['concurrency_decreases'] == 3
+
+
+def test_congestion_resets_the_increase():
+    limiter = AdaptiveLimiter(initial=2, cooldown=0.0, latency_threshold=1.0)
+    limiter.on_success(0.1)
+    limiter.on_success(2.0)  # too slow
+    assert limiter.limit == 1
+    limiter.on_success(0.1)
+    assert limiter.limit == 2
+
+
+def test_relative_latency_threshold():
+    limiter = AdaptiveLimiter(initial=10, cooldown=0.0, latency_tolerance=2.0)
+    for _ in range(5):
+        limiter.on_success(0.1)
+    assert limiter.limit == 10 and limiter.baseline == pytest.approx(0.1)
+    # the smoothed latency exceeds twice the baseline only after two slow requests
+    limiter.on_success(0.35)
+    assert limiter.limit == 10
+    limiter.on_success(0.35)
+    assert limiter.limit == 5
+
+
+@pytest.mark.parametrize('args', [{'initial': 0}, {'initial': 5, 'max_limit': 4}, {'decrease': 1.0}])
+def test_invalid_parameters(args):
+    with pytest.raises(ValueError):
+        AdaptiveLimiter(**args)
+
+
+def test_blocks_respect_the_limit_and_signal_congestion():
+    limiter = AdaptiveLimiter(initial=3, max_limit=3, cooldown=0.0, latency_threshold=1.0)
+    peak = 0
+
+    async def request(i: int) -> None:
+        nonlocal peak
+        async with limiter:
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+            if i == 0:
+                limiter.throttle()
+
+    async def main() -> None:
+        await asyncio.gather(*(request(i) for i in range(1, 10)))
+        assert peak == 3 and limiter.limit == 3
+        await request(0)
+        assert limiter.limit == 1
+        with pytest.raises(RuntimeError):
+            async with limiter:
+                raise RuntimeError('connection reset')
+        task = asyncio.create_task(request(1))
+        await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        # cancellation is not a congestion signal; the slot is released
+        assert limiter.limit == 1 and limiter.in_flight == 0
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+import asyncio
+import re
+import time
+
+import pytest
+from aiohttp import web
+
+from asyncwikidata.api import AsyncAPIWrapper
+from asyncwikidata.pipeline import get_entities_from_sparql, sparql_to_entities
+from asyncwikidata.sparql import AsyncSPARQLWrapper, JSON, Query
+from test.entities import api_app, entity_dict
+
+QUERY = 'SELECT ?qid WHERE {{ VALUES ?qid {{ {qids} }} }}'
+
+
+def pipeline_app(api: web.Application, queries: list) -> web.Application:
+    """wbgetentities application with the SPARQL endpoint binding ?qid to every wd: identifier of the query"""
+    async def sparql(request: web.Request) -> web.Response:
+        queries.append(request.query['query'])
+        bindings = [{'qid': {'type': 'uri', 'value': f'http://www.wikidata.org/entity/{qid}'}}
+                    for qid in re.findall(r'wd:(Q\d+)', request.query['query'])]
+        return web.json_response({'head': {'vars': ['qid']}, 'results': {'bindings': bindings}})
+
+    api.router.add_get('/sparql', sparql)
+    return api
+
+
+def wrappers(server) -> tuple[AsyncSPARQLWrapper, AsyncAPIWrapper]:
+    sw = AsyncSPARQLWrapper(server.url('/sparql'), merge_results=True)
+    sw.setReturnFormat(JSON)
+    return sw, AsyncAPIWrapper(server.url('/w/api.php'))
+
+
+def test_ids_of_query_results_are_fetched_once(local_server):
+    log, queries = [], []
+    server = local_server(pipeline_app(api_app({f'Q{i}': entity_dict(f'Q{i}') for i in range(1, 6)}, log), queries))
+    sw, aw = wrappers(server)
+    split = Query.split_by_values_clause(QUERY, 'qids', 2, qids=['Q1', 'Q2', 'Q2', 'Q3', 'Q9', 'Q1', 'Q4', 'Q5'])
+    entities = get_entities_from_sparql(sw, split, aw, batch_size=2, languages=['en'])
+    assert len(queries) == 4
+    # every ID is requested once across the batches; missing entities are skipped
+    requested = [entity_id for params in log for entity_id in params['ids'].split('|')]
+    assert sorted(requested) == ['Q1', 'Q2', 'Q3', 'Q4', 'Q5', 'Q9']
+    assert all(len(params['ids'].split('|')) <= 2 and params['languages'] == 'en' for params in log)
+    assert sorted(entity.id for entity in entities) == ['Q1', 'Q2', 'Q3', 'Q4', 'Q5']
+    assert entities[0].labels['en'].value == f'label-{entities[0].id}'
+
+
+def test_limit(local_server):
+    log, queries = [], []
+    server = local_server(pipeline_app(api_app({f'Q{i}': entity_dict(f'Q{i}') for i in range(1, 9)}, log), queries))
+    sw, aw = wrappers(server)
+    entities = get_entities_from_sparql(sw, Query(QUERY, qids=' '.join(f'wd:Q{i}' for i in range(1, 9))), aw,
+                                        limit=3, batch_size=2)
+    assert len(entities) == 3
+    assert len({entity.id for entity in entities}) == 3
+
+
+def test_failed_batch_cancels_the_other_ones(local_server):
+    requested = []
+
+    async def handler(request: web.Request) -> web.Response:
+        requested.append(request.query['ids'])
+        if request.query['ids'] == 'Q1':
+            return web.json_response({'error': {'code': 'internal_api_error', 'info': 'failed'}})
+        await asyncio.sleep(1)
+        return web.json_response({'entities': {}, 'success': 1})
+
+    api = web.Application()
+    api.router.add_get('/w/api.php', handler)
+    sw, aw = wrappers(local_server(pipeline_app(api, [])))
+
+    async def main():
+        start = time.perf_counter()
+        with pytest.raises(Exception, match='internal_api_error'):
+            async for _ in sparql_to_entities(sw, Query(QUERY, qids='wd:Q2 wd:Q3 wd:Q1'), aw, batch_size=1):
+                pass
+        elapsed = time.perf_counter() - start
+        await asyncio.sleep(0)
+        # the batches in flight are cancelled instead of being awaited
+        assert asyncio.all_tasks() == {asyncio.current_task()}
+        return elapsed
+    assert asyncio.run(main()) < 0.5
+    assert sorted(requested) == ['Q1', 'Q2', 'Q3']
@@ -0,0 +1,25 @@
+import multiprocessing as mp
+
+from asyncwikidata.api import AsyncAPIWrapper
+from asyncwikidata.sharding import ShardedExecutor
+from test.entities import api_app, entity_dict
+
+
+def test_shards_are_contiguous():
+    executor = ShardedExecutor(AsyncAPIWrapper('https://www.wikidata.org/w/api.php'), processes=3)
+    assert executor.shards(list(range(7))) == [[0, 1], [2, 3], [4, 5, 6]]
+    assert executor.shards([1]) == [[1]]
+
+
+def test_statements_of_shards_are_concatenated(local_server):
+    log = []
+    entity_dicts = {f'Q{i}': entity_dict(f'Q{i}') for i in range(1, 9)}
+    aw = AsyncAPIWrapper(local_server(api_app(entity_dicts, log)).url('/w/api.php'))
+    # the server runs in a thread of this process, so workers are spawned instead of forked
+    executor = ShardedExecutor(aw, processes=2, context=mp.get_context('spawn'))
+    # props of the caller do not conflict with the ones of the call
+    table = executor.get_statements(list(entity_dicts), chunk_size=3, props=['labels'], languages=['en'])
+    assert table['subject'].tolist() == list(entity_dicts)
+    assert table['item_id'].tolist() == list(range(2, 10))
+    assert {params['props'] for params in log} == {'claims'}
+    assert len(log) == 4
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from asyncwikidata.api.statements import StatementTable
+from asyncwikidata.sinks import CSVSink, JSONLSink, ParquetSink
+from test.entities import entity_dict, item_claim, quantity_claim, time_snak
+
+pq = pytest.importorskip('pyarrow.parquet')
+
+
+def test_parquet_table_chunks_fill_columns_empty_in_the_first_one(tmp_path):
+    path = str(tmp_path / 'statements.parquet')
+    # the first chunk has no quantities (unit is empty), the second one has them and a qualifier
+    first = StatementTable.from_entity_dicts([entity_dict('Q1')])
+    claims = {'P31': [item_claim('P31', 5, qualifiers={'P580': [time_snak('P580', '+2001-02-03T00:00:00Z')]})],
+              'P1082': [quantity_claim('P1082', '+12')]}
+    second = StatementTable.from_entity_dicts([entity_dict('Q2', claims=claims)])
+    with ParquetSink(path) as sink:
+        sink.write_table(first)
+        sink.write_table(second)
+    table = pq.read_table(path)
+    assert table.schema == StatementTable.arrow_schema()
+    assert table.column('unit').to_pylist() == [None, None, None, '1']
+    # the qualifier refers to the row of its statement in the whole output
+    assert table.column('qualifier_of').to_pylist() == [-1, -1, 1, -1]
+
+
+def test_parquet_table_with_geological_times(tmp_path):
+    path = str(tmp_path / 'statements.parquet')
+    table = StatementTable.from_entity_dicts([entity_dict('Q1', claims={'P580': [
+        {'mainsnak': time_snak('P580', '-13798000000-00-00T00:00:00Z', precision=0), 'rank': 'normal'}]})])
+    with ParquetSink(path) as sink:
+        with pytest.raises(ValueError):
+            sink.write_table(table)
+    with ParquetSink(path, schema=StatementTable.arrow_schema(time_as_days=True)) as sink:
+        sink.write_table(table)
+    assert pq.read_table(path).column('time').to_pylist()[0] < -5 * 10 ** 12
+
+
+def test_parquet_rows_chunks_fill_columns_empty_in_the_first_one(tmp_path):
+    path = str(tmp_path / 'labels.parquet')
+    with ParquetSink(path) as sink:
+        sink.write([{'id': 'Q1', 'label': 'one', 'description': None}])
+        sink.write([{'id': 'Q2', 'label': 'two', 'description': 'number'}, {'id': 'Q3', 'description': 3}])
+    assert pq.read_table(path).to_pylist() == [{'id': 'Q1', 'label': 'one', 'description': None},
+                                               {'id': 'Q2', 'label': 'two', 'description': 'number'},
+                                               {'id': 'Q3', 'label': None, 'description': '3'}]
+    assert sink.rows == 3
+
+
+def test_text_sinks(tmp_path):
+    rows = [{'id': 'Q1', 'label': 'one'}, {'id': 'Q2', 'label': None}]
+    with JSONLSink(str(tmp_path / 'rows.jsonl')) as sink:
+        sink.write(rows)
+    with open(tmp_path / 'rows.jsonl', encoding='utf-8') as file:
+        assert [json.loads(line) for line in file] == rows
+    with CSVSink(str(tmp_path / 'rows.csv')) as sink:
+        sink.write(rows)
+        sink.write([{'id': 'Q3', 'label': 'three', 'extra': 1}])
+    with open(tmp_path / 'rows.csv', encoding='utf-8') as file:
+        assert file.read().splitlines() == ['id,label', 'Q1,one', 'Q2,', 'Q3,three']